@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Offline bulk resume-job scoring
+Scores every resume against every job posting in one NumPy pass
+
+Mirrors calculateMatchScore() in src/services/matchingService.js exactly
+(60% skills, 30% experience, 10% location, with the skills score split 80/20
+between required and preferred skills) but replaces the per-pair
+`Array.includes` loops with matrix products:
+
+- every required/preferred skill of the selected jobs gets a column in a
+  shared vocabulary (resume skills outside it can never match, so they are
+  dropped);
+- resumes become a 0/1 presence matrix over that vocabulary, jobs become
+  count matrices, and R @ Q.T gives matched-skill counts for all pairs;
+- experience and location scores are computed as outer operations over
+  resume years / job minimums and unique location strings.
+
+Resumes are processed in chunks and only a running top-K per job is kept, so
+memory stays bounded for ~100k resumes against every open posting.
+
+Input files are JSON arrays, API responses ({"data": [...]}) or JSONL, e.g.
+the rows exported from /api/resumes and /api/jobs.
+
+Usage:
+    python scripts/batch-match.py --resumes resumes.jsonl --jobs jobs.json --top-k 20 --out matches.jsonl
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - reported at runtime
+    np = None
+
+WEIGHTS = (0.6, 0.3, 0.1)
+FLOAT_PREFIX = re.compile(r'^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+
+def load_records(path):
+    """Read a JSON array, an API response envelope or JSONL"""
+    with open(path, 'r') as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith('['):
+        return json.loads(text)
+    if stripped.startswith('{'):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            records = data.get('data', data)
+            return records if isinstance(records, list) else [records]
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def parse_float(value):
+    """JavaScript parseFloat(value) || 0"""
+    if isinstance(value, bool) or value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else 0.0
+    match = FLOAT_PREFIX.match(str(value))
+    return float(match.group(0)) if match else 0.0
+
+
+def min_required_years(experience_required):
+    """parseInt of the first digit run in experience_required, else 0"""
+    match = re.search(r'(\d+)', experience_required or '')
+    return int(match.group(1)) if match else 0
+
+
+def js_round(x):
+    """JavaScript Math.round for non-negative values (halves round up)"""
+    floor = math.floor(x)
+    return floor + 1 if x - floor >= 0.5 else floor
+
+
+def recommendation(score):
+    if score >= 90:
+        return 'strong_yes'
+    if score >= 75:
+        return 'yes'
+    if score >= 50:
+        return 'maybe'
+    if score >= 25:
+        return 'no'
+    return 'strong_no'
+
+
+def resume_skills(resume):
+    skills = resume.get('skills') or {}
+    return [
+        s.lower()
+        for key in ('technical', 'soft_skills', 'tools')
+        for s in (skills.get(key) or [])
+    ]
+
+
+def score_pair(resume, job):
+    """Direct port of calculateMatchScore(), used as the reference for --verify"""
+    required = [s.lower() for s in job.get('required_skills') or []]
+    preferred = [s.lower() for s in job.get('preferred_skills') or []]
+    skills = resume_skills(resume)
+
+    matched = [s for s in required if s in skills]
+    missing = [s for s in required if s not in skills]
+    matched_preferred = [s for s in preferred if s in skills]
+
+    required_score = (len(matched) / len(required)) * 100 if required else 100
+    preferred_score = (len(matched_preferred) / len(preferred)) * 100 if preferred else 100
+    skills_match = js_round((required_score * 0.8) + (preferred_score * 0.2))
+
+    min_years = min_required_years(job.get('experience_required'))
+    years = parse_float(resume.get('total_years_experience'))
+    experience_match = 100 if min_years == 0 else min(100, js_round((years / min_years) * 100))
+
+    job_location, resume_location = job.get('location'), resume.get('location')
+    if not job_location or not resume_location:
+        location_match = 100
+    else:
+        job_location, resume_location = job_location.lower(), resume_location.lower()
+        location_match = 100 if resume_location in job_location or job_location in resume_location else 0
+
+    score = js_round(
+        (skills_match * WEIGHTS[0]) + (experience_match * WEIGHTS[1]) + (location_match * WEIGHTS[2])
+    )
+    return {
+        'score': score,
+        'breakdown': {
+            'skillsMatch': skills_match,
+            'experienceMatch': experience_match,
+            'locationMatch': location_match,
+        },
+        'matchedSkills': matched,
+        'missingSkills': missing,
+        'recommendation': recommendation(score),
+    }
+
+
+def np_js_round(x):
+    floor = np.floor(x)
+    return floor + ((x - floor) >= 0.5)
+
+
+class JobMatrix:
+    """Job postings encoded over a shared skill vocabulary"""
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.required = [[s.lower() for s in job.get('required_skills') or []] for job in jobs]
+        self.preferred = [[s.lower() for s in job.get('preferred_skills') or []] for job in jobs]
+
+        self.vocabulary = {}
+        for skills in self.required + self.preferred:
+            for skill in skills:
+                self.vocabulary.setdefault(skill, len(self.vocabulary))
+
+        size = max(len(self.vocabulary), 1)
+        # Counts, not flags: duplicated required skills count twice in JS too
+        self.required_counts = np.zeros((len(jobs), size), dtype=np.float32)
+        self.preferred_counts = np.zeros((len(jobs), size), dtype=np.float32)
+        for j, (required, preferred) in enumerate(zip(self.required, self.preferred)):
+            for skill in required:
+                self.required_counts[j, self.vocabulary[skill]] += 1
+            for skill in preferred:
+                self.preferred_counts[j, self.vocabulary[skill]] += 1
+        self.required_len = np.array([len(s) for s in self.required], dtype=np.float64)
+        self.preferred_len = np.array([len(s) for s in self.preferred], dtype=np.float64)
+
+        self.min_years = np.array(
+            [min_required_years(job.get('experience_required')) for job in jobs], dtype=np.float64
+        )
+        self.locations = [(job.get('location') or '').lower() for job in jobs]
+
+    def presence(self, skill_lists):
+        """0/1 matrix of which vocabulary skills each resume has"""
+        matrix = np.zeros((len(skill_lists), self.required_counts.shape[1]), dtype=np.float32)
+        vocabulary = self.vocabulary
+        for i, skills in enumerate(skill_lists):
+            for skill in skills:
+                column = vocabulary.get(skill)
+                if column is not None:
+                    matrix[i, column] = 1
+        return matrix
+
+    def location_scores(self, resume_locations):
+        """Location score for every pair, computed once per distinct string pair"""
+        unique_resume, resume_index = np.unique(np.array(resume_locations, dtype=object), return_inverse=True)
+        unique_job, job_index = np.unique(np.array(self.locations, dtype=object), return_inverse=True)
+        table = np.empty((len(unique_resume), len(unique_job)), dtype=np.float64)
+        for a, resume_location in enumerate(unique_resume):
+            for b, job_location in enumerate(unique_job):
+                if not resume_location or not job_location:
+                    table[a, b] = 100
+                else:
+                    table[a, b] = 100 if resume_location in job_location or job_location in resume_location else 0
+        return table[resume_index.reshape(-1)][:, job_index.reshape(-1)]
+
+    def score(self, resumes):
+        """Return (total, skills, experience, location) score matrices for a chunk"""
+        skill_lists = [resume_skills(resume) for resume in resumes]
+        presence = self.presence(skill_lists)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matched = presence @ self.required_counts.T
+            matched_preferred = presence @ self.preferred_counts.T
+            required_score = np.where(
+                self.required_len > 0, (matched / self.required_len) * 100, 100.0
+            )
+            preferred_score = np.where(
+                self.preferred_len > 0, (matched_preferred / self.preferred_len) * 100, 100.0
+            )
+            skills = np_js_round((required_score * 0.8) + (preferred_score * 0.2))
+
+            years = np.array([parse_float(r.get('total_years_experience')) for r in resumes])
+            experience = np.where(
+                self.min_years == 0,
+                100.0,
+                np.minimum(100, np_js_round((years[:, None] / self.min_years) * 100)),
+            )
+
+        location = self.location_scores([(r.get('location') or '').lower() for r in resumes])
+        total = np_js_round(
+            (skills * WEIGHTS[0]) + (experience * WEIGHTS[1]) + (location * WEIGHTS[2])
+        )
+        return total, skills, experience, location
+
+    def details(self, resume, j, scores):
+        """Full matchData for one pair, matching the shape the API stores"""
+        total, skills, experience, location = scores
+        resume_skill_set = set(resume_skills(resume))
+        required = self.required[j]
+        score = int(total)
+        return {
+            'score': score,
+            'breakdown': {
+                'skillsMatch': int(skills),
+                'experienceMatch': int(experience),
+                'locationMatch': int(location),
+            },
+            'matchedSkills': [s for s in required if s in resume_skill_set],
+            'missingSkills': [s for s in required if s not in resume_skill_set],
+            'recommendation': recommendation(score),
+        }
+
+
+def top_k(resumes, jobs, k, chunk_size=20000):
+    """Yield (job index, rank, resume index, matchData) for the best k resumes per job"""
+    matrix = JobMatrix(jobs)
+    # Running winners per job: resume index plus the four score matrices
+    best_index = np.empty((0, len(jobs)), dtype=np.int64)
+    best = [np.empty((0, len(jobs))) for _ in range(4)]
+
+    for start in range(0, len(resumes), chunk_size):
+        chunk = resumes[start:start + chunk_size]
+        scores = matrix.score(chunk)
+        index = np.broadcast_to(np.arange(start, start + len(chunk))[:, None], scores[0].shape)
+        candidate_index = np.vstack([best_index, index])
+        candidates = [np.vstack([b, s]) for b, s in zip(best, scores)]
+        # Highest score first; ties keep input order, like a stable sort in JS
+        order = np.lexsort((candidate_index, -candidates[0]), axis=0)[:k]
+        best_index = np.take_along_axis(candidate_index, order, axis=0)
+        best = [np.take_along_axis(c, order, axis=0) for c in candidates]
+
+    for j in range(len(jobs)):
+        for rank, r in enumerate(best_index[:, j], start=1):
+            scores = tuple(b[rank - 1, j] for b in best)
+            yield j, rank, int(r), matrix.details(resumes[int(r)], j, scores)
+
+
+def all_pairs(resumes, jobs, chunk_size=20000):
+    """Yield (job index, resume index, matchData) for every pair"""
+    matrix = JobMatrix(jobs)
+    for start in range(0, len(resumes), chunk_size):
+        chunk = resumes[start:start + chunk_size]
+        total, skills, experience, location = matrix.score(chunk)
+        for i, resume in enumerate(chunk):
+            for j in range(len(jobs)):
+                scores = (total[i, j], skills[i, j], experience[i, j], location[i, j])
+                yield j, start + i, matrix.details(resume, j, scores)
+
+
+def verify(resumes, jobs, samples, seed=0):
+    """Compare the vectorized scores against the scalar port on random pairs"""
+    rng = random.Random(seed)
+    matrix = JobMatrix(jobs)
+    picks = [rng.randrange(len(resumes)) for _ in range(min(samples, len(resumes)))]
+    chunk = [resumes[i] for i in picks]
+    scores = matrix.score(chunk)
+    mismatches = 0
+    for i, resume in enumerate(chunk):
+        for j, job in enumerate(jobs):
+            expected = score_pair(resume, job)
+            actual = matrix.details(resume, j, tuple(m[i, j] for m in scores))
+            if expected != actual:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"❌ resume {resume.get('id')} / job {job.get('id')}: {actual} != {expected}")
+    return mismatches, len(chunk) * len(jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score every resume against every job posting')
+    parser.add_argument('--resumes', required=True, help='Resumes as JSON, API response or JSONL')
+    parser.add_argument('--jobs', required=True, help='Job postings as JSON, API response or JSONL')
+    parser.add_argument('--out', help='Write results as JSONL here (default: stdout)')
+    parser.add_argument('--top-k', type=int, default=10, help='Best resumes to keep per job; 0 emits every pair')
+    parser.add_argument('--include-closed', action='store_true', help='Also score jobs whose status is not open')
+    parser.add_argument('--chunk-size', type=int, default=20000, help='Resumes scored per NumPy pass')
+    parser.add_argument('--verify', type=int, metavar='N',
+                        help='Check N random resumes against the scalar port of calculateMatchScore and exit')
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print('❌ batch-match.py requires NumPy (pip install numpy)', file=sys.stderr)
+        return 2
+
+    resumes = load_records(args.resumes)
+    jobs = load_records(args.jobs)
+    if not args.include_closed:
+        jobs = [job for job in jobs if job.get('status', 'open') == 'open']
+    if not resumes or not jobs:
+        print('❌ Nothing to score (no resumes or no open jobs)', file=sys.stderr)
+        return 1
+
+    if args.verify:
+        mismatches, pairs = verify(resumes, jobs, args.verify)
+        print(f"{'✅' if not mismatches else '❌'} {pairs - mismatches}/{pairs} pairs match calculateMatchScore")
+        return 1 if mismatches else 0
+
+    start = time.perf_counter()
+    out = open(args.out, 'w') if args.out else sys.stdout
+    rows = 0
+    try:
+        if args.top_k:
+            results = (
+                (j, r, dict(match, rank=rank))
+                for j, rank, r, match in top_k(resumes, jobs, args.top_k, args.chunk_size)
+            )
+        else:
+            results = all_pairs(resumes, jobs, args.chunk_size)
+        for j, r, match in results:
+            row = {
+                'job_id': jobs[j].get('id'),
+                'resume_id': resumes[r].get('id'),
+                'candidate_name': resumes[r].get('candidate_name'),
+            }
+            row.update(match)
+            out.write(json.dumps(row) + '\n')
+            rows += 1
+    finally:
+        if args.out:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    pairs = len(resumes) * len(jobs)
+    print(f"✅ Scored {pairs} pairs ({len(resumes)} resumes x {len(jobs)} jobs) in {elapsed:.2f}s, "
+          f"wrote {rows} rows", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""
+Tooling built around the DocuFlow Postman collection.
+
+The collection in postman/DocuFlow.postman_collection.json is the only
+executable description of the API, so these modules treat it as the source
+of truth for driving traffic against a running backend. Everything is
+invoked through scripts/update-postman.py and runs on the standard library,
+except for a few optional dependencies, imported only where they are used:
+
+* NumPy: `analytics` (required);
+* PyYAML: `--validate` (load, run, soak), YAML matrices for `envs`, and the
+  docs/swagger.yaml endpoints `update` merges (skipped without it);
+* pyarrow: Parquet files for `export --format parquet` and `analytics`;
+* uvloop: a faster event loop for `mock`, when installed.
+"""
+
+COLLECTION_PATH = 'postman/DocuFlow.postman_collection.json'
@@ -0,0 +1,719 @@
+"""
+Offline dashboard and report aggregates over exported records.
+
+getDashboardOverview, getDashboardTrends, getFinancialSummary,
+getInvoiceStats, getReceiptsByCategory and getMonthlyReport load every row
+of an account and aggregate it in JavaScript with one `filter`/`reduce` pass
+per number (documents_by_date alone filters all documents once per day).
+This module loads the rows written by `export` into NumPy columns once and
+computes the same responses with masks and bincount group-bys, so dashboards
+for large tenants can be precomputed offline and server-side rewrites of
+those controllers have a reference to be checked against.
+
+Every report follows the controller it mirrors, including JavaScript
+details: parseFloat(x || 0) amounts, `||` defaults, first-seen key order and
+stable sorts, UTC day keys from toISOString(), and keys that JSON.stringify
+drops because they are undefined. The one deliberate difference is the
+receipt date: by-category and monthly-report filter on `receipt_date`, which
+the Receipt model does not have, so here they use `purchase_date`, while
+the API fails on every monthly report and on dated by-category requests.
+
+`--verify` fetches each report from the API with the same parameters and
+compares the two field by field (amounts within --tolerance, since the
+database returns rows in a different order than the export and float sums
+depend on order).
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import re
+import time
+import warnings
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+from .api import ApiClient, add_api_arguments
+from .collection import load_collection, resolve_variables
+from .loadgen import parse_variables
+from .scenario import load_accounts
+from .stats import format_table
+
+# Report -> collection request serving it
+REPORTS = {
+    'overview': 'Get Dashboard Overview',
+    'trends': 'Get Document Processing Trends',
+    'financial': 'Get Financial Summary Data',
+    'invoice-stats': 'Get Invoice Statistics',
+    'by-category': 'Get Receipts by Category',
+    'monthly-report': 'Get Monthly Report',
+}
+
+DAY_MS = 24 * 60 * 60 * 1000
+NAT_MS = -2 ** 63  # datetime64('NaT') as int64
+PERIOD_DAYS = {'week': 7, 'month': 30, 'year': 365}
+DOCUMENT_TYPES = ['invoice', 'receipt', 'resume', 'contract']
+PROCESSING_STATUSES = ['pending', 'processing', 'completed', 'failed']
+INVOICE_STATUSES = ['pending', 'paid', 'overdue', 'cancelled']
+FLOAT_PREFIX = re.compile(r'^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+INT_PREFIX = re.compile(r'^\s*[+-]?\d+')
+
+
+def parse_float(value):
+    """JavaScript parseFloat(value || 0), with NaN read as 0 like the `|| 0` callers"""
+    if isinstance(value, bool) or not value:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else 0.0
+    match = FLOAT_PREFIX.match(str(value))
+    return float(match.group(0)) if match else 0.0
+
+
+def parse_int(value, default):
+    """JavaScript parseInt(value) || default"""
+    match = INT_PREFIX.match(str(value)) if value is not None else None
+    return int(match.group(0)) or default if match else default
+
+
+def parse_month(value):
+    """YYYY-MM as the (year, month) query strings of /api/receipts/monthly-report"""
+    match = re.match(r'^(\d{4})-(\d{1,2})$', value)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise argparse.ArgumentTypeError(f'expected YYYY-MM, got {value!r}')
+    return match.group(1), match.group(2)
+
+
+def load_records(path):
+    """Read a JSON array, an API response envelope, JSONL or (with pyarrow) Parquet"""
+    if path.endswith('.parquet'):
+        if pq is None:
+            raise ValueError(f'{path}: reading Parquet requires pyarrow')
+        return pq.read_table(path).to_pylist()
+    with open(path, 'r') as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith('['):
+        return json.loads(text)
+    if stripped.startswith('{'):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            records = data.get('data', data)
+            return records if isinstance(records, list) else [records]
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def load_export(path, resource):
+    """Rows of one resource from an export directory (finished shards only) or a file"""
+    if os.path.isdir(path):
+        files = sorted(
+            glob.glob(os.path.join(path, resource, '*.jsonl')) +
+            glob.glob(os.path.join(path, resource, '*.parquet'))
+        )
+        records = []
+        for name in files:
+            records.extend(load_records(name))
+        return records
+    return load_records(path)
+
+
+def parse_times(values, unit='ms'):
+    """ISO strings as UTC datetime64; missing or invalid values become NaT (Invalid Date)"""
+    values = [str(value) if value else 'NaT' for value in values]
+    try:
+        # Date.toJSON() output: let NumPy parse it once the Z is gone (a bare
+        # date-time is local time in JS, which is UTC on the server)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            parsed = np.array([value.rstrip('Z') for value in values], dtype='datetime64[ms]')
+    except (ValueError, UserWarning):
+        parsed = np.array([parse_offset_time(value) for value in values], dtype='datetime64[ms]')
+    return parsed.astype(f'datetime64[{unit}]')
+
+
+def parse_offset_time(value):
+    """One ISO string with any UTC offset as a naive UTC string, or NaT"""
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return 'NaT'
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.isoformat()
+
+
+def parse_time(value):
+    """One timestamp as epoch milliseconds, or None"""
+    moment = parse_times([value])[0]
+    return None if np.isnat(moment) else int(moment.astype('int64'))
+
+
+def iso_day(day):
+    """Day number since the epoch as toISOString().split('T')[0]"""
+    return str(np.datetime64(int(day), 'D'))
+
+
+def js_pick(record, keys):
+    """Object literal of record fields; undefined ones vanish from JSON like in JS"""
+    return {key: record[key] for key in keys if key in record}
+
+
+def text_column(records, key, default=None):
+    """record[key] || default, dictionary-encoded as (values in first-seen order, int codes)"""
+    index = {}
+    codes = np.fromiter((index.setdefault(record.get(key) or default, len(index)) for record in records),
+                        dtype=np.int64, count=len(records))
+    return list(index), codes
+
+
+def equals(column, value):
+    """Mask of rows whose text value is `value`"""
+    names, codes = column
+    if value not in names:
+        return np.zeros(len(codes), dtype=bool)
+    return codes == names.index(value)
+
+
+def group_by(column, weights=None, rows=None):
+    """Group a text column in first-seen order, like keys added to a JS object by reduce()
+
+    `rows` selects rows (mask or index array) and their order. Returns
+    (keys, codes, counts, sums) where codes numbers every selected row's group.
+    """
+    names, codes = column
+    if rows is not None:
+        codes = codes[rows]
+        weights = weights[rows] if weights is not None else None
+    if not len(codes):
+        return [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    present, first = np.unique(codes, return_index=True)
+    order = present[np.argsort(first)]
+    remap = np.zeros(len(names), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    codes = remap[codes]
+    counts = np.bincount(codes, minlength=len(order))
+    sums = np.bincount(codes, weights=weights, minlength=len(order)) if weights is not None else None
+    return [names[c] for c in order], codes, counts, sums
+
+
+def date_range_mask(days, start_date=None, end_date=None):
+    """buildDateRangeFilter() on a DATEONLY column: inclusive, no date never matches"""
+    mask = np.ones(len(days), dtype=bool)
+    if start_date:
+        mask &= days >= np.datetime64(start_date[:10], 'D')
+    if end_date:
+        mask &= days <= np.datetime64(end_date[:10], 'D')
+    return mask
+
+
+def newest(created, rows, count):
+    """Indices of the `count` latest rows, newest first; ties keep row order (stable sort)"""
+    created = created[rows]
+    if len(created) > count:
+        cutoff = np.partition(created, len(created) - count)[len(created) - count]
+        keep = np.flatnonzero(created >= cutoff)
+        rows, created = rows[keep], created[keep]
+    return rows[np.argsort(-np.maximum(created, NAT_MS + 1), kind='stable')[:count]]
+
+
+class Table:
+    """Columns of one resource; `records` keeps the rows for reports that return them"""
+
+    def __init__(self, records, columns):
+        self.records = records
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+
+class Dataset:
+    """One account's documents, invoices and receipts as NumPy columns"""
+
+    def __init__(self, documents=(), invoices=(), receipts=()):
+        documents, invoices, receipts = list(documents), list(invoices), list(receipts)
+        self.documents = Table(documents, {
+            'document_type': text_column(documents, 'document_type'),
+            'status': text_column(documents, 'processing_status'),
+            'created': self._created(documents),
+        })
+        self.invoices = Table(invoices, {
+            'amount': self._amounts(invoices),
+            'status': text_column(invoices, 'status'),
+            'currency': text_column(invoices, 'currency', 'USD'),
+            'created': self._created(invoices),
+            'date': parse_times([r.get('invoice_date') for r in invoices], 'D'),
+        })
+        self.receipts = Table(receipts, {
+            'amount': self._amounts(receipts),
+            'category': text_column(receipts, 'expense_category', 'uncategorized'),
+            'payment_method': text_column(receipts, 'payment_method', 'unknown'),
+            'business': np.fromiter((bool(r.get('is_business_expense')) for r in receipts),
+                                    dtype=bool, count=len(receipts)),
+            'created': self._created(receipts),
+            'date': parse_times([r.get('purchase_date') for r in receipts], 'D'),
+        })
+
+    @staticmethod
+    def _amounts(records):
+        return np.fromiter((parse_float(r.get('total_amount')) for r in records),
+                           dtype=np.float64, count=len(records))
+
+    @staticmethod
+    def _created(records):
+        return parse_times([r.get('createdAt') or r.get('created_at') for r in records]).astype('int64')
+
+    @staticmethod
+    def _created_mask(table, now_ms, start_date=None, end_date=None, period=None):
+        """The createdAt filter shared by the dashboard overview and financial summary"""
+        # NaT is the smallest int64, so missing timestamps fail every lower bound
+        created = table['created']
+        if start_date and end_date:
+            start_ms, end_ms = parse_time(start_date), parse_time(end_date + 'T23:59:59')
+            if start_ms is None or end_ms is None:
+                raise ValueError(f'invalid date range {start_date}..{end_date}')
+            return (created >= start_ms) & (created <= end_ms)
+        if period:
+            return created >= now_ms - PERIOD_DAYS.get(period, 7) * DAY_MS
+        return np.ones(len(table), dtype=bool)
+
+    def _invoice_status(self, mask):
+        """{status: (count, amount)} of the selected invoices"""
+        amount = self.invoices['amount']
+        totals = {}
+        for status in INVOICE_STATUSES:
+            selected = equals(self.invoices['status'], status) & mask
+            totals[status] = (int(np.count_nonzero(selected)), float(amount[selected].sum()))
+        return totals
+
+    def overview(self, now_ms, start_date=None, end_date=None, period=None):
+        """GET /api/dashboard/overview"""
+        documents = self._created_mask(self.documents, now_ms, start_date, end_date, period)
+        invoices = self._created_mask(self.invoices, now_ms, start_date, end_date, period)
+        receipts = self._created_mask(self.receipts, now_ms, start_date, end_date, period)
+
+        def count(column, value):
+            return int(np.count_nonzero(equals(self.documents[column], value) & documents))
+
+        summary = {
+            'total_documents': int(np.count_nonzero(documents)),
+            'documents_by_type': {t: count('document_type', t) for t in DOCUMENT_TYPES},
+            'processing_status': {s: count('status', s) for s in PROCESSING_STATUSES},
+        }
+
+        status = self._invoice_status(invoices)
+        receipt_amount = self.receipts['amount'][receipts]
+        business = np.count_nonzero(self.receipts['business'] & receipts)
+        categories, _, _, sums = group_by(self.receipts['category'], self.receipts['amount'], receipts)
+        financial = {
+            'invoices': {
+                'total_count': int(np.count_nonzero(invoices)),
+                'total_amount': float(self.invoices['amount'][invoices].sum()),
+                'by_status': {s: status[s][0] for s in ('pending', 'paid', 'overdue')},
+                'pending_amount': status['pending'][1],
+                'paid_amount': status['paid'][1],
+            },
+            'receipts': {
+                'total_count': len(receipt_amount),
+                'total_amount': float(receipt_amount.sum()),
+                'business_expenses': int(business),
+                'personal_expenses': len(receipt_amount) - int(business),
+                'top_categories': [
+                    {'category': categories[i], 'amount': float(sums[i])}
+                    for i in np.argsort(-sums, kind='stable')
+                ],
+            },
+        }
+
+        created = self.documents['created']
+        recent_activity = []
+        for i in newest(created, np.flatnonzero(documents), 10):
+            doc = self.documents.records[i]
+            recent_activity.append({
+                'id': doc.get('id'),
+                'type': 'upload',
+                'document_type': doc.get('document_type'),
+                'filename': doc.get('original_filename'),
+                'status': doc.get('processing_status'),
+                'created_at': doc.get('createdAt') or doc.get('created_at'),
+            })
+
+        # One bincount over day offsets replaces the per-day filter loop
+        created = created[documents]
+        today = now_ms // DAY_MS
+        age = today - created[created != NAT_MS] // DAY_MS
+        by_day = np.bincount(age[(age >= 0) & (age < 30)], minlength=30)
+        trends = {
+            'uploads_last_7_days': int(np.count_nonzero(created >= now_ms - 7 * DAY_MS)),
+            'uploads_last_30_days': int(np.count_nonzero(created >= now_ms - 30 * DAY_MS)),
+            'documents_by_date': [
+                {'date': iso_day(today - i), 'count': int(by_day[i])} for i in range(29, -1, -1)
+            ],
+        }
+        return {'summary': summary, 'financial': financial, 'recent_activity': recent_activity, 'trends': trends}
+
+    def trends(self, now_ms, period=None):
+        """GET /api/dashboard/trends"""
+        days = parse_int(period, 7)
+        created = self.documents['created']
+        today = now_ms // DAY_MS
+        age = today - created // DAY_MS
+        mask = (created >= now_ms - days * DAY_MS) & (age >= 0) & (age < days)
+        completed = mask & equals(self.documents['status'], 'completed')
+        uploads = np.bincount(age[mask], minlength=max(days, 0))
+        processed = np.bincount(age[completed], minlength=max(days, 0))
+        return {'trends': [
+            {'date': iso_day(today - i), 'uploads': int(uploads[i]), 'processed': int(processed[i])}
+            for i in range(days - 1, -1, -1)
+        ]}
+
+    def financial(self, now_ms, start_date=None, end_date=None):
+        """GET /api/dashboard/financial"""
+        invoices = self._created_mask(self.invoices, now_ms, start_date, end_date)
+        receipts = self._created_mask(self.receipts, now_ms, start_date, end_date)
+        status = self._invoice_status(invoices)
+        return {
+            'totalInvoiceAmount': float(self.invoices['amount'][invoices].sum()),
+            'totalReceiptAmount': float(self.receipts['amount'][receipts].sum()),
+            'pendingInvoices': status['pending'][0],
+            'currency': 'USD',
+            'byStatus': {s: status[s][0] for s in ('paid', 'pending', 'overdue', 'cancelled')},
+        }
+
+    def invoice_stats(self, start_date=None, end_date=None):
+        """GET /api/invoices/stats"""
+        mask = date_range_mask(self.invoices['date'], start_date, end_date)
+        status = self._invoice_status(mask)
+        currencies, _, counts, sums = group_by(self.invoices['currency'], self.invoices['amount'], mask)
+        total = float(self.invoices['amount'][mask].sum())
+        invoices = int(counts.sum())
+        return {
+            'total_invoices': invoices,
+            'total_amount': total,
+            'by_status': {s: status[s][0] for s in ('pending', 'paid', 'overdue')},
+            'average_amount': total / invoices if invoices else 0,
+            'by_currency': {c: float(s) for c, s in zip(currencies, sums)},
+        }
+
+    def by_category(self, start_date=None, end_date=None, is_business_expense=None, rows=True):
+        """GET /api/receipts/by-category (filtered on purchase_date)"""
+        mask = date_range_mask(self.receipts['date'], start_date, end_date)
+        if is_business_expense is not None:
+            mask &= self.receipts['business'] == (is_business_expense == 'true')
+        index = np.flatnonzero(mask)
+        categories, codes, counts, sums = group_by(self.receipts['category'], self.receipts['amount'], index)
+        members = index[np.argsort(codes, kind='stable')]
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        result = []
+        for g in np.argsort(-sums, kind='stable'):
+            entry = {'category': categories[g], 'count': int(counts[g]), 'total_amount': float(sums[g])}
+            if rows:
+                entry['receipts'] = [
+                    js_pick(self.receipts.records[i],
+                            ('id', 'merchant_name', 'receipt_date', 'total_amount', 'currency'))
+                    for i in members[bounds[g]:bounds[g + 1]]
+                ]
+            result.append(entry)
+        return result
+
+    def monthly_reports(self, months=None, rows=True):
+        """GET /api/receipts/monthly-report for several months in one pass
+
+        `months` is a list of (year, month) query strings; None means every
+        month with a dated receipt. Returns {(year, month): data}.
+        """
+        days = self.receipts['date']
+        month_of = days.astype('datetime64[M]')
+        if months is None:
+            present = np.unique(month_of[~np.isnat(month_of)])
+            months = [(str(m)[:4], str(m)[5:7]) for m in present]
+        if not months:
+            return {}
+        keys = [np.datetime64(f'{int(year):04d}-{int(month):02d}', 'M') for year, month in months]
+        wanted = np.unique(np.array(keys, dtype='datetime64[M]'))
+        slot = np.minimum(np.searchsorted(wanted, month_of), len(wanted) - 1)
+        index = np.flatnonzero(~np.isnat(month_of) & (wanted[slot] == month_of))
+
+        # Rows of each month in receipt date order, the order the controller sums them in
+        order = np.lexsort((index, days[index].astype('int64'), slot[index]))
+        index, slot = index[order], slot[index][order]
+        amount, business = self.receipts['amount'][index], self.receipts['business'][index]
+        bounds = np.searchsorted(slot, np.arange(len(wanted) + 1))
+        count = np.bincount(slot, minlength=len(wanted))
+        total = np.bincount(slot, weights=amount, minlength=len(wanted))
+        business_count = np.bincount(slot[business], minlength=len(wanted))
+        # One bincount per breakdown over (month, key) pairs
+        grouped = {}
+        for key, column in (('by_category', 'category'), ('by_payment_method', 'payment_method')):
+            names, codes, _, _ = group_by(self.receipts[column], rows=index)
+            width = max(len(names), 1)
+            sums = np.bincount(slot * width + codes, weights=amount, minlength=len(wanted) * width)
+            grouped[key] = (names, codes, width, sums)
+
+        reports = {}
+        for (year, month), key in zip(months, keys):
+            s = int(np.searchsorted(wanted, key))
+            summary = {
+                'month': f"{year}-{str(month).rjust(2, '0')}",
+                'total_receipts': int(count[s]),
+                'total_amount': float(total[s]),
+                'business_expenses': int(business_count[s]),
+                'personal_expenses': int(count[s] - business_count[s]),
+            }
+            for name, (names, codes, width, sums) in grouped.items():
+                # Keys in first-seen order within the month
+                present, first = np.unique(codes[bounds[s]:bounds[s + 1]], return_index=True)
+                summary[name] = {names[c]: float(sums[s * width + c]) for c in present[np.argsort(first)]}
+            data = {'summary': summary}
+            if rows:
+                data['receipts'] = [self.receipts.records[i] for i in index[bounds[s]:bounds[s + 1]]]
+            reports[(year, month)] = data
+        return reports
+
+    def monthly_report(self, year, month, rows=True):
+        """GET /api/receipts/monthly-report (filtered on purchase_date)"""
+        return self.monthly_reports([(year, month)], rows)[(year, month)]
+
+
+def compare(expected, actual, tolerance, path='data'):
+    """Paths where two JSON values differ; numbers match within a relative tolerance"""
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return [] if expected == actual else [f'{path}: {expected!r} != {actual!r}']
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        if math.isclose(expected, actual, rel_tol=tolerance, abs_tol=1e-6):
+            return []
+        return [f'{path}: {expected!r} != {actual!r}']
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        problems = [f'{path}.{key}: missing' for key in expected if key not in actual]
+        problems += [f'{path}.{key}: unexpected' for key in actual if key not in expected]
+        for key in expected:
+            if key in actual:
+                problems += compare(expected[key], actual[key], tolerance, f'{path}.{key}')
+        return problems
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f'{path}: {len(expected)} items != {len(actual)}']
+        problems = []
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            problems += compare(a, b, tolerance, f'{path}[{i}]')
+        return problems
+    return [] if expected == actual else [f'{path}: {expected!r} != {actual!r}']
+
+
+def by_id(items):
+    return sorted(items, key=lambda item: str(item.get('id')))
+
+
+def normalize(report, data):
+    """Undo orderings that depend on the database's row order before comparing"""
+    if report == 'by-category' and isinstance(data, list):
+        return [dict(entry, receipts=by_id(entry['receipts'])) if 'receipts' in entry else entry
+                for entry in data]
+    if report == 'monthly-report' and isinstance(data, dict) and 'receipts' in data:
+        return dict(data, receipts=by_id(data['receipts']))
+    return data
+
+
+class Verifier(ApiClient):
+    """Fetch the same reports from the API"""
+
+    def __init__(self, collection, variables, account, timeout=60.0):
+        super().__init__(collection, variables, concurrency=4, timeout=timeout)
+        self.account = account
+
+    async def fetch(self, report, params):
+        """(data, None) or (None, failure reason)"""
+        query = {key: value for key, value in params.items() if value is not None}
+        seconds, response = await self.get(self.account, self.url(REPORTS[report], query))
+        if seconds is None:
+            return None, response
+        return response.json().get('data'), None
+
+
+def timed(compute, *args, **kwargs):
+    start = time.perf_counter()
+    data = compute(*args, **kwargs)
+    return data, (time.perf_counter() - start) * 1000
+
+
+def compute_reports(dataset, args, now_ms):
+    """Report rows ({report, query, params, offline_ms, data}) for every requested report"""
+    rows = not args.no_rows
+    date_range = {'start_date': args.start_date, 'end_date': args.end_date}
+    results = []
+    for report in args.report or list(REPORTS):
+        if report == 'overview':
+            params = dict(date_range, period=args.period)
+            results.append((report, params) + timed(dataset.overview, now_ms, **params))
+        elif report == 'trends':
+            params = {'period': str(args.trend_days)}
+            results.append((report, params) + timed(dataset.trends, now_ms, **params))
+        elif report == 'financial':
+            results.append((report, date_range) + timed(dataset.financial, now_ms, **date_range))
+        elif report == 'invoice-stats':
+            results.append((report, date_range) + timed(dataset.invoice_stats, **date_range))
+        elif report == 'by-category':
+            params = dict(date_range, is_business_expense=args.business)
+            results.append((report, params) + timed(dataset.by_category, rows=rows, **params))
+        elif report == 'monthly-report':
+            monthly, ms = timed(dataset.monthly_reports, args.month or None, rows)
+            # Built in one pass: spread its time over the months
+            for (year, month), data in monthly.items():
+                results.append((report, {'year': year, 'month': month}, data, ms / len(monthly)))
+
+    computed = []
+    for report, params, data, ms in results:
+        query = {key: value for key, value in params.items() if value is not None}
+        computed.append({
+            'report': report,
+            'query': query,
+            'params': ' '.join(f'{key}={value}' for key, value in query.items()) or '-',
+            'offline_ms': ms,
+            'api_ms': None,
+            'result': '',
+            'data': data,
+        })
+    return computed
+
+
+REPORT_COLUMNS = [
+    ('Report', 'report', '{}'),
+    ('Parameters', 'params', '{}'),
+    ('Offline ms', 'offline_ms', '{:.2f}'),
+    ('API ms', 'api_ms', '{:.1f}'),
+    ('Result', 'result', '{}'),
+]
+
+
+async def verify_reports(computed, verifier, tolerance):
+    async with verifier:
+        for row in computed:
+            start = time.perf_counter()
+            expected, failure = await verifier.fetch(row['report'], row['query'])
+            row['api_ms'] = (time.perf_counter() - start) * 1000
+            if failure:
+                row['result'] = f'⚠️  API: {failure}'
+                row['api_error'] = failure
+                continue
+            problems = compare(normalize(row['report'], expected), normalize(row['report'], row['data']),
+                               tolerance)
+            row['problems'] = problems
+            row['result'] = '✅ match' if not problems else f'❌ {len(problems)} fields differ'
+
+
+def add_arguments(parser):
+    parser.add_argument('--data', default='exports',
+                        help='Export directory written by `export` (default: exports)')
+    parser.add_argument('--documents', help='Documents file (JSON, API response, JSONL or Parquet); '
+                                            'default: <data>/documents')
+    parser.add_argument('--invoices', help='Invoices file; default: <data>/invoices')
+    parser.add_argument('--receipts', help='Receipts file; default: <data>/receipts')
+    parser.add_argument('--report', action='append', default=[], choices=list(REPORTS),
+                        help='Compute only this report (repeatable, default: all)')
+    parser.add_argument('--start-date', help='start_date for overview, financial, invoice-stats and by-category')
+    parser.add_argument('--end-date', help='end_date for the same reports')
+    parser.add_argument('--period', choices=list(PERIOD_DAYS), help='Overview period when no date range is given')
+    parser.add_argument('--trend-days', type=int, default=7, help='period for /api/dashboard/trends (default: 7)')
+    parser.add_argument('--business', choices=['true', 'false'], help='is_business_expense for by-category')
+    parser.add_argument('--month', action='append', default=[], type=parse_month, metavar='YYYY-MM',
+                        help='Monthly report to build (repeatable, default: every month with receipts)')
+    parser.add_argument('--now', help="Reference time for rolling windows (ISO timestamp, default: now)")
+    parser.add_argument('--no-rows', action='store_true',
+                        help='Leave the receipt lists out of by-category and monthly reports')
+    parser.add_argument('-o', '--out', help='Write the reports to this JSON file')
+    parser.add_argument('--verify', action='store_true',
+                        help='Fetch every report from the API and compare it with the offline result')
+    parser.add_argument('--tolerance', type=float, default=1e-9,
+                        help='Relative tolerance for amounts in --verify (default: 1e-9)')
+    add_api_arguments(parser, single_account=True)
+
+
+def run(args):
+    if np is None:
+        print('❌ analytics requires NumPy (pip install numpy)')
+        return 1
+    if args.verify and args.no_rows and {'by-category', 'monthly-report'} & set(args.report or REPORTS):
+        print('❌ --verify compares the receipt lists too; drop --no-rows')
+        return 1
+
+    start = time.perf_counter()
+    try:
+        records = {
+            name: load_export(getattr(args, name) or args.data, name)
+            for name in ('documents', 'invoices', 'receipts')
+        }
+    except (OSError, ValueError) as error:
+        print(f'❌ {error}')
+        return 1
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    dataset = Dataset(**records)
+    column_seconds = time.perf_counter() - start
+    print(f"📊 Loaded {len(dataset.documents)} documents, {len(dataset.invoices)} invoices and "
+          f"{len(dataset.receipts)} receipts in {load_seconds:.2f}s (columns built in {column_seconds:.2f}s)")
+    if not len(dataset.documents) and {'overview', 'trends'} & set(args.report or REPORTS):
+        print('⚠️  No documents: export them with `export --resource documents`')
+
+    now_ms = parse_time(args.now) if args.now else int(time.time() * 1000)
+    if now_ms is None:
+        print(f'❌ Invalid --now {args.now}')
+        return 1
+    try:
+        computed = compute_reports(dataset, args, now_ms)
+    except ValueError as error:
+        print(f'❌ {error}')
+        return 1
+
+    if args.verify:
+        collection = load_collection(args.collection)
+        variables = resolve_variables(collection, parse_variables(args.var), args.base_url)
+        verifier = Verifier(collection, variables, load_accounts(args, collection)[0], timeout=args.timeout)
+        try:
+            for report in {row['report'] for row in computed}:
+                verifier.base_url(REPORTS[report])
+        except ValueError as error:
+            print(f'❌ {error}')
+            return 1
+        asyncio.run(verify_reports(computed, verifier, args.tolerance))
+
+    print(format_table(computed, [c for c in REPORT_COLUMNS if args.verify or c[1] not in ('api_ms', 'result')]))
+    for row in computed:
+        for problem in row.get('problems', [])[:5]:
+            print(f"❌ {row['report']} {row['params']}: {problem}")
+    errors = [row for row in computed if row.get('api_error')]
+    if any(row['report'] in ('by-category', 'monthly-report') and 'HTTP 5' in row['api_error'] for row in errors):
+        print('⚠️  by-category/monthly-report filter on receipt_date, which receipts do not have; '
+              'the offline reports use purchase_date')
+
+    if args.out:
+        output = {
+            'generated_at': str(np.datetime64(now_ms, 'ms')) + 'Z',
+            'reports': [{'report': row['report'], 'params': row['query'], 'data': row['data']} for row in computed],
+        }
+        with open(args.out, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f'💾 Wrote {len(computed)} reports to {args.out}')
+    if args.verify:
+        failed = sum(1 for row in computed if row.get('problems'))
+        checked = sum(1 for row in computed if 'problems' in row)
+        print(f"{'✅' if not failed else '❌'} {checked - failed}/{checked} reports match the API"
+              f"{f' ({len(errors)} not checked: API errors)' if errors else ''}")
+        return 1 if failed else 0
+    return 0
@@ -0,0 +1,118 @@
+"""
+Authenticated GETs of collection requests.
+
+`analytics`, `export` and `warm` all read report and list endpoints as one
+account: they resolve a request's URL from the collection (without its
+example query string), log in through the shared TokenCache unless an
+accessToken variable is set, and log in again once when a token is
+rejected with 401. add_api_arguments() adds the options all four commands
+(and `uploads bench`) take to reach the API.
+"""
+
+import asyncio
+import time
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+from .client import HTTPClient, HTTPError
+from .collection import RequestSpec, check_resolved, find_item
+from .scenario import StepFailed, TokenCache
+
+NETWORK_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HTTPError)
+
+
+def add_api_arguments(parser, single_account=False, timeout=60.0):
+    """--base-url, --var, the account options and --timeout"""
+    parser.add_argument('--base-url', help="Override the {{baseUrl}} collection variable (default: the collection's baseUrl)")
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE',
+                        help='Set a collection variable, e.g. accessToken to skip logging in (repeatable)')
+    if single_account:
+        parser.add_argument('--account', action='append', default=[], metavar='EMAIL:PASSWORD',
+                            help='Account to log in as (default: the Login request body)')
+        parser.add_argument('--accounts-file', help='CSV file of email,password lines (the first is used)')
+    else:
+        parser.add_argument('--account', action='append', default=[], metavar='EMAIL:PASSWORD',
+                            help='Account to log in as (repeatable, default: the Login request body)')
+        parser.add_argument('--accounts-file', help='CSV file of email,password lines')
+    parser.add_argument('--timeout', type=float, default=timeout,
+                        help=f'Per-request timeout in seconds (default: {timeout:g})')
+
+
+def failure_reason(response):
+    """'HTTP 400 FILE_TOO_LARGE' from an errorResponse() body, else just the status"""
+    try:
+        code = response.json()['error']['code']
+    except (ValueError, KeyError, TypeError):
+        code = None
+    return f'HTTP {response.status} {code}' if code else f'HTTP {response.status}'
+
+
+class ApiClient:
+    """Pooled client and token cache for GETs of collection requests"""
+
+    def __init__(self, collection, variables, concurrency=1, timeout=60.0):
+        self.collection = collection
+        self.variables = variables
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.client = None
+        self.token_cache = None
+        self.base_urls = {}
+
+    def base_url(self, request_name):
+        """URL of a collection request without its query; ValueError when variables are unset"""
+        base = self.base_urls.get(request_name)
+        if base is None:
+            folder, item = find_item(self.collection, request_name)
+            parts = urlsplit(RequestSpec.from_item(item, folder, self.variables).url)
+            base = urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+            self.base_urls[request_name] = check_resolved(base, f'{request_name} URL')
+        return base
+
+    def url(self, request_name, params=None):
+        return self.base_url(request_name) + (f'?{urlencode(params)}' if params else '')
+
+    async def token(self, account):
+        if self.variables.get('accessToken'):
+            return self.variables['accessToken']
+        return await self.token_cache.token(account)
+
+    async def request(self, account, url, headers=()):
+        """
+        (seconds, response) for a GET as `account`, logging in again once
+        after a 401; network errors and StepFailed from the login propagate.
+        """
+        for attempt in range(2):
+            token = await self.token(account)
+            start = time.perf_counter()
+            response = await self.client.request('GET', url, [('Authorization', f'Bearer {token}'), *headers])
+            seconds = time.perf_counter() - start
+            if response.status == 401 and attempt == 0 and not self.variables.get('accessToken'):
+                self.token_cache.invalidate(account, token)
+                continue
+            return seconds, response
+
+    async def get(self, account, url, headers=()):
+        """(seconds, response) or (None, failure reason) for responses below 400"""
+        try:
+            await self.token(account)
+        except StepFailed as error:
+            return None, f'login {error}'
+        except NETWORK_ERRORS as error:
+            return None, f'login {type(error).__name__}'
+        try:
+            seconds, response = await self.request(account, url, headers)
+        except StepFailed as error:
+            return None, f'login {error}'
+        except NETWORK_ERRORS as error:
+            return None, type(error).__name__
+        if response.status >= 400:
+            return None, failure_reason(response)
+        return seconds, response
+
+    async def __aenter__(self):
+        self.client = HTTPClient(limit_per_host=self.concurrency, timeout=self.timeout)
+        self.token_cache = TokenCache(self.client, self.collection, self.variables)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.close()
@@ -0,0 +1,355 @@
+"""
+Minimal asyncio HTTP/1.1 client with keep-alive connection pooling.
+
+Only what the load tools need is implemented: one request in flight per
+connection, Content-Length and chunked response bodies, and a bounded pool of
+idle connections per origin so virtual users reuse sockets instead of paying
+for a TCP handshake on every request.
+
+Request bodies are bytes, or any object with `__len__` and a `chunks()`
+generator of bytes-like pieces; those are written one chunk at a time,
+waiting for the socket to drain in between, so large uploads never sit in
+memory as a whole.
+
+A request that fails on a reused keep-alive connection (the server may have
+closed it while idle) is retried once on a fresh one, but only for idempotent
+methods: a POST may already have been processed.
+
+prepare_request() parses the URL and encodes the request head once;
+HTTPClient.send() can then send the same PreparedRequest repeatedly.
+
+Every Response carries the Timings of its phases: waiting for a pooled
+connection, and for new connections DNS, TCP connect and the TLS handshake,
+then writing the request, time to first byte and reading the rest. TLS is
+timed apart from connect on Python 3.11+ (StreamWriter.start_tls); before
+that the handshake is included in connect.
+"""
+
+import asyncio
+import collections
+import json
+import socket
+import ssl as ssl_module
+import time
+from urllib.parse import urlsplit
+
+USER_AGENT = 'docuflow-postman-tools/1.0'
+# Safe to send twice, so a request that failed on a reused connection is retried
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+
+class HTTPError(Exception):
+    """Raised when a response cannot be read or the connection fails"""
+
+
+class Timings:
+    """Seconds spent in each phase of one request; None for phases that did not happen"""
+
+    __slots__ = ('queue', 'dns', 'connect', 'tls', 'send', 'ttfb', 'body')
+
+    PHASES = __slots__
+
+    def __init__(self, queue=0.0):
+        self.queue = queue
+        self.dns = None
+        self.connect = None
+        self.tls = None
+        self.send = None
+        self.ttfb = None
+        self.body = None
+
+
+class Response:
+    """A fully read HTTP response"""
+
+    __slots__ = ('status', 'reason', 'headers', 'body', 'keep_alive', 'timings')
+
+    def __init__(self, status, reason, headers, body, keep_alive):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+        self.timings = None
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class PreparedRequest:
+    """A request with its origin parsed and its head encoded"""
+
+    __slots__ = ('method', 'scheme', 'host', 'port', 'head', 'body')
+
+    def __init__(self, method, scheme, host, port, head, body):
+        self.method = method
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.head = head
+        self.body = body
+
+
+def prepare_request(method, url, headers=(), body=b''):
+    """Parse the URL and encode the request head once"""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise HTTPError(f'unsupported URL: {url}')
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {parts.netloc}']
+    names = set()
+    for key, value in headers:
+        names.add(key.lower())
+        lines.append(f'{key}: {value}')
+    if 'user-agent' not in names:
+        lines.append(f'User-Agent: {USER_AGENT}')
+    if 'accept' not in names:
+        lines.append('Accept: application/json')
+    if body or method in ('POST', 'PUT', 'PATCH'):
+        lines.append(f'Content-Length: {len(body)}')
+    head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+    return PreparedRequest(method, parts.scheme, parts.hostname, port, head, body)
+
+
+class Connection:
+    """A single keep-alive connection to one origin"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def usable(self):
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+    async def abort(self):
+        """Close a connection that failed, consuming the error its stream recorded"""
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+    async def send(self, head, body, method, timings):
+        start = time.perf_counter()
+        if isinstance(body, (bytes, bytearray)):
+            self.writer.write(head + body if body else head)
+            await self.writer.drain()
+            sent = time.perf_counter()
+            timings.send = sent - start
+            return await self._read_response(method, timings, sent)
+
+        self.writer.write(head)
+        try:
+            for chunk in body.chunks():
+                self.writer.write(chunk)
+                await self.writer.drain()
+        except ConnectionError as error:
+            # The server may answer and hang up before the body is complete
+            # (e.g. multer rejecting an oversized file); report that answer
+            # when it was sent, otherwise the reset itself
+            sent = time.perf_counter()
+            timings.send = sent - start
+            try:
+                response = await self._read_response(method, timings, sent)
+            except (ConnectionError, asyncio.IncompleteReadError, HTTPError):
+                raise error from None
+            response.keep_alive = False
+            return response
+        sent = time.perf_counter()
+        timings.send = sent - start
+        return await self._read_response(method, timings, sent)
+
+    async def _read_response(self, method, timings, sent):
+        reader = self.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise HTTPError('connection closed before response')
+        first_byte = time.perf_counter()
+        timings.ttfb = first_byte - sent
+        try:
+            version, status, *reason = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+            status = int(status)
+        except ValueError:
+            raise HTTPError(f'malformed status line: {status_line!r}')
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked()
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        response = Response(status, reason[0] if reason else '', headers, body, keep_alive)
+        timings.body = time.perf_counter() - first_byte
+        response.timings = timings
+        return response
+
+    async def _read_chunked(self):
+        reader = self.reader
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                # Skip optional trailers up to the terminating blank line
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive connections to a single origin"""
+
+    def __init__(self, host, port, ssl=None, limit=100, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.timeout = timeout
+        self.connects = 0
+        self._idle = collections.deque()
+        self._slots = asyncio.Semaphore(limit)
+
+    async def _open(self, timings):
+        start = time.perf_counter()
+        infos = await asyncio.get_running_loop().getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        timings.dns = resolved - start
+
+        split_tls = self.ssl is not None and hasattr(asyncio.StreamWriter, 'start_tls')
+        ssl = None if split_tls else self.ssl
+        error = None
+        for family, _, _, _, address in infos:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    address[0], address[1], family=family, ssl=ssl,
+                    server_hostname=self.host if ssl else None,
+                )
+                break
+            except OSError as exc:
+                error = exc
+        else:
+            raise error or OSError(f'{self.host} did not resolve')
+        connected = time.perf_counter()
+        timings.connect = connected - resolved
+        if split_tls:
+            await writer.start_tls(self.ssl, server_hostname=self.host)
+            timings.tls = time.perf_counter() - connected
+        return reader, writer
+
+    async def _connect(self, timings):
+        reader, writer = await asyncio.wait_for(self._open(timings), self.timeout)
+        self.connects += 1
+        return Connection(reader, writer)
+
+    def _checkout(self):
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.usable:
+                return conn
+            conn.close()
+        return None
+
+    async def request(self, head, body, method):
+        start = time.perf_counter()
+        async with self._slots:
+            timings = Timings(time.perf_counter() - start)
+            conn = self._checkout()
+            reused = conn is not None
+            if conn is None:
+                conn = await self._connect(timings)
+            try:
+                response = await asyncio.wait_for(conn.send(head, body, method, timings), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, HTTPError):
+                await conn.abort()
+                if not reused or method not in IDEMPOTENT_METHODS:
+                    raise
+                # The server may have dropped an idle connection; retry once fresh.
+                # The request may already have reached it, so a POST or PATCH is
+                # never sent twice
+                timings = Timings(timings.queue)
+                conn = await self._connect(timings)
+                try:
+                    response = await asyncio.wait_for(conn.send(head, body, method, timings), self.timeout)
+                except BaseException:
+                    conn.close()
+                    raise
+            except BaseException:
+                conn.close()
+                raise
+
+            if response.keep_alive:
+                self._idle.append(conn)
+            else:
+                conn.close()
+            return response
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+class HTTPClient:
+    """Pooled HTTP client shared by every virtual user in a run"""
+
+    def __init__(self, limit_per_host=100, timeout=30.0, verify_ssl=True):
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._pools = {}
+        self._ssl_context = ssl_module.create_default_context()
+        if not verify_ssl:
+            self._ssl_context.check_hostname = False
+            self._ssl_context.verify_mode = ssl_module.CERT_NONE
+
+    @property
+    def connects(self):
+        return sum(pool.connects for pool in self._pools.values())
+
+    def _pool_for(self, scheme, host, port):
+        key = (scheme, host, port)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                host,
+                port,
+                ssl=self._ssl_context if scheme == 'https' else None,
+                limit=self.limit_per_host,
+                timeout=self.timeout,
+            )
+            self._pools[key] = pool
+        return pool
+
+    async def request(self, method, url, headers=(), body=b''):
+        return await self.send(prepare_request(method, url, headers, body))
+
+    async def send(self, prepared):
+        """Send a PreparedRequest; the same one can be sent any number of times"""
+        pool = self._pool_for(prepared.scheme, prepared.host, prepared.port)
+        return await pool.request(prepared.head, prepared.body, prepared.method)
+
+    async def close(self):
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
@@ -0,0 +1,374 @@
+"""
+Helpers for reading the Postman collection and turning its items into
+concrete HTTP requests.
+
+Items are compiled once into RequestTemplates: every {{name}} string is split
+into static text and positional variable slots, and bodies without variables
+are encoded up front, so rendering a request for one user's variables only
+joins strings. RequestCache keeps the most recently rendered requests, ready
+to send, for runners that build the same request over and over.
+"""
+
+import collections
+import json
+import mimetypes
+import os
+import re
+import time
+import uuid
+from urllib.parse import urlencode
+
+from . import COLLECTION_PATH
+from .client import prepare_request
+
+VARIABLE_PATTERN = re.compile(r'\{\{\s*([\w.-]+)\s*\}\}')
+
+
+def load_collection(path=COLLECTION_PATH):
+    """Read a collection file from disk"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def collection_variables(collection):
+    """Return the collection variables as a plain dict"""
+    return {v['key']: v.get('value', '') for v in collection.get('variable', [])}
+
+
+def resolve_variables(collection, overrides=None, base_url=None):
+    """Collection variables, overridden by --var values and then by --base-url"""
+    variables = collection_variables(collection)
+    variables.update(overrides or {})
+    if base_url:
+        variables['baseUrl'] = base_url.rstrip('/')
+    return variables
+
+
+def check_resolved(url, what='URL'):
+    """Raise ValueError when `url` still has {{placeholders}} nobody set"""
+    missing = VARIABLE_PATTERN.findall(url)
+    if missing:
+        names = ', '.join(sorted(set(missing)))
+        raise ValueError(f'{what} {url} uses unset variables ({names}); pass --base-url or --var')
+    return url
+
+
+def unset_path_variables(item, variables):
+    """
+    Variables in an item's URL path, after its origin, that are unset or
+    empty: with them the path names a different route (/api/invoices/ for
+    /api/invoices/{{invoiceId}}).
+    """
+    url = item['request']['url']
+    path = (url if isinstance(url, str) else url.get('raw', '')).split('?', 1)[0]
+    names = VARIABLE_PATTERN.findall(path)
+    if path.lstrip().startswith('{{'):
+        names = names[1:]
+    return [name for name in names if not str(variables.get(name) or '').strip()]
+
+
+def substitute(text, variables):
+    """Replace {{name}} placeholders, leaving unknown variables untouched"""
+    if not text or '{{' not in text:
+        return text
+
+    def replace(match):
+        name = match.group(1)
+        if name in variables:
+            return str(variables[name])
+        return match.group(0)
+
+    return VARIABLE_PATTERN.sub(replace, text)
+
+
+def iter_requests(items, folder=None):
+    """Yield (folder name, item) for every request, descending into folders"""
+    for item in items:
+        if 'item' in item:
+            yield from iter_requests(item['item'], item['name'])
+        elif 'request' in item:
+            yield folder, item
+
+
+def _encode_multipart(fields, boundary=None):
+    """Encode (name, value, filename) fields as multipart/form-data"""
+    boundary = boundary or uuid.uuid4().hex
+    parts = []
+    for name, value, filename in fields:
+        head = f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+        if filename:
+            # multer's fileFilter checks the part's Content-Type, not the extension
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            head += f'; filename="{filename}"\r\nContent-Type: {content_type}'
+        parts.append(head.encode('utf-8') + b'\r\n\r\n' + value + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class RequestSpec:
+    """A collection item with all variables resolved, ready to send"""
+
+    __slots__ = ('name', 'folder', 'method', 'url', 'headers', 'body')
+
+    def __init__(self, name, folder, method, url, headers=None, body=b''):
+        self.name = name
+        self.folder = folder
+        self.method = method
+        self.url = url
+        self.headers = headers or []
+        self.body = body
+
+    def __repr__(self):
+        return f'<RequestSpec {self.method} {self.url} ({self.name})>'
+
+    @classmethod
+    def from_item(cls, item, folder, variables, auth=None, files=None):
+        """
+        Build a spec from a collection item and a variable mapping.
+
+        `files` maps formdata file fields to (filename, bytes) and takes
+        precedence over the item's `src` paths.
+        """
+        return RequestTemplate(item, folder, auth, files).render(variables)
+
+
+class Template:
+    """A string split into static text and slot numbers of the variables it uses"""
+
+    __slots__ = ('parts', 'static')
+
+    def __init__(self, text, slots, raw):
+        """`slots` maps variable names to slot numbers across one request's templates"""
+        self.parts = []
+        position = 0
+        for match in VARIABLE_PATTERN.finditer(text or ''):
+            if match.start() > position:
+                self.parts.append(text[position:match.start()])
+            name = match.group(1)
+            raw.setdefault(name, match.group(0))
+            self.parts.append(slots.setdefault(name, len(slots)))
+            position = match.end()
+        if text and position < len(text):
+            self.parts.append(text[position:])
+        self.static = all(isinstance(part, str) for part in self.parts)
+
+    def render(self, values):
+        if self.static:
+            return ''.join(self.parts)
+        return ''.join([values[part] if isinstance(part, int) else part for part in self.parts])
+
+
+class RequestTemplate:
+    """A collection item compiled for repeated rendering with different variables"""
+
+    def __init__(self, item, folder, auth=None, files=None, form_values=None):
+        """
+        `files` is as for RequestSpec.from_item(); `form_values` replaces the
+        values of formdata text fields by key.
+        """
+        request = item['request']
+        url = request['url']
+        self.name = item['name']
+        self.folder = folder
+        self.method = request.get('method', 'GET').upper()
+        self.slots = {}
+        self.raw = {}
+
+        self.url = self._compile(url if isinstance(url, str) else url.get('raw', ''))
+        self.headers = [
+            (h['key'], self._compile(h.get('value', '')))
+            for h in request.get('header', [])
+            if not h.get('disabled')
+        ]
+        token = _bearer_token(request.get('auth', auth))
+        self.token = None
+        if token and not any(k.lower() == 'authorization' for k, _ in self.headers):
+            self.token = self._compile(token)
+
+        self.body = None
+        self.content_type = None
+        spec_body = request.get('body') or {}
+        mode = spec_body.get('mode')
+        if mode == 'raw':
+            self.body = self._compile(spec_body.get('raw', ''))
+        elif mode == 'urlencoded':
+            self.body = [
+                (p['key'], self._compile(p.get('value', '')))
+                for p in spec_body.get('urlencoded', [])
+                if not p.get('disabled')
+            ]
+            self.content_type = 'application/x-www-form-urlencoded'
+        elif mode == 'formdata':
+            self.body = []
+            for p in spec_body.get('formdata', []):
+                if p.get('disabled'):
+                    continue
+                if p.get('type') == 'file':
+                    src = p.get('src')
+                    if files and p['key'] in files:
+                        filename, content = files[p['key']]
+                        self.body.append((p['key'], content, filename))
+                    elif isinstance(src, str) and os.path.isfile(src):
+                        with open(src, 'rb') as f:
+                            self.body.append((p['key'], f.read(), os.path.basename(src)))
+                else:
+                    value = (form_values or {}).get(p['key'], p.get('value', ''))
+                    self.body.append((p['key'], self._compile(value), None))
+            # One boundary per template keeps rendered bodies byte-identical
+            self.boundary = uuid.uuid4().hex
+            self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.mode = mode if mode in ('raw', 'urlencoded', 'formdata') else None
+
+        self.body_bytes = None
+        if self.mode is None:
+            self.body_bytes = b''
+        elif all(template.static for template in self._body_templates()):
+            self.body_bytes = self._encode_body(())
+
+    def __repr__(self):
+        return f'<RequestTemplate {self.method} {self.name} ({len(self.slots)} variables)>'
+
+    def _compile(self, text):
+        return Template(text, self.slots, self.raw)
+
+    def _body_templates(self):
+        if self.mode == 'raw':
+            return [self.body]
+        return [value for _, value, *_ in self.body if isinstance(value, Template)]
+
+    def _encode_body(self, values):
+        if self.mode == 'raw':
+            return self.body.render(values).encode('utf-8')
+        if self.mode == 'urlencoded':
+            return urlencode([(key, value.render(values)) for key, value in self.body]).encode('utf-8')
+        fields = [
+            (key, value.render(values).encode('utf-8') if filename is None else value, filename)
+            for key, value, filename in self.body
+        ]
+        return _encode_multipart(fields, self.boundary)[0]
+
+    def values(self, variables):
+        """Slot values for a variable mapping; unknown variables stay as {{name}}"""
+        raw = self.raw
+        return tuple([
+            str(variables[name]) if name in variables else raw[name]
+            for name in self.slots
+        ])
+
+    def render(self, variables=None, values=None):
+        """RequestSpec for `variables`, or for slot values from values()"""
+        if values is None:
+            values = self.values(variables or {})
+        headers = [(key, value.render(values)) for key, value in self.headers]
+        if self.token is not None:
+            token = self.token.render(values)
+            if token:
+                headers.append(('Authorization', f'Bearer {token}'))
+        if self.content_type:
+            headers.append(('Content-Type', self.content_type))
+        return RequestSpec(
+            name=self.name,
+            folder=self.folder,
+            method=self.method,
+            url=self.url.render(values),
+            headers=headers,
+            body=self.body_bytes if self.body_bytes is not None else self._encode_body(values),
+        )
+
+
+class RequestCache:
+    """
+    Bounded LRU of rendered requests, keyed by template and slot values.
+
+    Entries are (RequestSpec, PreparedRequest) pairs, so a hit skips
+    substitution, body encoding and formatting the request head.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.seconds = 0.0
+
+    def get(self, template, variables):
+        start = time.perf_counter()
+        key = (template, template.values(variables))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        else:
+            spec = template.render(values=key[1])
+            entry = (spec, prepare_request(spec.method, spec.url, spec.headers, spec.body))
+            self.misses += 1
+            if self.maxsize:
+                self._entries[key] = entry
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        self.seconds += time.perf_counter() - start
+        return entry
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'build_us_per_request': self.seconds / lookups * 1e6 if lookups else 0.0,
+        }
+
+
+def _bearer_token(auth):
+    """The bearer token template for a request, honouring noauth overrides"""
+    if not auth or auth.get('type') != 'bearer':
+        return None
+    for entry in auth.get('bearer', []):
+        if entry.get('key') == 'token':
+            return entry.get('value', '') or None
+    return None
+
+
+def find_item(collection, name):
+    """Return (folder, item) for the request called `name`, or 'Folder/Name'"""
+    folder_name, _, request_name = name.rpartition('/')
+    for folder, item in iter_requests(collection.get('item', [])):
+        if item['name'] == request_name and (not folder_name or folder == folder_name):
+            return folder, item
+    raise KeyError(f'No request named {name!r} in the collection')
+
+
+def build_request_specs(collection, variables=None, folders=None, methods=None, names=None, skipped=None):
+    """
+    Resolve every matching collection item into a RequestSpec.
+
+    Collection variables are used as defaults and overridden by `variables`.
+    `folders`, `methods` and `names` narrow the selection when given. When
+    `skipped` is a dict, items whose URL path uses unset or empty variables
+    are left out and recorded in it as {name: [variables]}.
+    """
+    resolved = collection_variables(collection)
+    resolved.update(variables or {})
+    auth = collection.get('auth')
+
+    specs = []
+    for folder, item in iter_requests(collection.get('item', [])):
+        if folders and folder not in folders:
+            continue
+        if names and item['name'] not in names:
+            continue
+        method = item['request'].get('method', 'GET').upper()
+        if methods and method not in methods:
+            continue
+        if skipped is not None:
+            unset = unset_path_variables(item, resolved)
+            if unset:
+                skipped[item['name']] = unset
+                continue
+        specs.append(RequestSpec.from_item(item, folder, resolved, auth))
+    return specs
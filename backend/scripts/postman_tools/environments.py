@@ -0,0 +1,417 @@
+"""
+Per-environment variants of the collection, built from one base in parallel.
+
+A matrix file lists the environments the collection is handed out for
+(local, staging, the Render deployment, one per tenant). Each entry can set
+collection variables, the account the Login request uses, folders to leave
+out and where its file goes. `extends` inherits from another entry and
+`${VAR}` takes secrets from the process environment:
+
+    {
+      "output": "postman/environments/{name}.postman_collection.json",
+      "environments": {
+        "local": {"variables": {"baseUrl": "http://localhost:3001"}},
+        "production": {
+          "variables": {"baseUrl": "https://docuflow-api.onrender.com"},
+          "account": {"email": "${DOCUFLOW_EMAIL}", "password": "${DOCUFLOW_PASSWORD}"},
+          "exclude": ["Webhook Payloads"]
+        },
+        "acme": {"extends": "production", "account": {"email": "ops@acme.test"}}
+      }
+    }
+
+The base collection is serialized once, folder by folder. json.dumps with an
+indent runs the pure-Python encoder, which is most of the cost of writing a
+collection, and an environment only changes `info`, `variable` and the
+folder holding Login, so a variant is assembled from the cached fragments
+plus those few re-serialized pieces. The result is byte-identical to
+serialize() of the modified collection (`envs bench` checks this).
+
+Variants are spread over a process pool whose workers receive the base once,
+through the pool initializer, and are written with merge.write_atomic, so
+concurrent runs never leave a partial file and unchanged files are left
+alone.
+"""
+
+import concurrent.futures
+import copy
+import json
+import os
+import re
+import tempfile
+import time
+
+from .merge import serialize, write_atomic
+from .stats import format_table
+
+DEFAULT_OUTPUT = 'postman/environments/{name}.postman_collection.json'
+LOGIN_REQUEST = 'Login'
+ENTRY_KEYS = {'extends', 'title', 'variables', 'account', 'exclude', 'output'}
+
+# A pool costs ~35ms to start against ~0.6ms to render one environment, so below
+# this many environments a single process finishes first
+POOL_THRESHOLD = 64
+
+ENV_REFERENCE = re.compile(r'\$\{(\w+)\}')
+
+RESULT_COLUMNS = [
+    ('Environment', 'name', '{}'),
+    ('File', 'path', '{}'),
+    ('KB', 'kb', '{:.1f}'),
+    ('Status', 'status', '{}'),
+]
+
+BENCH_COLUMNS = [
+    ('Envs', 'environments', '{}'),
+    ('Folders', 'folders', '{}'),
+    ('Requests', 'requests', '{}'),
+    ('Full ms', 'full_ms', '{:.1f}'),
+    ('Layout ms', 'layout_ms', '{:.1f}'),
+    ('Pool ms', 'pool_ms', '{:.1f}'),
+    ('Full/env', 'full_per_env_ms', '{:.2f}'),
+    ('Layout/env', 'layout_per_env_ms', '{:.2f}'),
+]
+
+
+def _fragment(value, depth):
+    """json.dumps(value, indent='\\t') as it appears `depth` levels deep in serialize() output"""
+    text = json.dumps(value, indent='\t')
+    # Strings never contain a raw newline (json escapes them), so every one is structural
+    return text.replace('\n', '\n' + '\t' * depth) if depth else text
+
+
+def _expand(value, name):
+    if not isinstance(value, str):
+        return value
+
+    def lookup(match):
+        if match.group(1) not in os.environ:
+            raise ValueError(f'{name}: environment variable {match.group(1)} is not set')
+        return os.environ[match.group(1)]
+
+    return ENV_REFERENCE.sub(lookup, value)
+
+
+def _merge_entry(parent, entry):
+    merged = dict(parent)
+    merged.pop('title', None)
+    for key, value in entry.items():
+        if key in ('variables', 'account'):
+            merged[key] = {**parent.get(key, {}), **value}
+        elif key != 'extends':
+            merged[key] = value
+    return merged
+
+
+def load_matrix(path, only=()):
+    """Resolved environments from a JSON (or, with PyYAML, YAML) matrix file"""
+    with open(path, 'r') as f:
+        text = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError('PyYAML is required for YAML matrices (pip install pyyaml)')
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    entries = data.get('environments') or {}
+    defaults = data.get('defaults', {})
+    output = data.get('output', DEFAULT_OUTPUT)
+    unknown = set(only) - set(entries)
+    if unknown:
+        raise ValueError(f"Unknown environment(s): {', '.join(sorted(unknown))}")
+
+    resolved = {}
+
+    def resolve(name, chain=()):
+        if name in resolved:
+            return resolved[name]
+        if name in chain:
+            raise ValueError(f"{name}: extends itself ({' -> '.join(chain + (name,))})")
+        if name not in entries:
+            raise ValueError(f'{chain[-1]}: extends unknown environment {name!r}')
+        entry = entries[name]
+        extra = set(entry) - ENTRY_KEYS
+        if extra:
+            raise ValueError(f"{name}: unknown key(s) {', '.join(sorted(extra))}")
+        parent = resolve(entry['extends'], chain + (name,)) if 'extends' in entry else _merge_entry({}, defaults)
+        resolved[name] = _merge_entry(parent, entry)
+        return resolved[name]
+
+    environments = []
+    for name in entries:
+        if only and name not in only:
+            continue
+        environment = dict(resolve(name))
+        if 'title' in entries[name]:
+            environment['title'] = entries[name]['title']
+        environment['name'] = name
+        environment['output'] = environment.get('output', output).format(name=name)
+        environment['variables'] = {k: _expand(v, name) for k, v in environment.get('variables', {}).items()}
+        environment['account'] = {k: _expand(v, name) for k, v in environment.get('account', {}).items()}
+        environment['exclude'] = list(environment.get('exclude', []))
+        environments.append(environment)
+    return environments
+
+
+def find_login(collection):
+    """(folder index, item index) of the Login request, or None"""
+    for i, folder in enumerate(collection.get('item', [])):
+        for j, item in enumerate(folder.get('item', [])):
+            if item.get('name') == LOGIN_REQUEST:
+                return i, j
+    return None
+
+
+def apply_environment(collection, environment, login=None):
+    """The environment's collection; unchanged parts are shared with `collection`, not copied"""
+    name = environment['name']
+    variant = dict(collection)
+
+    info = dict(collection.get('info', {}))
+    info['name'] = environment.get('title') or f"{info.get('name', 'Collection')} ({name})"
+    if '_postman_id' in info:
+        # Postman replaces an imported collection that has the same id
+        info['_postman_id'] = f"{info['_postman_id']}-{name}"
+    variant['info'] = info
+
+    overrides = environment['variables']
+    if overrides:
+        variables = []
+        for variable in collection.get('variable', []):
+            if variable['key'] in overrides:
+                variable = dict(variable, value=str(overrides[variable['key']]))
+            variables.append(variable)
+        known = {variable['key'] for variable in variables}
+        variables.extend({'key': key, 'value': str(value), 'type': 'string'}
+                         for key, value in overrides.items() if key not in known)
+        variant['variable'] = variables
+
+    folders = list(collection.get('item', []))
+    if environment['account'] and login:
+        i, j = login
+        folder = dict(folders[i])
+        folder['item'] = list(folder['item'])
+        item = copy.deepcopy(folder['item'][j])
+        body = json.loads(item['request']['body']['raw'])
+        body.update(environment['account'])
+        item['request']['body']['raw'] = json.dumps(body, indent=2)
+        folder['item'][j] = item
+        folders[i] = folder
+    excluded = set(environment['exclude'])
+    variant['item'] = [folder for folder in folders if folder.get('name') not in excluded]
+    return variant
+
+
+class CollectionLayout:
+    """A base collection serialized once per top-level key and per folder"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.fragments = {key: _fragment(value, 1) for key, value in collection.items() if key != 'item'}
+        folders = collection.get('item', [])
+        self.folder_fragments = {id(folder): _fragment(folder, 2) for folder in folders}
+        self.folder_names = {folder.get('name') for folder in folders}
+        self.login = find_login(collection)
+
+    def check(self, environment):
+        """Raise ValueError for exclusions or an account this collection cannot apply"""
+        missing = set(environment['exclude']) - self.folder_names
+        if missing:
+            raise ValueError(f"{environment['name']}: no folder named {', '.join(sorted(missing))}")
+        if environment['account'] and self.login is None:
+            raise ValueError(f"{environment['name']}: the collection has no {LOGIN_REQUEST} request to set an account on")
+
+    def render(self, environment):
+        """serialize(apply_environment(...)), reusing the base's fragments"""
+        base = self.collection
+        parts = []
+        for key, value in apply_environment(base, environment, self.login).items():
+            if key == 'item':
+                texts = [self.folder_fragments.get(id(folder)) or _fragment(folder, 2) for folder in value]
+                text = '[\n\t\t' + ',\n\t\t'.join(texts) + '\n\t]' if texts else '[]'
+            elif value is base.get(key):
+                text = self.fragments[key]
+            else:
+                text = _fragment(value, 1)
+            parts.append(f'\t{json.dumps(key)}: {text}')
+        return '{\n' + ',\n'.join(parts) + '\n}' if parts else '{}'
+
+
+_layout = None
+
+
+def _start_worker(base_text):
+    global _layout
+    _layout = CollectionLayout(json.loads(base_text))
+
+
+def _build(task):
+    environment, check = task
+    text = _layout.render(environment)
+    path = environment['output']
+    if check:
+        try:
+            with open(path, 'r') as f:
+                status = 'up to date' if f.read() == text else 'stale'
+        except FileNotFoundError:
+            status = 'missing'
+    else:
+        status = 'written' if write_atomic(path, text) else 'unchanged'
+    return {'name': environment['name'], 'path': path, 'kb': len(text) / 1024, 'status': status}
+
+
+def build_environments(collection, environments, jobs=None, check=False):
+    """Write (or with `check`, compare) every environment's collection; returns one row each"""
+    global _layout
+    layout = CollectionLayout(collection)
+    for environment in environments:
+        layout.check(environment)
+    tasks = [(environment, check) for environment in environments]
+    if jobs is None:
+        jobs = (os.cpu_count() or 1) if len(tasks) >= POOL_THRESHOLD else 1
+    if jobs <= 1 or len(tasks) <= 1:
+        _layout = layout
+        return [_build(task) for task in tasks]
+    # The base goes to each worker once; tasks only carry their environment
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_start_worker,
+                                                initargs=(json.dumps(collection),)) as pool:
+        return list(pool.map(_build, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+
+def scaled_collection(collection, scale):
+    """The collection with its folders repeated `scale` times, for benchmarking"""
+    folders = collection.get('item', [])
+    scaled = dict(collection)
+    scaled['item'] = list(folders) + [
+        dict(folder, name=f"{folder.get('name')} {copy_number}")
+        for copy_number in range(2, scale + 1) for folder in folders
+    ]
+    return scaled
+
+
+def synthetic_environments(count, directory):
+    environments = []
+    for n in range(count):
+        environments.append({
+            'name': f'tenant-{n}',
+            'output': os.path.join(directory, f'tenant-{n}.postman_collection.json'),
+            'variables': {'baseUrl': f'https://tenant-{n}.docuflow.test', 'tenantId': str(n)},
+            'account': {'email': f'ops@tenant-{n}.test', 'password': f'Tenant-{n}-Passw0rd!'} if n % 2 else {},
+            'exclude': ['Webhook Payloads'] if n % 3 == 0 else [],
+        })
+    return environments
+
+
+def bench(collection, counts, scales, jobs=None, repeat=3):
+    """Time full per-environment serialization against the fragment layout, inline and pooled"""
+    jobs = jobs or os.cpu_count() or 1
+    rows = []
+    for scale in scales:
+        base = scaled_collection(collection, scale)
+        base_text = json.dumps(base)
+        layout = CollectionLayout(base)
+        requests = sum(len(folder.get('item', [])) or 1 for folder in base.get('item', []))
+        for count in counts:
+            with tempfile.TemporaryDirectory() as directory:
+                environments = synthetic_environments(count, directory)
+                for environment in environments:
+                    if layout.render(environment) != serialize(apply_environment(base, environment, layout.login)):
+                        raise AssertionError(f"{environment['name']}: layout output differs from serialize()")
+
+                def full():
+                    # One `update`-style pass per environment: load, modify, serialize, write
+                    for environment in environments:
+                        loaded = json.loads(base_text)
+                        variant = apply_environment(loaded, environment, find_login(loaded))
+                        write_atomic(environment['output'], serialize(variant))
+
+                runs = {
+                    'full': full,
+                    'layout': lambda: build_environments(base, environments, jobs=1),
+                    'pool': lambda: build_environments(base, environments, jobs=jobs),
+                }
+                timings = {}
+                for label, fn in runs.items():
+                    best = None
+                    for _ in range(repeat):
+                        for environment in environments:
+                            if os.path.exists(environment['output']):
+                                os.unlink(environment['output'])
+                        started = time.perf_counter()
+                        fn()
+                        elapsed = time.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings[label] = best * 1000
+            rows.append({
+                'environments': count,
+                'folders': len(base.get('item', [])),
+                'requests': requests,
+                'full_ms': timings['full'],
+                'layout_ms': timings['layout'],
+                'pool_ms': timings['pool'],
+                'full_per_env_ms': timings['full'] / count,
+                'layout_per_env_ms': timings['layout'] / count,
+            })
+    return {'jobs': jobs, 'cpus': os.cpu_count(), 'rows': rows}
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(',') if part.strip()]
+
+
+def add_arguments(parser):
+    subparsers = parser.add_subparsers(dest='envs_command', required=True)
+
+    build = subparsers.add_parser('build', help='Write one collection per environment in a matrix file')
+    build.add_argument('matrix', help='JSON (or YAML) environment matrix')
+    build.add_argument('--only', action='append', default=[], metavar='NAME',
+                       help='Only build this environment (repeatable)')
+    build.add_argument('-j', '--jobs', type=int,
+                       help=f'Worker processes (default: one per CPU from {POOL_THRESHOLD} environments, else 1)')
+    build.add_argument('--check', action='store_true',
+                       help='Exit non-zero if any environment file is missing or stale, without writing')
+
+    bench_parser = subparsers.add_parser('bench', help='Time generation against environment and folder counts')
+    bench_parser.add_argument('--envs', type=_int_list, default=[1, 10, 100],
+                              help='Environment counts to time (default: 1,10,100)')
+    bench_parser.add_argument('--scales', type=_int_list, default=[1, 4],
+                              help='Copies of every folder, to grow the collection (default: 1,4)')
+    bench_parser.add_argument('-j', '--jobs', type=int, help='Worker processes for the pooled run (default: CPUs)')
+    bench_parser.add_argument('--repeat', type=int, default=3, help='Runs per cell; the fastest is kept')
+
+
+def run(args):
+    # json directly rather than collection.load_collection, which pulls in the HTTP client
+    with open(args.collection, 'r') as f:
+        collection = json.load(f)
+    if args.envs_command == 'bench':
+        report = bench(collection, args.envs, args.scales, args.jobs, args.repeat)
+        print(format_table(report['rows'], BENCH_COLUMNS))
+        print()
+        print(f"📊 Pool: {report['jobs']} worker(s) on {report['cpus']} CPU(s); "
+              f"every layout variant matched serialize() byte for byte")
+        return 0
+
+    try:
+        environments = load_matrix(args.matrix, args.only)
+        started = time.perf_counter()
+        rows = build_environments(collection, environments, args.jobs, args.check)
+    except (OSError, ValueError) as error:
+        print(f'❌ {error}')
+        return 1
+    elapsed = time.perf_counter() - started
+    print(format_table(rows, RESULT_COLUMNS))
+    print()
+    if args.check:
+        stale = [row for row in rows if row['status'] != 'up to date']
+        if stale:
+            print(f'❌ Environment collections out of date: {len(stale)} of {len(rows)}')
+            return 1
+        print(f'✅ Environment collections are up to date ({len(rows)} checked)')
+        return 0
+    written = sum(row['status'] == 'written' for row in rows)
+    print(f'✅ Built {len(rows)} environment collection(s) in {elapsed * 1000:.0f}ms '
+          f'({written} written, {len(rows) - written} unchanged)')
+    return 0
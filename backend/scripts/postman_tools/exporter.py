@@ -0,0 +1,678 @@
+"""
+Parallel paginated export of invoices, receipts, contracts and documents to
+JSONL or Parquet.
+
+The list endpoints page with LIMIT/OFFSET and src/utils/pagination.js caps
+`limit` at 100, so one sequential walk over a large tenant costs thousands of
+requests that get slower as OFFSET grows. The exporter instead splits every
+resource into date shards with the start_date/end_date filters (halving any
+shard that holds more than --max-shard-rows, so OFFSET stays small) and
+fetches the pages of all shards concurrently with a bounded number in flight.
+
+Pages finish out of order. A reorder window of at most --window pages puts
+them back in (shard, page) order and streams them to one file per shard, so
+memory is bounded by the window rather than by the dataset. Shards are
+written to `.part` files and renamed when complete. checkpoint.json records
+the pages and bytes written, so a rerun after a failure truncates a JSONL
+shard to its last checkpoint and continues from the next page.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from datetime import date, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from .api import NETWORK_ERRORS, ApiClient, add_api_arguments, failure_reason
+from .collection import load_collection, resolve_variables
+from .loadgen import parse_variables
+from .merge import write_atomic
+from .results import add_save_arguments, save_from_args
+from .scenario import load_accounts
+from .stats import RequestStats, format_table
+
+# Resource -> list request, DATEONLY column behind start_date/end_date, CSV export request
+RESOURCES = {
+    'invoices': {'request': 'List Invoices', 'date_field': 'invoice_date', 'csv': 'Export Invoices CSV'},
+    'receipts': {'request': 'List Receipts', 'date_field': 'purchase_date', 'csv': 'Export Receipts CSV'},
+    'contracts': {'request': 'List Contracts', 'date_field': 'expiration_date', 'csv': None},
+    # /api/documents has no date filters: always one unfiltered shard
+    'documents': {'request': 'List Documents', 'date_field': None, 'csv': None},
+}
+
+MAX_PAGE_SIZE = 100  # getPaginationParams() clamps limit to 1..100
+SHARD_UNITS = ['none', 'year', 'month', 'week', 'day']
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+EARLIEST_DATE = date(1900, 1, 1)
+
+
+class ExportFailed(Exception):
+    """Raised when a page cannot be fetched after all retries"""
+
+
+class Shard:
+    """One date range of a resource and how much of it has been written"""
+
+    def __init__(self, name, start=None, end=None, undated=False, total=0, pages=0,
+                 pages_done=0, rows=0, bytes_written=0, done=False, changed=False):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.undated = undated
+        self.total = total
+        self.pages = pages
+        self.pages_done = pages_done
+        self.rows = rows
+        self.bytes_written = bytes_written
+        self.done = done
+        self.changed = changed
+
+    def to_dict(self):
+        data = dict(vars(self))
+        data['start'] = self.start.isoformat() if self.start else None
+        data['end'] = self.end.isoformat() if self.end else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data['start'] = date.fromisoformat(data['start']) if data['start'] else None
+        data['end'] = date.fromisoformat(data['end']) if data['end'] else None
+        return cls(**data)
+
+
+def _period_start(day, unit):
+    if unit == 'year':
+        return date(day.year, 1, 1)
+    if unit == 'month':
+        return date(day.year, day.month, 1)
+    if unit == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _period_end(start, unit):
+    if unit == 'year':
+        return date(start.year, 12, 31)
+    if unit == 'month':
+        following = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        return following - timedelta(days=1)
+    if unit == 'week':
+        return start + timedelta(days=6)
+    return start
+
+
+def _period_name(start, unit):
+    if unit == 'year':
+        return f'{start.year}'
+    if unit == 'month':
+        return f'{start.year}-{start.month:02d}'
+    if unit == 'week':
+        year, week, _ = start.isocalendar()
+        return f'{year}-W{week:02d}'
+    return start.isoformat()
+
+
+def calendar_shards(first, last, unit):
+    """Whole calendar periods covering first..last; the API's date filter is inclusive"""
+    shards = []
+    start = _period_start(first, unit)
+    while start <= last:
+        end = _period_end(start, unit)
+        shards.append(Shard(_period_name(start, unit), start, end))
+        start = end + timedelta(days=1)
+    return shards
+
+
+def split_shard(shard):
+    """Halve a shard's date range, or return None when it is a single day"""
+    if shard.start is None or shard.end is None or shard.start >= shard.end:
+        return None
+    middle = shard.start + (shard.end - shard.start) // 2
+    following = middle + timedelta(days=1)
+    return [
+        Shard(f'{shard.start.isoformat()}_{middle.isoformat()}', shard.start, middle),
+        Shard(f'{following.isoformat()}_{shard.end.isoformat()}', following, shard.end),
+    ]
+
+
+class JsonlShardWriter:
+    """Appends pages to a .part file that can be truncated back to a checkpoint"""
+
+    resumable = True
+    extension = '.jsonl'
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.part = path + '.part'
+        mode = 'r+b' if offset and os.path.exists(self.part) else 'wb'
+        self.file = open(self.part, mode)
+        if mode == 'r+b':
+            self.file.truncate(offset)
+            self.file.seek(offset)
+
+    def write(self, rows):
+        self.file.write(b''.join(
+            json.dumps(row, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n' for row in rows
+        ))
+        self.file.flush()
+        return self.file.tell()
+
+    def finish(self):
+        self.file.close()
+        os.replace(self.part, self.path)
+
+    def close(self):
+        self.file.close()
+
+
+def parquet_schema(rows):
+    """Column types from the first row group; nested objects are stored as JSON text"""
+    names = {}
+    for row in rows:
+        for key in row:
+            names.setdefault(key, [])
+    for row in rows:
+        for key, value in row.items():
+            if value is not None:
+                names[key].append(value)
+    fields = []
+    for name, values in names.items():
+        if values and all(isinstance(v, bool) for v in values):
+            kind = pa.bool_()
+        elif values and all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            kind = pa.int64()
+        elif values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            kind = pa.float64()
+        else:
+            kind = pa.string()
+        fields.append(pa.field(name, kind))
+    return pa.schema(fields)
+
+
+def _parquet_cell(value, kind):
+    if value is None:
+        return None
+    if kind == pa.string():
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    if kind == pa.float64() and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+class ParquetShardWriter:
+    """Buffers rows into row groups; a partial shard restarts from its first page"""
+
+    resumable = False
+    extension = '.parquet'
+
+    def __init__(self, path, offset=0, row_group_size=10000):
+        self.path = path
+        self.part = path + '.part'
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.schema = None
+        self.writer = None
+
+    def _flush(self):
+        if not self.rows:
+            return
+        if self.schema is None:
+            self.schema = parquet_schema(self.rows)
+            self.writer = pq.ParquetWriter(self.part, self.schema)
+        unexpected = {key for row in self.rows for key in row} - set(self.schema.names)
+        if unexpected:
+            raise ValueError(f"{os.path.basename(self.path)}: columns {sorted(unexpected)} "
+                             f"appeared after the schema was fixed")
+        columns = {
+            field.name: [_parquet_cell(row.get(field.name), field.type) for row in self.rows]
+            for field in self.schema
+        }
+        self.writer.write_table(pa.table(columns, schema=self.schema))
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+        return 0
+
+    def finish(self):
+        self._flush()
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.part, pa.schema([]))
+        self.writer.close()
+        os.replace(self.part, self.path)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'jsonl': JsonlShardWriter, 'parquet': ParquetShardWriter}
+
+
+class Exporter:
+    """Export resources shard by shard with bounded concurrency and resumable output"""
+
+    def __init__(self, collection, variables, account, out_dir='exports', fmt='jsonl', shard_unit='month',
+                 since=None, until=None, filters=None, max_shard_rows=5000, concurrency=8, window=64,
+                 limit=MAX_PAGE_SIZE, retries=4, timeout=60.0, include_undated=False, restart=False):
+        self.collection = collection
+        self.variables = variables
+        self.account = account
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.writer_class = WRITERS[fmt]
+        self.shard_unit = shard_unit
+        self.since = since
+        self.until = until
+        self.filters = filters or {}
+        self.max_shard_rows = max_shard_rows
+        self.concurrency = concurrency
+        self.window = max(window, concurrency)
+        self.limit = min(limit, MAX_PAGE_SIZE)
+        self.retries = retries
+        self.timeout = timeout
+        self.include_undated = include_undated
+        self.restart = restart
+        self.api = ApiClient(collection, variables, concurrency=concurrency, timeout=timeout)
+        self.stats = {}
+        self.retried = 0
+        self.results = {}
+
+    def _url(self, name, shard=None, page=1, limit=None, sort_by='id', order='ASC', csv=False):
+        config = RESOURCES[name]
+        params = dict(self.filters)
+        if not csv:
+            params.update(page=page, limit=limit or self.limit)
+        params.update(sort_by=sort_by, sort_order=order)
+        if shard is not None and shard.start:
+            params['start_date'] = shard.start.isoformat()
+        if shard is not None and shard.end:
+            params['end_date'] = shard.end.isoformat()
+        return self.api.url(config['csv'] if csv else config['request'], params)
+
+    async def _get(self, stats, url):
+        """GET with retries on connection errors, 429 and 5xx; returns the response"""
+        failure = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+            delay = None
+            try:
+                seconds, response = await self.api.request(self.account, url)
+            except NETWORK_ERRORS as error:
+                stats.record_error(error)
+                failure = type(error).__name__
+            else:
+                stats.record(seconds, response.status)
+                if response.status < 400:
+                    return response
+                failure = failure_reason(response)
+                if response.status not in RETRY_STATUSES:
+                    raise ExportFailed(f'{url}: {failure}')
+                try:
+                    delay = float(response.headers.get('retry-after', ''))
+                except ValueError:
+                    delay = None
+            if attempt < self.retries:
+                await asyncio.sleep(delay if delay is not None else min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random()))
+        raise ExportFailed(f'{url}: {failure} after {self.retries} retries')
+
+    async def _probe(self, name, shard=None, sort_by='id', order='ASC'):
+        """(total rows, first row) for a shard, from a one-row page"""
+        response = await self._get(self.stats[name], self._url(name, shard, 1, 1, sort_by, order))
+        body = response.json()
+        rows = body.get('data') or []
+        return body.get('meta', {}).get('pagination', {}).get('total', len(rows)), (rows[0] if rows else None)
+
+    async def _plan(self, name):
+        """Date shards of at most max_shard_rows rows, plus totals for the coverage check"""
+        config = RESOURCES[name]
+        total_all, _ = await self._probe(name)
+        plan = {'total': total_all, 'dated': None, 'undated': None, 'covered': total_all}
+        if self.shard_unit == 'none' or not config['date_field']:
+            shards = [Shard('all', total=total_all)] if total_all else []
+            return shards, plan
+
+        field = config['date_field']
+        dated = Shard('dated', self.since or EARLIEST_DATE, self.until)
+        (total_dated, first), (_, last) = await asyncio.gather(
+            self._probe(name, dated, field, 'ASC'),
+            self._probe(name, dated, field, 'DESC'),
+        )
+        plan['dated'] = total_dated
+        if not self.since and not self.until:
+            plan['undated'] = total_all - total_dated
+        shards = []
+        if total_dated and first and last and first.get(field) and last.get(field):
+            first_day = self.since or date.fromisoformat(first[field][:10])
+            last_day = self.until or date.fromisoformat(last[field][:10])
+            pending = calendar_shards(first_day, last_day, self.shard_unit)
+            while pending:
+                totals = await asyncio.gather(*(self._probe(name, shard) for shard in pending))
+                split = []
+                for shard, (total, _) in zip(pending, totals):
+                    halves = split_shard(shard) if total > self.max_shard_rows else None
+                    if halves:
+                        split.extend(halves)
+                    elif total:
+                        shard.total = total
+                        shards.append(shard)
+                pending = split
+            shards.sort(key=lambda s: s.start)
+        plan['covered'] = sum(shard.total for shard in shards)
+        if self.include_undated and plan['undated']:
+            # Rows without a date cannot be selected by the filters: walk the
+            # unfiltered listing and keep only those
+            shards.append(Shard('undated', undated=True, total=total_all))
+            plan['undated_included'] = True
+        return shards, plan
+
+    def _resource_dir(self, name):
+        return os.path.join(self.out_dir, name)
+
+    def _signature(self, name):
+        return {
+            'resource': name, 'format': self.fmt, 'limit': self.limit, 'shard': self.shard_unit,
+            'since': self.since.isoformat() if self.since else None,
+            'until': self.until.isoformat() if self.until else None,
+            'filters': self.filters, 'max_shard_rows': self.max_shard_rows,
+            'include_undated': self.include_undated, 'url': self.api.base_url(RESOURCES[name]['request']),
+        }
+
+    def _save_checkpoint(self, name, shards, plan):
+        write_atomic(os.path.join(self._resource_dir(name), 'checkpoint.json'), json.dumps({
+            'signature': self._signature(name),
+            'plan': plan,
+            'shards': [shard.to_dict() for shard in shards],
+        }, indent=2))
+
+    def _load_checkpoint(self, name):
+        path = os.path.join(self._resource_dir(name), 'checkpoint.json')
+        if self.restart or not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('signature') != self._signature(name):
+            return None
+        return [Shard.from_dict(s) for s in checkpoint['shards']], checkpoint['plan']
+
+    def _shard_path(self, name, shard):
+        return os.path.join(self._resource_dir(name), shard.name + self.writer_class.extension)
+
+    async def _fetch_page(self, name, shard, page, results, seq, ready):
+        try:
+            response = await self._get(self.stats[name], self._url(name, None if shard.undated else shard, page))
+            results[seq] = response.json()
+        except Exception as error:
+            results[seq] = error
+        ready.set()
+
+    async def export(self, name):
+        """Export one resource; returns its report row"""
+        os.makedirs(self._resource_dir(name), exist_ok=True)
+        self.stats[name] = RequestStats(f'Export {name}')
+        started = time.perf_counter()
+        resumed = self._load_checkpoint(name)
+        if resumed:
+            shards, plan = resumed
+        else:
+            try:
+                shards, plan = await self._plan(name)
+            except ExportFailed as failure:
+                return self._row(name, [], {}, started, False, 0, str(failure))
+            for shard in shards:
+                shard.pages = math.ceil(shard.total / self.limit)
+        for shard in shards:
+            if not self.writer_class.resumable and not shard.done:
+                shard.pages_done, shard.rows, shard.bytes_written = 0, 0, 0
+        self._save_checkpoint(name, shards, plan)
+
+        field = RESOURCES[name]['date_field']
+        jobs = [(shard, page) for shard in shards if not shard.done
+                for page in range(shard.pages_done + 1, shard.pages + 1)]
+        results = {}
+        ready = asyncio.Event()
+        window = asyncio.Semaphore(self.window)
+        tasks = []
+        stop = False
+
+        async def dispatch():
+            for seq, (shard, page) in enumerate(jobs):
+                await window.acquire()
+                if stop:
+                    return
+                tasks.append(asyncio.ensure_future(self._fetch_page(name, shard, page, results, seq, ready)))
+
+        dispatcher = asyncio.ensure_future(dispatch())
+        writers = {}
+        error = None
+        fetched = 0
+        try:
+            for seq, (shard, page) in enumerate(jobs):
+                while seq not in results:
+                    ready.clear()
+                    await ready.wait()
+                body = results.pop(seq)
+                window.release()
+                if isinstance(body, Exception):
+                    raise body
+                rows = body.get('data') or []
+                if shard.undated:
+                    rows = [row for row in rows if row.get(field) is None]
+                elif body.get('meta', {}).get('pagination', {}).get('total') != shard.total:
+                    shard.changed = True
+                writer = writers.get(shard.name)
+                if writer is None:
+                    writer = writers[shard.name] = self.writer_class(self._shard_path(name, shard), shard.bytes_written)
+                shard.bytes_written = writer.write(rows)
+                shard.rows += len(rows)
+                fetched += len(rows)
+                shard.pages_done = page
+                if page == shard.pages:
+                    writers.pop(shard.name).finish()
+                    shard.done = True
+                if writer.resumable or shard.done:
+                    self._save_checkpoint(name, shards, plan)
+            for shard in shards:
+                if not shard.pages and not shard.done:
+                    shard.done = True
+        except (ExportFailed, OSError, ValueError) as failure:
+            error = str(failure)
+        finally:
+            stop = True
+            dispatcher.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(dispatcher, *tasks, return_exceptions=True)
+            for writer in writers.values():
+                writer.close()
+            self._save_checkpoint(name, shards, plan)
+
+        return self._row(name, shards, plan, started, bool(resumed), fetched, error)
+
+    def _row(self, name, shards, plan, started, resumed, fetched, error):
+        seconds = time.perf_counter() - started
+        rows = sum(shard.rows for shard in shards)
+        files = [self._shard_path(name, s) for s in shards if s.done and os.path.exists(self._shard_path(name, s))]
+        latency = self.stats[name].latency
+        return {
+            'resource': name,
+            'shards': len(shards),
+            'done': sum(shard.done for shard in shards),
+            'rows': rows,
+            'pages': sum(shard.pages for shard in shards),
+            'requests': latency.count,
+            'seconds': seconds,
+            'fetched': fetched,
+            'rows_per_s': fetched / seconds if seconds else 0.0,
+            'mb': sum(os.path.getsize(path) for path in files) / 1e6,
+            'p50_ms': latency.percentile(50) / 1000,
+            'p95_ms': latency.percentile(95) / 1000,
+            'resumed': resumed,
+            'plan': plan,
+            'changed': [shard.name for shard in shards if shard.changed],
+            'error': error,
+        }
+
+    async def csv_benchmark(self, name):
+        """Time the resource's CSV export route over the same date range"""
+        stats = self.stats.setdefault(f'CSV {name}', RequestStats(f'CSV {name}'))
+        shard = Shard('csv', self.since, self.until)
+        start = time.perf_counter()
+        try:
+            response = await self._get(stats, self._url(name, shard, csv=True))
+        except ExportFailed as failure:
+            return {'resource': name, 'error': str(failure)}
+        seconds = time.perf_counter() - start
+        # json2csv joins the header and rows with newlines and no trailing one
+        rows = response.body.count(b'\n') if response.body else 0
+        return {
+            'resource': name,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_s': rows / seconds if seconds else 0.0,
+            'mb': len(response.body) / 1e6,
+            'error': None,
+        }
+
+    async def run(self, resources, compare_csv=False):
+        report = {'format': self.fmt, 'out_dir': self.out_dir, 'resources': [], 'csv': [], 'retries': 0}
+        async with self.api:
+            for name in resources:
+                report['resources'].append(await self.export(name))
+                if compare_csv and RESOURCES[name]['csv']:
+                    report['csv'].append(await self.csv_benchmark(name))
+        report['retries'] = self.retried
+        report['elapsed_s'] = sum(row['seconds'] for row in report['resources'])
+        return report
+
+
+EXPORT_COLUMNS = [
+    ('Resource', 'resource', '{}'),
+    ('Shards', 'shards', '{}'),
+    ('Rows', 'rows', '{}'),
+    ('Requests', 'requests', '{}'),
+    ('MB', 'mb', '{:.1f}'),
+    ('Seconds', 'seconds', '{:.2f}'),
+    ('Rows/s', 'rows_per_s', '{:.0f}'),
+    ('p50 ms', 'p50_ms', '{:.1f}'),
+    ('p95 ms', 'p95_ms', '{:.1f}'),
+]
+
+CSV_COLUMNS = [
+    ('CSV route', 'resource', '{}'),
+    ('Rows', 'rows', '{}'),
+    ('MB', 'mb', '{:.1f}'),
+    ('Seconds', 'seconds', '{:.2f}'),
+    ('Rows/s', 'rows_per_s', '{:.0f}'),
+]
+
+
+def add_arguments(parser):
+    parser.add_argument('--resource', action='append', default=[], choices=list(RESOURCES),
+                        help='Export only this resource (repeatable, default: all)')
+    add_api_arguments(parser, single_account=True)
+    parser.add_argument('--filter', action='append', default=[], metavar='KEY=VALUE',
+                        help='Extra list filter passed through, e.g. status=paid (repeatable)')
+    parser.add_argument('--format', dest='fmt', default='jsonl', choices=list(WRITERS),
+                        help='Output format (parquet requires pyarrow)')
+    parser.add_argument('-o', '--out-dir', default='exports', help='Output directory (default: exports)')
+    parser.add_argument('--shard', default='month', choices=SHARD_UNITS,
+                        help='Date shard size before splitting (default: month)')
+    parser.add_argument('--since', type=date.fromisoformat, help='Only export rows dated on or after this day')
+    parser.add_argument('--until', type=date.fromisoformat, help='Only export rows dated on or before this day')
+    parser.add_argument('--max-shard-rows', type=int, default=5000,
+                        help='Split shards holding more rows than this (default: 5000)')
+    parser.add_argument('--include-undated', action='store_true',
+                        help='Also walk the unfiltered listing for rows without a date')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='Page requests in flight')
+    parser.add_argument('--window', type=int, default=64,
+                        help='Pages fetched ahead of the one being written (default: 64)')
+    parser.add_argument('--retries', type=int, default=4, help='Retries per page on errors, 429 and 5xx')
+    parser.add_argument('--restart', action='store_true', help='Ignore existing checkpoints')
+    parser.add_argument('--compare-csv', action='store_true',
+                        help='Also time the /export/csv routes over the same date range')
+    parser.add_argument('--json', dest='json_output', help='Also write the report to this file')
+    add_save_arguments(parser)
+
+
+def print_report(report):
+    print(format_table(report['resources'], EXPORT_COLUMNS))
+    for row in report['resources']:
+        plan = row['plan']
+        if row['resumed']:
+            print(f"💾 {row['resource']}: resumed from checkpoint, {row['rows'] - row['fetched']} rows already written")
+        if row['error']:
+            print(f"❌ {row['resource']}: {row['error']} ({row['done']}/{row['shards']} shards done; rerun to resume)")
+        if plan.get('dated') is not None and plan['covered'] != plan['dated']:
+            print(f"⚠️  {row['resource']}: shards cover {plan['covered']} of {plan['dated']} dated rows; "
+                  f"the date filter may be shifting day boundaries (database timezone)")
+        if plan.get('undated') and not plan.get('undated_included'):
+            print(f"⚠️  {row['resource']}: {plan['undated']} rows have no date and are only exported "
+                  f"with --include-undated or --shard none")
+        if row['changed']:
+            print(f"⚠️  {row['resource']}: data changed during export in {', '.join(row['changed'])}")
+    if report['csv']:
+        print()
+        ok = [row for row in report['csv'] if not row['error']]
+        if ok:
+            print(format_table(ok, CSV_COLUMNS))
+        for row in report['csv']:
+            if row['error']:
+                print(f"⚠️  CSV {row['resource']}: {row['error']}")
+    rows = sum(row['rows'] for row in report['resources'])
+    print(f"📊 {rows} rows exported to {report['out_dir']} in {report['elapsed_s']:.2f}s "
+          f"({report['retries']} retries)")
+
+
+def run(args):
+    if args.fmt == 'parquet' and pa is None:
+        print('❌ --format parquet requires pyarrow (pip install pyarrow)')
+        return 1
+    collection = load_collection(args.collection)
+    resources = args.resource or list(RESOURCES)
+    try:
+        variables = resolve_variables(collection, parse_variables(args.var), args.base_url)
+        exporter = Exporter(
+            collection,
+            variables,
+            load_accounts(args, collection)[0],
+            out_dir=args.out_dir,
+            fmt=args.fmt,
+            shard_unit=args.shard,
+            since=args.since,
+            until=args.until,
+            filters=parse_variables(args.filter),
+            max_shard_rows=args.max_shard_rows,
+            concurrency=args.concurrency,
+            window=args.window,
+            retries=args.retries,
+            timeout=args.timeout,
+            include_undated=args.include_undated,
+            restart=args.restart,
+        )
+        for name in resources:
+            exporter.api.base_url(RESOURCES[name]['request'])
+    except ValueError as error:
+        print(f'❌ {error}')
+        return 1
+    print(f"🚀 Exporting {', '.join(resources)} as {args.fmt} to {args.out_dir} "
+          f"({args.shard} shards, {args.concurrency} requests in flight)...")
+    report = asyncio.run(exporter.run(resources, compare_csv=args.compare_csv))
+    print_report(report)
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(report, f, indent=2)
+    save_from_args(args, 'export', exporter.stats.values(), report)
+    return 1 if any(row['error'] for row in report['resources']) else 0
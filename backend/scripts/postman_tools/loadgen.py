@@ -0,0 +1,245 @@
+"""
+Collection-driven load generator.
+
+Every virtual user walks its own shuffled copy of the selected requests in a
+loop, sharing one pooled HTTP client so connections are kept alive across
+requests. Latencies are aggregated per request name in constant memory.
+
+Requests are resolved and their heads encoded once before the run, and the
+report includes the client's CPU time per request, so a run whose client was
+the bottleneck is not mistaken for the API's limit. With --validate, responses
+are also checked against the docs/swagger.yaml schemas (see validation.py),
+and --phases/--prometheus/--otlp break latency down into connect, TLS, TTFB
+and body time (see phases.py).
+"""
+
+import asyncio
+import json
+import random
+import time
+
+from .client import HTTPClient, HTTPError, prepare_request
+from .collection import build_request_specs, load_collection
+from .phases import add_phase_arguments, finish_from_args, recorder_from_args
+from .results import add_save_arguments, save_from_args
+from .stats import CpuMeter, RequestStats, describe_cpu, format_table
+from .validation import add_validate_argument, print_validation, validator_from_args
+
+SUMMARY_COLUMNS = [
+    ('Request', 'name', '{}'),
+    ('Count', 'requests', '{}'),
+    ('Fail', 'failures', '{}'),
+    ('RPS', 'rps', '{:.1f}'),
+    ('p50 ms', 'p50_ms', '{:.2f}'),
+    ('p95 ms', 'p95_ms', '{:.2f}'),
+    ('p99 ms', 'p99_ms', '{:.2f}'),
+    ('Max ms', 'max_ms', '{:.2f}'),
+]
+
+
+class LoadRunner:
+    """Drive `users` concurrent virtual users over a list of RequestSpecs"""
+
+    def __init__(self, specs, users=10, duration=None, iterations=None,
+                 think_time=0.0, timeout=30.0, seed=None, validator=None, phases=None):
+        if not specs:
+            raise ValueError('No requests selected from the collection')
+        if duration is None and iterations is None:
+            raise ValueError('Either duration or iterations is required')
+        self.specs = specs
+        self.users = users
+        self.duration = duration
+        self.iterations = iterations
+        self.think_time = think_time
+        self.timeout = timeout
+        self.seed = seed
+        self.validator = validator
+        self.phases = phases
+        self.stats = {spec.name: RequestStats(spec.name) for spec in specs}
+        self.operations = {}
+        if validator is not None:
+            self.operations = {spec.name: validator.operation(spec.method, spec.url) for spec in specs}
+        self.prepared = {}
+        for spec in specs:
+            try:
+                self.prepared[spec.name] = prepare_request(spec.method, spec.url, spec.headers, spec.body)
+            except HTTPError as error:
+                raise ValueError(f'{spec.name}: {error} (is baseUrl set?)')
+        self.deadline = None
+        self.elapsed = 0.0
+        self.connects = 0
+        self.cpu = None
+
+    async def _send(self, client, spec):
+        stats = self.stats[spec.name]
+        start = time.perf_counter()
+        try:
+            response = await client.send(self.prepared[spec.name])
+        except Exception as error:
+            stats.record_error(error)
+            return None
+        stats.record(time.perf_counter() - start, response.status)
+        if self.phases is not None:
+            self.phases.record(spec.name, response)
+        if self.validator is not None:
+            self.validator.validate(spec.name, self.operations[spec.name], response)
+        return response
+
+    async def _user(self, client, user_id):
+        rng = random.Random(None if self.seed is None else self.seed + user_id)
+        order = list(self.specs)
+        iteration = 0
+        while True:
+            if self.iterations is not None and iteration >= self.iterations:
+                return
+            rng.shuffle(order)
+            for spec in order:
+                if self.deadline is not None and time.perf_counter() >= self.deadline:
+                    return
+                await self._send(client, spec)
+                if self.think_time:
+                    await asyncio.sleep(rng.expovariate(1 / self.think_time))
+            iteration += 1
+
+    async def run(self):
+        client = HTTPClient(limit_per_host=self.users, timeout=self.timeout)
+        meter = CpuMeter()
+        start = time.perf_counter()
+        self.deadline = start + self.duration if self.duration else None
+        try:
+            await asyncio.gather(*(
+                self._user(client, user_id) for user_id in range(self.users)
+            ))
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.cpu = meter.summary(sum(stats.latency.count + sum(stats.errors.values())
+                                         for stats in self.stats.values()))
+            self.connects = client.connects
+            await client.close()
+        return self.report()
+
+    def report(self):
+        rows = [stats.summary(self.elapsed) for stats in self.stats.values()]
+        total = sum(row['requests'] for row in rows)
+        return {
+            'users': self.users,
+            'elapsed_s': self.elapsed,
+            'requests': total,
+            'rps': total / self.elapsed if self.elapsed else 0.0,
+            'connections_opened': self.connects,
+            'client_cpu': self.cpu,
+            'validation': self.validator.summary() if self.validator is not None else None,
+            'endpoints': rows,
+        }
+
+
+def parse_variables(pairs):
+    """Turn ['key=value', ...] into a dict"""
+    variables = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition('=')
+        if not sep:
+            raise ValueError(f'Expected key=value, got {pair!r}')
+        variables[key] = value
+    return variables
+
+
+def add_workload_arguments(parser):
+    """Request selection and virtual-user options shared by `load` and `soak`"""
+    parser.add_argument('--base-url', help='Override the {{baseUrl}} collection variable')
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE',
+                        help='Set a collection variable (repeatable), e.g. invoiceId=<uuid>')
+    parser.add_argument('--folder', action='append', default=[],
+                        help='Only use requests from this folder (repeatable)')
+    parser.add_argument('--request', action='append', default=[], dest='names',
+                        help='Only use requests with this name (repeatable)')
+    parser.add_argument('--methods', default='GET',
+                        help='Comma-separated HTTP methods to include (default: GET)')
+    parser.add_argument('-u', '--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='Mean pause between requests per user, in seconds')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, help='Seed for the per-user request order')
+
+
+def add_arguments(parser):
+    add_workload_arguments(parser)
+    parser.add_argument('-d', '--duration', type=float, help='Run for this many seconds')
+    parser.add_argument('-n', '--iterations', type=int,
+                        help='Passes over the request mix per user (default when no duration: 1)')
+    add_validate_argument(parser)
+    add_phase_arguments(parser)
+    parser.add_argument('--json', dest='json_output', help='Also write the report to this file')
+    add_save_arguments(parser)
+
+
+def select_specs(args, collection=None):
+    """
+    Resolve the collection requests chosen by the common CLI options, skipping
+    (with a warning) those whose path needs an id nobody set
+    """
+    collection = collection or load_collection(args.collection)
+    variables = parse_variables(args.var)
+    if args.base_url:
+        variables['baseUrl'] = args.base_url.rstrip('/')
+    methods = {m.strip().upper() for m in args.methods.split(',') if m.strip()}
+    skipped = {}
+    specs = build_request_specs(
+        collection,
+        variables=variables,
+        folders=set(args.folder) or None,
+        methods=methods or None,
+        names=set(args.names) or None,
+        skipped=skipped,
+    )
+    for name, unset in skipped.items():
+        needed = ' '.join(f'--var {variable}=<value>' for variable in unset)
+        print(f'⚠️  Skipping {name}: its URL path uses empty variables; pass {needed}')
+    return specs
+
+
+def print_report(report):
+    print(format_table(report['endpoints'], SUMMARY_COLUMNS))
+    print()
+    for row in report['endpoints']:
+        if row['errors']:
+            errors = ', '.join(f'{name} x{n}' for name, n in row['errors'].items())
+            print(f"⚠️  {row['name']}: {errors}")
+    print(f"📊 {report['requests']} requests in {report['elapsed_s']:.2f}s "
+          f"({report['rps']:.1f} req/s) from {report['users']} users over "
+          f"{report['connections_opened']} connections")
+    for line in describe_cpu(report['client_cpu']):
+        print(line)
+    if report['validation']:
+        print_validation(report['validation'])
+
+
+def run(args):
+    specs = select_specs(args)
+    iterations = args.iterations
+    if args.duration is None and iterations is None:
+        iterations = 1
+    try:
+        runner = LoadRunner(
+            specs,
+            users=args.users,
+            duration=args.duration,
+            iterations=iterations,
+            think_time=args.think_time,
+            timeout=args.timeout,
+            seed=args.seed,
+            validator=validator_from_args(args),
+            phases=recorder_from_args(args, 'load'),
+        )
+    except ValueError as error:
+        print(f'❌ {error}')
+        return 1
+    print(f"🚀 Replaying {len(specs)} requests with {args.users} virtual users...")
+    report = asyncio.run(runner.run())
+    print_report(report)
+    finish_from_args(args, runner.phases)
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(report, f, indent=2)
+    save_from_args(args, 'load', runner.stats.values(), report)
+    return 1 if runner.validator is not None and runner.validator.invalid else 0
@@ -0,0 +1,250 @@
+"""
+Idempotent merge of generated folders into the Postman collection.
+
+Requests are keyed by folder + method + path and compared by a content hash,
+so regenerating an unchanged folder leaves the collection untouched instead
+of appending another copy. Items that exist only in the collection (added by
+hand in Postman) are kept as they are.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+
+def request_path(item):
+    """Return the request path with the {{baseUrl}} host and query removed"""
+    url = item['request']['url']
+    if isinstance(url, dict) and 'path' in url:
+        return '/' + '/'.join(url['path'])
+    raw = url if isinstance(url, str) else url.get('raw', '')
+    raw = raw.split('?', 1)[0]
+    if raw.startswith('{{'):
+        raw = raw[raw.find('}}') + 2:]
+    return '/' + raw.lstrip('/')
+
+
+def request_key(folder, item):
+    """Identity of a request inside the collection"""
+    return folder, item['request'].get('method', 'GET').upper(), request_path(item)
+
+
+def content_hash(item):
+    """Stable hash of an item's full content"""
+    canonical = json.dumps(item, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class MergeResult:
+    """Counts of what a merge changed"""
+
+    def __init__(self):
+        self.added = []
+        self.updated = []
+        self.unchanged = 0
+        self.removed_duplicates = []
+        self.folders_added = []
+        self.folders_updated = []
+        self.variables_added = []
+        self.stale = []
+        self.removed_stale = []
+
+    @property
+    def changed(self):
+        return bool(
+            self.added or self.updated or self.removed_duplicates
+            or self.folders_added or self.folders_updated or self.variables_added
+            or self.removed_stale
+        )
+
+    def lines(self):
+        lines = []
+        for name in self.folders_added:
+            lines.append(f'   + folder {name}')
+        for name in self.folders_updated:
+            lines.append(f'   ~ folder {name}')
+        for key in self.added:
+            lines.append(f'   + {key[0]}: {key[1]} {key[2]}')
+        for key in self.updated:
+            lines.append(f'   ~ {key[0]}: {key[1]} {key[2]}')
+        for key in self.removed_duplicates:
+            lines.append(f'   - duplicate {key[0]}: {key[1]} {key[2]}')
+        for key in self.removed_stale:
+            lines.append(f'   - stale {key[0]}: {key[1]} {key[2]}')
+        for key in self.stale:
+            lines.append(f'   ! stale {key[0]}: {key[1]} {key[2]} (no matching route, use --prune)')
+        for name in self.variables_added:
+            lines.append(f'   + variable {name}')
+        return lines
+
+
+def _merge_folder_items(existing, generated, result):
+    """Merge generated items into an existing folder in place"""
+    folder = existing['name']
+    positions = {}
+    seen = set()
+    merged = []
+    for item in existing.get('item', []):
+        if 'request' not in item:
+            merged.append(item)
+            continue
+        key = request_key(folder, item)
+        # Same endpoint under a different name is a deliberate variant
+        # (e.g. "Upload Invalid File Type"), not a duplicate
+        if (key, item.get('name')) in seen:
+            result.removed_duplicates.append(key)
+            continue
+        seen.add((key, item.get('name')))
+        positions.setdefault(key, len(merged))
+        merged.append(item)
+
+    for item in generated['item']:
+        key = request_key(folder, item)
+        index = positions.get(key)
+        if index is None:
+            positions[key] = len(merged)
+            merged.append(item)
+            result.added.append(key)
+        elif content_hash(merged[index]) != content_hash(item):
+            merged[index] = item
+            result.updated.append(key)
+        else:
+            result.unchanged += 1
+
+    existing['item'] = merged
+    for field, value in generated.items():
+        if field != 'item' and existing.get(field) != value:
+            existing[field] = value
+            if folder not in result.folders_updated:
+                result.folders_updated.append(folder)
+
+
+def merge_folders(collection, folders, variables=(), anchor='Health Check', result=None):
+    """
+    Merge generated folders and variables into `collection` in place.
+
+    New folders are inserted before the `anchor` item (or appended when it is
+    missing). Folders that appear more than once under the same name are
+    collapsed into the first occurrence.
+    """
+    result = result or MergeResult()
+
+    for var in variables:
+        if not any(v['key'] == var['key'] for v in collection.setdefault('variable', [])):
+            collection['variable'].append(var)
+            result.variables_added.append(var['key'])
+
+    for generated in folders:
+        matches = [item for item in collection['item'] if item.get('name') == generated['name'] and 'item' in item]
+        if not matches:
+            index = next(
+                (i for i, item in enumerate(collection['item']) if item.get('name') == anchor),
+                len(collection['item']),
+            )
+            collection['item'].insert(index, generated)
+            result.folders_added.append(generated['name'])
+            continue
+
+        target = matches[0]
+        for duplicate in matches[1:]:
+            target.setdefault('item', []).extend(duplicate.get('item', []))
+            collection['item'].remove(duplicate)
+        _merge_folder_items(target, generated, result)
+
+    return result
+
+
+def _add_path_variables(collection, item, result):
+    for name in re.findall(r'\{\{(\w+)\}\}', request_path(item)):
+        if not any(v['key'] == name for v in collection['variable']):
+            collection['variable'].append({'key': name, 'value': '', 'type': 'string'})
+            result.variables_added.append(name)
+
+
+def add_missing(collection, folders, prune=False, anchor='Health Check', result=None):
+    """
+    Add generated requests that the collection does not have yet.
+
+    Unlike merge_folders(), existing items are never rewritten: a request
+    already in the collection keeps its hand-written name, examples and test
+    scripts. Items whose method + path is not in the generated folder are
+    reported as stale, and removed when `prune` is set.
+    """
+    result = result or MergeResult()
+
+    for generated in folders:
+        target = next(
+            (item for item in collection['item'] if item.get('name') == generated['name'] and 'item' in item),
+            None,
+        )
+        if target is None:
+            index = next(
+                (i for i, item in enumerate(collection['item']) if item.get('name') == anchor),
+                len(collection['item']),
+            )
+            collection['item'].insert(index, generated)
+            result.folders_added.append(generated['name'])
+            for item in generated['item']:
+                _add_path_variables(collection, item, result)
+            continue
+
+        folder = target['name']
+        generated_keys = {request_key(folder, item) for item in generated['item']}
+        kept = []
+        existing_keys = set()
+        for item in target.get('item', []):
+            if 'request' in item:
+                key = request_key(folder, item)
+                if key not in generated_keys:
+                    if prune:
+                        result.removed_stale.append(key)
+                        continue
+                    result.stale.append(key)
+                existing_keys.add(key)
+            kept.append(item)
+        for item in generated['item']:
+            key = request_key(folder, item)
+            if key not in existing_keys:
+                kept.append(item)
+                existing_keys.add(key)
+                result.added.append(key)
+                _add_path_variables(collection, item, result)
+        target['item'] = kept
+
+    return result
+
+
+def serialize(collection):
+    """Serialize a collection the way the checked-in file is formatted"""
+    return json.dumps(collection, indent='\t')
+
+
+def write_atomic(path, text):
+    """
+    Replace `path` with `text` through a uniquely named temporary file in the
+    same directory, so readers and concurrent writers only ever see a whole
+    file. Returns False without touching the file when it already holds `text`.
+    """
+    try:
+        with open(path, 'r') as f:
+            if f.read() == text:
+                return False
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
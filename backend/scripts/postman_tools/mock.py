@@ -0,0 +1,576 @@
+"""
+Mock DocuFlow API served from the Postman collection.
+
+Every request in the collection becomes a route keyed by method and path
+template ({{invoiceId}} and :id segments match any value). A route answers
+with its recorded Postman example responses when it has them, with an entry
+from an --examples file, or with a synthetic body in the API's
+successResponse() shape otherwise: tokens from the auth routes, 201 from
+creates, a page for list endpoints and an object for the other GETs. Bodies
+may use {{name}} placeholders, filled from path and query parameters, and
+the Postman dynamic variables {{$randomUUID}}, {{$timestamp}},
+{{$isoTimestamp}} and {{$randomInt}}.
+
+The server is a bare asyncio.Protocol: responses without placeholders are
+encoded once at startup, so a request costs one header parse, one dict or
+template lookup and one write. Latency and errors can be injected per route
+to see how the frontend and the load tools behave against a slow or flaky
+backend. uvloop is used when it is installed.
+"""
+
+import asyncio
+import base64
+import fnmatch
+import json
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote
+
+from .collection import VARIABLE_PATTERN, iter_requests, load_collection
+from .merge import request_path
+from .stats import format_table
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - optional speedup
+    uvloop = None
+
+MAX_HEADER_BYTES = 64 * 1024
+
+# Collection variables plus Postman's {{$dynamic}} ones
+TEMPLATE_PATTERN = re.compile(r'\{\{\s*(\$?[\w.-]+)\s*\}\}')
+
+DYNAMIC_VARIABLES = {
+    '$randomUUID': lambda rng: str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+    '$guid': lambda rng: str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+    '$timestamp': lambda rng: str(int(time.time())),
+    '$isoTimestamp': lambda rng: datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+    '$randomInt': lambda rng: str(rng.randint(0, 1000)),
+}
+
+# A JWT-shaped token expiring in 2100, so TokenCache never refreshes it
+MOCK_TOKEN = 'mock.' + base64.urlsafe_b64encode(b'{"exp":4102444800}').decode('ascii').rstrip('=') + '.mock'
+SESSION = {
+    'user': {'id': '{{$randomUUID}}', 'email': 'john.doe@example.com'},
+    'accessToken': MOCK_TOKEN,
+    'refreshToken': MOCK_TOKEN,
+}
+
+# Synthetic responses follow the controllers: parameterless GETs that page
+# through a table, GETs that answer with a bare array, creates answering 201,
+# and the fields the collection's test scripts and the scenarios capture
+LIST_ROUTES = {
+    'GET /api/documents', 'GET /api/invoices', 'GET /api/receipts',
+    'GET /api/contracts', 'GET /api/resumes', 'GET /api/jobs',
+}
+ARRAY_ROUTES = {'GET /api/contracts/expiring', 'GET /api/contracts/high-risk', 'GET /api/receipts/by-category'}
+CREATED_ROUTES = {'POST /api/auth/register', 'POST /api/upload', 'POST /api/jobs'}
+ROUTE_RESPONSES = {
+    'POST /api/auth/register': (201, SESSION),
+    'POST /api/auth/login': (200, SESSION),
+    'POST /api/auth/refresh': (200, {'accessToken': MOCK_TOKEN, 'refreshToken': MOCK_TOKEN}),
+    'POST /api/upload': (201, {'document': {'id': '{{$randomUUID}}', 'processing_status': 'pending'}}),
+    'POST /api/jobs': (201, {'id': '{{$randomUUID}}'}),
+    'POST /api/webhooks/document-uploaded': (200, {'document_id': '{{$randomUUID}}', 'processing_status': 'processing'}),
+    'POST /api/webhooks/invoice-processed': (200, {'invoice_id': '{{$randomUUID}}'}),
+    'POST /api/webhooks/resume-processed': (200, {'resume_id': '{{$randomUUID}}'}),
+    'POST /api/webhooks/contract-analyzed': (200, {'contract_id': '{{$randomUUID}}'}),
+    'POST /api/webhooks/receipt-processed': (200, {'receipt_id': '{{$randomUUID}}'}),
+    'GET /api/documents/*': (200, {'processing_status': 'completed'}),
+}
+
+ROUTE_COLUMNS = [
+    ('Route', 'name', '{}'),
+    ('Method', 'method', '{}'),
+    ('Path', 'path', '{}'),
+    ('Hits', 'hits', '{}'),
+    ('Injected', 'injected', '{}'),
+]
+
+
+def _error_body(code, message):
+    return json.dumps({'success': False, 'error': {'code': code, 'message': message}})
+
+
+class CannedResponse:
+    """A response whose status line, headers and body are encoded ahead of time"""
+
+    __slots__ = ('status', 'head', 'body', 'parts', 'json')
+
+    def __init__(self, status, body, headers=()):
+        self.status = status
+        reason = HTTPStatus(status).phrase if status in HTTPStatus._value2member_map_ else 'Unknown'
+        lines = [f'HTTP/1.1 {status} {reason}']
+        content_type = next((value for name, value in headers if name.lower() == 'content-type'), None)
+        self.json = content_type is None or 'json' in content_type.lower()
+        if content_type is None:
+            lines.append('Content-Type: application/json; charset=utf-8')
+        lines.extend(
+            f'{name}: {value}' for name, value in headers
+            if name.lower() not in ('content-length', 'connection', 'transfer-encoding', 'date')
+        )
+        self.head = ('\r\n'.join(lines) + '\r\n').encode('latin-1')
+
+        # Split templated bodies once into literal and placeholder parts
+        self.parts = None
+        if '{{' in body and TEMPLATE_PATTERN.search(body):
+            self.parts = []
+            position = 0
+            for match in TEMPLATE_PATTERN.finditer(body):
+                self.parts.append(body[position:match.start()])
+                self.parts.append((match.group(1), match.group(0)))
+                position = match.end()
+            self.parts.append(body[position:])
+        self.body = body.encode('utf-8')
+
+    def render_body(self, params, rng):
+        if self.parts is None:
+            return self.body
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            name, original = part
+            if name in params:
+                # Decoded request values may hold quotes or backslashes
+                out.append(json.dumps(params[name])[1:-1] if self.json else params[name])
+            elif name in DYNAMIC_VARIABLES:
+                out.append(DYNAMIC_VARIABLES[name](rng))
+            else:
+                out.append(original)
+        return ''.join(out).encode('utf-8')
+
+
+class MockRoute:
+    """One collection request and the responses it can return"""
+
+    __slots__ = ('name', 'method', 'path', 'segments', 'responses', 'latency', 'error', 'hits', 'injected')
+
+    def __init__(self, name, method, path, responses):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.segments = tuple(path.strip('/').split('/'))
+        self.responses = responses
+        self.latency = None
+        self.error = None
+        self.hits = 0
+        self.injected = 0
+
+    @property
+    def literal(self):
+        return not any(_param_name(segment) for segment in self.segments)
+
+    def choose(self, headers):
+        """Pick an example the way Postman mock servers do, by code or name header"""
+        if len(self.responses) > 1:
+            code = headers.get('x-mock-response-code')
+            name = headers.get('x-mock-response-name')
+            for response_name, response in self.responses:
+                if (code and str(response.status) == code) or (name and response_name == name):
+                    return response
+        return self.responses[0][1]
+
+
+def _param_name(segment):
+    if segment.startswith(':'):
+        return segment[1:]
+    match = VARIABLE_PATTERN.fullmatch(segment)
+    return match.group(1) if match else None
+
+
+def _template_key(name):
+    """Normalise 'METHOD /path/:id' and 'METHOD /path/{{id}}' to 'METHOD /path/*'"""
+    method, sep, path = name.partition(' ')
+    if not sep or not path.startswith('/') or method.upper() != method:
+        return name
+    segments = path.rstrip('/').split('/')
+    return f"{method} {'/'.join('*' if _param_name(s) else s for s in segments) or '/'}"
+
+
+def _default_response(item, method, path):
+    """(status, successResponse()-shaped body) mirroring the controller, for requests without an example"""
+    key = _template_key(f'{method} {path}')
+    if key in LIST_ROUTES:
+        return 200, json.dumps({
+            'success': True,
+            'message': 'Success',
+            'data': [],
+            'meta': {'pagination': {'page': 1, 'limit': 20, 'total': 0, 'totalPages': 0,
+                                    'hasNext': False, 'hasPrev': False}},
+        })
+    if key in ARRAY_ROUTES:
+        return 200, json.dumps({'success': True, 'message': item['name'], 'data': []})
+    data = {}
+    for segment in path.strip('/').split('/'):
+        name = _param_name(segment)
+        if name:
+            data['id'] = '{{%s}}' % name
+    status, fields = ROUTE_RESPONSES.get(key, (201 if key in CREATED_ROUTES else 200, {}))
+    data.update(fields)
+    return status, json.dumps({'success': True, 'message': item['name'], 'data': data})
+
+
+def _example_responses(item):
+    responses = []
+    for example in item.get('response') or []:
+        headers = [(h['key'], h.get('value', '')) for h in example.get('header') or [] if not h.get('disabled')]
+        responses.append((example.get('name', ''), CannedResponse(example.get('code', 200), example.get('body') or '', headers)))
+    return responses
+
+
+def _override_response(entry):
+    body = entry.get('body', '')
+    if not isinstance(body, str):
+        body = json.dumps(body)
+    return CannedResponse(entry.get('status', 200), body, list((entry.get('headers') or {}).items()))
+
+
+def build_routes(collection, examples=None, extra_folders=()):
+    """
+    Turn collection requests into MockRoutes.
+
+    `examples` maps a request name, 'Folder/Name' or 'METHOD /path' to a
+    {"status", "headers", "body"} entry (or a list of them), and takes
+    precedence over the examples recorded in the collection.
+    """
+    # 'METHOD /path' keys match any spelling of the path parameters
+    examples = {_template_key(name): entry for name, entry in (examples or {}).items()}
+    routes = {}
+    items = list(iter_requests(collection.get('item', [])))
+    for folder in extra_folders:
+        items.extend(iter_requests([folder]))
+
+    for folder, item in items:
+        method = item['request'].get('method', 'GET').upper()
+        path = request_path(item).rstrip('/') or '/'
+        key = _template_key(f'{method} {path}')
+        if key in routes:
+            continue
+
+        override = None
+        for name in (key, f'{folder}/{item["name"]}', item['name']):
+            if name in examples:
+                override = examples[name]
+                break
+        if override is not None:
+            entries = override if isinstance(override, list) else [override]
+            responses = [(entry.get('name', ''), _override_response(entry)) for entry in entries]
+        else:
+            responses = _example_responses(item) or [('', CannedResponse(*_default_response(item, method, path)))]
+        routes[key] = MockRoute(f'{folder}/{item["name"]}' if folder else item['name'], method, path, responses)
+    return list(routes.values())
+
+
+class RouteTable:
+    """Method + path lookup: a dict for literal paths, templates bucketed by length"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.literal = {}
+        self.templates = {}
+        for route in routes:
+            if route.literal:
+                self.literal[(route.method, route.path)] = route
+            else:
+                self.templates.setdefault((route.method, len(route.segments)), []).append(route)
+        # Prefer the template with the most literal segments (/documents/stats over /documents/:id)
+        for candidates in self.templates.values():
+            candidates.sort(key=lambda r: -sum(1 for s in r.segments if not _param_name(s)))
+
+    def match(self, method, path):
+        """Return (route, path params) or (None, None)"""
+        path = path.rstrip('/') or '/'
+        route = self.literal.get((method, path))
+        if route is not None:
+            return route, {}
+        segments = path.strip('/').split('/')
+        for route in self.templates.get((method, len(segments)), ()):
+            params = {}
+            for expected, actual in zip(route.segments, segments):
+                name = _param_name(expected)
+                if name:
+                    params[name] = unquote(actual)
+                elif expected != actual:
+                    break
+            else:
+                return route, params
+        if method == 'HEAD':
+            return self.match('GET', path)
+        return None, None
+
+
+def parse_latency(spec):
+    """
+    Parse a latency distribution in milliseconds into a sampler of seconds:
+    `5` / `const:5`, `uniform:2-20`, `exp:10` (mean) or `normal:20,5`.
+    """
+    kind, _, values = spec.partition(':')
+    if not values:
+        kind, values = 'const', spec
+    if values.endswith('ms'):
+        values = values[:-2]
+    if kind == 'const':
+        delay = float(values) / 1000
+        return lambda rng: delay
+    if kind == 'uniform':
+        low, high = (float(v) / 1000 for v in values.split('-', 1))
+        return lambda rng: rng.uniform(low, high)
+    if kind == 'exp':
+        rate = 1000 / float(values)
+        return lambda rng: rng.expovariate(rate)
+    if kind == 'normal':
+        mean, sd = (float(v) / 1000 for v in values.split(',', 1))
+        return lambda rng: max(0.0, rng.gauss(mean, sd))
+    raise ValueError(f'Unknown latency distribution {spec!r} (const, uniform, exp, normal)')
+
+
+def parse_error(spec):
+    """Parse `RATE` or `RATE:STATUS` (STATUS may be `reset` to drop the connection)"""
+    rate, _, status = spec.partition(':')
+    status = status or '500'
+    return float(rate), (status if status == 'reset' else int(status))
+
+
+def _split_rule(rule):
+    """'PATTERN=SPEC' or plain 'SPEC' (applies to every route)"""
+    pattern, sep, spec = rule.rpartition('=')
+    return (pattern if sep else '*'), spec
+
+
+def apply_faults(routes, latency_rules=(), error_rules=()):
+    """
+    Attach latency samplers and error rates to routes. A rule's pattern is
+    matched against the route name ('Folder/Request') and 'METHOD /path';
+    later rules win.
+    """
+    for rules, parse, attribute in ((latency_rules, parse_latency, 'latency'), (error_rules, parse_error, 'error')):
+        for rule in rules:
+            pattern, spec = _split_rule(rule)
+            value = parse(spec)
+            for route in routes:
+                if fnmatch.fnmatchcase(route.name, pattern) or fnmatch.fnmatchcase(f'{route.method} {route.path}', pattern):
+                    setattr(route, attribute, value)
+                    if attribute == 'error':
+                        status = value[1]
+                        route.error = (value[0], status if status == 'reset' else CannedResponse(
+                            status, _error_body('MOCK_INJECTED_ERROR', 'Injected failure')))
+
+
+class MockServer:
+    """Shared state for all connections: the route table and counters"""
+
+    def __init__(self, routes, seed=None):
+        self.table = RouteTable(routes)
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.unmatched = 0
+        self.started = time.perf_counter()
+        self._date = b''
+        self._date_second = None
+
+    def date_header(self):
+        now = int(time.time())
+        if now != self._date_second:
+            self._date_second = now
+            self._date = f'Date: {formatdate(now, usegmt=True)}\r\n'.encode('latin-1')
+        return self._date
+
+    def handle(self, method, target, headers):
+        """Return (CannedResponse or 'reset', body bytes, delay seconds)"""
+        self.requests += 1
+        path, _, query = target.partition('?')
+        route, params = self.table.match(method, path)
+        if route is None:
+            if method == 'OPTIONS':
+                return PREFLIGHT, b'', 0.0
+            self.unmatched += 1
+            return NOT_FOUND, _error_body('NOT_FOUND', f'Route {method} {path} not found').encode('utf-8'), 0.0
+
+        route.hits += 1
+        rng = self.rng
+        delay = route.latency(rng) if route.latency else 0.0
+        if route.error and rng.random() < route.error[0]:
+            route.injected += 1
+            response = route.error[1]
+            if response == 'reset':
+                return response, b'', delay
+            return response, response.body, delay
+
+        response = route.choose(headers)
+        if response.parts is not None and query:
+            params = dict(parse_qsl(query), **params)
+        return response, response.render_body(params, rng), delay
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'elapsed_s': elapsed,
+            'requests': self.requests,
+            'unmatched': self.unmatched,
+            'rps': self.requests / elapsed if elapsed else 0.0,
+            'routes': [
+                {'name': r.name, 'method': r.method, 'path': r.path, 'hits': r.hits, 'injected': r.injected}
+                for r in self.table.routes if r.hits
+            ],
+        }
+
+
+PREFLIGHT = CannedResponse(204, '', [
+    ('Access-Control-Allow-Methods', 'GET, POST, PUT, PATCH, DELETE, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Authorization, Content-Type'),
+    ('Access-Control-Max-Age', '600'),
+])
+NOT_FOUND = CannedResponse(404, '')
+BAD_REQUEST = CannedResponse(400, '')
+
+
+class MockProtocol(asyncio.Protocol):
+    """HTTP/1.1 keep-alive connection; pipelined requests are answered in order"""
+
+    def __init__(self, server):
+        self.server = server
+        self.buffer = bytearray()
+        self.transport = None
+        self.waiting = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        if not self.waiting:
+            self._process()
+
+    def _process(self):
+        buffer = self.buffer
+        while buffer and not self.waiting:
+            end = buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(buffer) > MAX_HEADER_BYTES:
+                    self._respond(BAD_REQUEST, b'', False, None)
+                return
+            lines = buffer[:end].decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ', 2)
+            except ValueError:
+                self._respond(BAD_REQUEST, b'', False, None)
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if 'chunked' in headers.get('transfer-encoding', ''):
+                response = CannedResponse(411, _error_body('LENGTH_REQUIRED', 'Chunked request bodies are not supported'))
+                self._respond(response, response.body, False, headers.get('origin'))
+                return
+            size = end + 4 + int(headers.get('content-length') or 0)
+            if len(buffer) < size:
+                return
+            del buffer[:size]
+
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+            response, body, delay = self.server.handle(method.upper(), target, headers)
+            if method.upper() == 'HEAD':
+                body = b''
+            if delay > 0:
+                self.waiting = True
+                asyncio.get_running_loop().call_later(
+                    delay, self._delayed, response, body, keep_alive, headers.get('origin'))
+                return
+            self._respond(response, body, keep_alive, headers.get('origin'))
+
+    def _delayed(self, response, body, keep_alive, origin):
+        self.waiting = False
+        if self.transport.is_closing():
+            return
+        self._respond(response, body, keep_alive, origin)
+        self._process()
+
+    def _respond(self, response, body, keep_alive, origin):
+        if response == 'reset':
+            self.transport.abort()
+            return
+        extra = self.server.date_header() + b'Content-Length: %d\r\n' % len(body)
+        if origin:
+            # The frontend sends credentials, so the origin is echoed instead of '*'
+            extra += (f'Access-Control-Allow-Origin: {origin}\r\n'
+                      'Access-Control-Allow-Credentials: true\r\nVary: Origin\r\n').encode('latin-1')
+        if not keep_alive:
+            extra += b'Connection: close\r\n'
+        self.transport.write(response.head + extra + b'\r\n' + body)
+        if not keep_alive:
+            self.waiting = True
+            self.transport.close()
+
+
+def load_examples(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def add_arguments(parser):
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=3001,
+                        help='Port to listen on (default: 3001, the frontend default API URL)')
+    parser.add_argument('--examples', help='JSON file of responses keyed by request name or "METHOD /path"')
+    parser.add_argument('--no-routes', dest='use_routes', action='store_false',
+                        help='Only serve requests in the collection, not the ones generated from src/routes')
+    parser.add_argument('--latency', action='append', default=[], metavar='[PATTERN=]SPEC',
+                        help='Injected latency in ms: 5, uniform:2-20, exp:10 or normal:20,5 (repeatable)')
+    parser.add_argument('--error-rate', action='append', default=[], metavar='[PATTERN=]RATE[:STATUS]',
+                        help='Fail this fraction of requests with STATUS (default 500) or "reset" (repeatable)')
+    parser.add_argument('--seed', type=int, help='Seed for injected latency, errors and random values')
+    parser.add_argument('--list', action='store_true', help='Print the route table and exit')
+
+
+def print_report(report):
+    print()
+    print(format_table(report['routes'], ROUTE_COLUMNS))
+    print(f"📊 {report['requests']} requests in {report['elapsed_s']:.1f}s ({report['rps']:.1f} req/s), "
+          f"{report['unmatched']} unmatched")
+
+
+async def serve(server, host, port):
+    loop = asyncio.get_running_loop()
+    listener = await loop.create_server(lambda: MockProtocol(server), host, port, backlog=1024)
+    async with listener:
+        await listener.serve_forever()
+
+
+def run(args):
+    from . import routes as route_parser
+
+    collection = load_collection(args.collection)
+    extra = []
+    if args.use_routes:
+        extra, _ = route_parser.generate_folders()
+    routes = build_routes(collection, load_examples(args.examples) if args.examples else None, extra)
+    apply_faults(routes, args.latency, args.error_rate)
+
+    if args.list:
+        rows = [{'name': r.name, 'method': r.method, 'path': r.path, 'hits': len(r.responses),
+                 'injected': 'yes' if r.latency or r.error else ''} for r in routes]
+        print(format_table(rows, [('Route', 'name', '{}'), ('Method', 'method', '{}'), ('Path', 'path', '{}'),
+                                  ('Examples', 'hits', '{}'), ('Faults', 'injected', '{}')]))
+        return 0
+
+    server = MockServer(routes, seed=args.seed)
+    print(f"🚀 Mock API serving {len(routes)} routes on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.close()
+    print_report(server.report())
+    return 0
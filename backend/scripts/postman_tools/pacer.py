@@ -0,0 +1,448 @@
+"""
+Adaptive pacer that finds the sustainable request rate per rate-limit group.
+
+Endpoints are grouped by the express-rate-limit middleware chain server.js
+puts in front of them (auth, upload+api, webhook, api). Each group is driven
+by two controls:
+
+- a token bucket per limiter, refilled from the RateLimit-Remaining /
+  RateLimit-Reset headers so the remaining budget is spread over the rest of
+  the window, and paused until the reset after a 429;
+- an AIMD concurrency limit: every epoch it doubles (slow start) and later
+  grows by one while the group sees no 429s and its p95 stays under the
+  latency target, and halves as soon as either degrades.
+
+The report gives, per group, the best healthy throughput seen and the
+long-run ceiling the limiter allows (limit / window), and which of the two
+bounds the group.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+from . import routes
+from .client import HTTPClient
+from .loadgen import select_specs
+from .results import add_save_arguments, save_from_args
+from .stats import LatencyHistogram, RequestStats, format_table
+
+LIMITER_FILE = 'src/middleware/rateLimiter.js'
+LIMITER_PATTERN = re.compile(r'exports\.(\w+)\s*=\s*rateLimit\(\{(.*?)\n\}\);', re.S)
+
+GROUP_COLUMNS = [
+    ('Group', 'group', '{}'),
+    ('Requests', 'requests', '{}'),
+    ('429s', 'throttled', '{}'),
+    ('Best RPS', 'best_rps', '{:.1f}'),
+    ('@Conc', 'best_concurrency', '{}'),
+    ('p95 ms', 'best_p95_ms', '{:.2f}'),
+    ('Limit/window', 'policy', '{}'),
+    ('Sustainable', 'sustainable_rps', '{:.2f}/s'),
+    ('Bound by', 'bound_by', '{}'),
+]
+
+
+def parse_limiters(text):
+    """Limiter name -> {max, window_s, code, skipped} from rateLimiter.js"""
+    limiters = {}
+    for name, body in LIMITER_PATTERN.findall(text):
+        window = re.search(r'windowMs:\s*([\d\s*]+)', body)
+        limit = re.search(r'\bmax:\s*(\d+)', body)
+        code = re.search(r"code:\s*'(\w+)'", body)
+        window_ms = 1
+        for factor in (window.group(1) if window else '0').split('*'):
+            window_ms *= int(factor.strip() or 0)
+        limiters[name] = {
+            'max': int(limit.group(1)) if limit else None,
+            'window_s': window_ms / 1000,
+            'code': code.group(1) if code else None,
+            'skipped': 'skip:' in body,
+        }
+    return limiters
+
+
+def parse_limiter_mounts(text, limiters):
+    """
+    [(prefix, [limiter names], handles requests)] in server.js order, with
+    app-level routes (app.get('/health', ...)) as terminal mounts without limiters
+    """
+    entries = []
+    for match in routes.MOUNT_PATTERN.finditer(text):
+        prefix, args = match.groups()
+        names = [name for name in re.findall(r'\b(\w+)\b', args) if name in limiters]
+        terminal = 'require(' in args or any(
+            name not in limiters for name in re.findall(r'^\s*(\w+)\s*$', args, re.M)
+        )
+        entries.append((match.start(), (prefix, names, terminal)))
+    for match in routes.APP_ROUTE_PATTERN.finditer(text):
+        entries.append((match.start(), (match.group(2), [], 'exact')))
+    return [mount for _, mount in sorted(entries, key=lambda entry: entry[0])]
+
+
+def limiter_chain(path, mounts):
+    """Limiters a request to `path` passes through, in order and without repeats"""
+    chain = []
+    for prefix, names, terminal in mounts:
+        if terminal == 'exact':
+            if path == prefix:
+                break
+            continue
+        if path == prefix or path.startswith(prefix.rstrip('/') + '/'):
+            for name in names:
+                if name not in chain:
+                    chain.append(name)
+            # A router that answers the request ends the chain; limiters mounted
+            # after it (e.g. the catch-all '/api' apiLimiter) never run
+            if terminal and names:
+                break
+    return chain
+
+
+def load_limits(root='.'):
+    """Read the limiter configuration and mount table from the backend sources"""
+    try:
+        with open(os.path.join(root, LIMITER_FILE), 'r') as f:
+            limiters = parse_limiters(f.read())
+        with open(os.path.join(root, routes.SERVER_FILE), 'r') as f:
+            mounts = parse_limiter_mounts(f.read(), limiters)
+    except OSError:
+        return {}, []
+    return limiters, mounts
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Request budget for one limiter, learned from RateLimit-* headers"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rate = None            # tokens per second; None until headers arrive
+        self.capacity = 1.0
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.limit = None
+        self.window_s = None
+        self.seen_headers = False
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            if self.rate is None:
+                return
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def update(self, headers):
+        """Spread RateLimit-Remaining evenly over the seconds until RateLimit-Reset"""
+        limit = _number(headers.get('ratelimit-limit'))
+        remaining = _number(headers.get('ratelimit-remaining'))
+        reset = _number(headers.get('ratelimit-reset'))
+        if limit is None or remaining is None or reset is None:
+            return
+        self.seen_headers = True
+        self.limit = int(limit)
+        window = re.search(r'w=(\d+)', headers.get('ratelimit-policy', ''))
+        if window:
+            self.window_s = int(window.group(1))
+        now = time.monotonic()
+        self._refill(now)
+        reset = max(reset, 1.0)
+        if remaining <= 0:
+            self.pause(reset)
+            return
+        self.rate = remaining / reset
+        self.capacity = max(1.0, min(remaining, 5.0))
+        self.tokens = min(self.tokens, remaining)
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class PacedGroup:
+    """Requests behind one limiter chain, with an AIMD concurrency limit"""
+
+    def __init__(self, name, chain, specs, buckets, max_concurrency=64,
+                 latency_target=None, latency_factor=2.0):
+        self.name = name
+        self.chain = chain
+        self.specs = specs
+        self.buckets = [buckets[limiter] for limiter in chain]
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.latency_factor = latency_factor
+        self.limit = 1
+        self.slow_start = True
+        self.in_flight = 0
+        self.gate = asyncio.Condition()
+        self.requests = 0
+        self.throttled = 0
+        self.epoch = LatencyHistogram()
+        self.epoch_throttled = 0
+        self.epochs = []
+        self.best = None
+
+    async def acquire(self):
+        async with self.gate:
+            await self.gate.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        for bucket in self.buckets:
+            await bucket.take()
+
+    async def release(self):
+        async with self.gate:
+            self.in_flight -= 1
+            self.gate.notify_all()
+
+    def record(self, seconds, response, codes):
+        self.requests += 1
+        if response.status == 429:
+            self.throttled += 1
+            self.epoch_throttled += 1
+            wait = _number(response.headers.get('retry-after')) or _number(response.headers.get('ratelimit-reset')) or 1.0
+            bucket = self._throttling_bucket(response, codes)
+            if bucket is not None:
+                bucket.pause(wait)
+            return
+        if response.status < 400:
+            self.epoch.record_seconds(seconds)
+        # express-rate-limit sets headers in every limiter; the last one wins
+        if self.buckets:
+            self.buckets[-1].update(response.headers)
+
+    def _throttling_bucket(self, response, codes):
+        try:
+            code = response.json()['error']['code']
+        except (ValueError, KeyError, TypeError):
+            code = None
+        for bucket in self.buckets:
+            if codes.get(bucket.name) == code:
+                return bucket
+        return self.buckets[-1] if self.buckets else None
+
+    async def end_epoch(self, seconds):
+        """Apply the AIMD rule to what happened since the last epoch"""
+        ok, throttled = self.epoch.count, self.epoch_throttled
+        p95 = self.epoch.percentile(95) / 1000
+        if self.latency_target is None and ok:
+            # The first epoch runs at concurrency 1: its p95 is the unloaded baseline
+            self.latency_target = p95 * self.latency_factor
+        healthy = throttled == 0 and ok > 0 and p95 <= self.latency_target
+        rps = ok / seconds
+        self.epochs.append({'concurrency': self.limit, 'rps': rps, 'p95_ms': p95,
+                            'throttled': throttled, 'healthy': healthy})
+        if healthy and (self.best is None or rps > self.best['rps']):
+            self.best = self.epochs[-1]
+
+        async with self.gate:
+            if healthy:
+                self.limit = min(self.max_concurrency, self.limit * 2 if self.slow_start else self.limit + 1)
+            elif ok or throttled:
+                self.slow_start = False
+                self.limit = max(1, self.limit // 2)
+            self.gate.notify_all()
+        self.epoch = LatencyHistogram()
+        self.epoch_throttled = 0
+
+
+class Pacer:
+    """Run every group concurrently and adapt each one independently"""
+
+    def __init__(self, specs, limiters, mounts, duration=60.0, epoch=5.0, max_concurrency=64,
+                 latency_target_ms=None, latency_factor=2.0, timeout=30.0):
+        self.limiters = limiters
+        self.codes = {name: config['code'] for name, config in limiters.items()}
+        self.buckets = {name: TokenBucket(name) for name in limiters}
+        self.duration = duration
+        self.epoch = epoch
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.stats = {spec.name: RequestStats(spec.name) for spec in specs}
+        self.elapsed = 0.0
+
+        by_chain = {}
+        for spec in specs:
+            chain = tuple(limiter_chain(urlsplit(spec.url).path, mounts))
+            by_chain.setdefault(chain, []).append(spec)
+        self.groups = [
+            PacedGroup(
+                '+'.join(name.replace('Limiter', '') for name in chain) or 'unlimited',
+                chain, group_specs, self.buckets, max_concurrency,
+                latency_target_ms, latency_factor,
+            )
+            for chain, group_specs in by_chain.items()
+        ]
+
+    async def _worker(self, client, group, order, deadline):
+        # Check the deadline too: asyncio.wait_for inside the client can swallow
+        # the cancellation if its response arrives at the same moment
+        while time.perf_counter() < deadline:
+            await group.acquire()
+            try:
+                spec = next(order)
+                stats = self.stats[spec.name]
+                start = time.perf_counter()
+                try:
+                    response = await client.request(spec.method, spec.url, spec.headers, spec.body)
+                except Exception as error:
+                    stats.record_error(error)
+                    continue
+                seconds = time.perf_counter() - start
+                stats.record(seconds, response.status)
+                group.record(seconds, response, self.codes)
+            finally:
+                await group.release()
+
+    async def _controller(self, group, deadline):
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(self.epoch, remaining))
+            await group.end_epoch(self.epoch)
+
+    async def run(self):
+        client = HTTPClient(limit_per_host=self.max_concurrency * max(1, len(self.groups)), timeout=self.timeout)
+        start = time.perf_counter()
+        deadline = start + self.duration
+        tasks = []
+        for group in self.groups:
+            order = itertools.cycle(group.specs)
+            tasks.append(asyncio.ensure_future(self._controller(group, deadline)))
+            tasks.extend(
+                asyncio.ensure_future(self._worker(client, group, order, deadline)) for _ in range(self.max_concurrency)
+            )
+        try:
+            # Workers may be parked until a limiter window resets, so stop them
+            # at the deadline instead of waiting for them to notice
+            await asyncio.wait(tasks, timeout=self.duration)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.elapsed = time.perf_counter() - start
+            await client.close()
+        return self.report()
+
+    def _policy(self, group):
+        """Long-run ceiling of the tightest limiter in the chain, from headers or rateLimiter.js"""
+        ceiling = None
+        for bucket in group.buckets:
+            config = self.limiters.get(bucket.name, {})
+            limit = bucket.limit or config.get('max')
+            window = bucket.window_s or config.get('window_s')
+            if limit and window and (ceiling is None or limit / window < ceiling[0]):
+                ceiling = (limit / window, f'{limit}/{window:g}s', bucket.seen_headers)
+        return ceiling
+
+    def report(self):
+        rows = []
+        for group in self.groups:
+            best = group.best or {'rps': 0.0, 'concurrency': 0, 'p95_ms': 0.0}
+            ceiling = self._policy(group)
+            enforced = ceiling is not None and ceiling[2]
+            if enforced and (ceiling[0] <= best['rps'] * 1.05 or group.throttled):
+                sustainable, bound_by = ceiling[0], 'rate limit'
+            else:
+                sustainable, bound_by = best['rps'], 'latency' if group.epochs else 'no data'
+            rows.append({
+                'group': group.name,
+                'limiters': list(group.chain),
+                'requests': group.requests,
+                'throttled': group.throttled,
+                'best_rps': best['rps'],
+                'best_concurrency': best['concurrency'],
+                'best_p95_ms': best['p95_ms'],
+                'latency_target_ms': group.latency_target,
+                'policy': ceiling[1] + ('' if enforced else ' (no headers)') if ceiling else '-',
+                'sustainable_rps': sustainable,
+                'bound_by': bound_by,
+                'epochs': group.epochs,
+                'requests_in_group': [spec.name for spec in group.specs],
+            })
+        return {
+            'elapsed_s': self.elapsed,
+            'groups': rows,
+            'endpoints': [stats.summary(self.elapsed) for stats in self.stats.values()],
+        }
+
+
+def add_arguments(parser):
+    parser.add_argument('--base-url', help='Override the {{baseUrl}} collection variable')
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE',
+                        help='Set a collection variable (repeatable), e.g. accessToken=<jwt>')
+    parser.add_argument('--folder', action='append', default=[],
+                        help='Only use requests from this folder (repeatable)')
+    parser.add_argument('--request', action='append', default=[], dest='names',
+                        help='Only use requests with this name (repeatable)')
+    parser.add_argument('--methods', default='GET',
+                        help='Comma-separated HTTP methods to include (default: GET)')
+    parser.add_argument('-d', '--duration', type=float, default=60.0, help='Run for this many seconds (default: 60)')
+    parser.add_argument('--epoch', type=float, default=5.0,
+                        help='Seconds between concurrency adjustments (default: 5)')
+    parser.add_argument('--max-concurrency', type=int, default=64, help='Upper bound per group (default: 64)')
+    parser.add_argument('--max-latency', type=float, metavar='MS',
+                        help='p95 above which a group backs off (default: 2x its unloaded p95)')
+    parser.add_argument('--latency-factor', type=float, default=2.0,
+                        help='Latency target as a multiple of the unloaded p95 (default: 2)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--json', dest='json_output', help='Also write the report to this file')
+    add_save_arguments(parser)
+
+
+def print_report(report):
+    print(format_table(report['groups'], GROUP_COLUMNS))
+    print()
+    for row in report['groups']:
+        print(f"   {row['group']}: {', '.join(row['requests_in_group'])}")
+    print(f"📊 Paced for {report['elapsed_s']:.1f}s")
+
+
+def run(args):
+    specs = select_specs(args)
+    if not specs:
+        print("❌ No requests selected from the collection")
+        return 1
+    limiters, mounts = load_limits()
+    if not limiters:
+        print(f"⚠️  {LIMITER_FILE} not found; pacing on latency only")
+    pacer = Pacer(
+        specs, limiters, mounts,
+        duration=args.duration,
+        epoch=args.epoch,
+        max_concurrency=args.max_concurrency,
+        latency_target_ms=args.max_latency,
+        latency_factor=args.latency_factor,
+        timeout=args.timeout,
+    )
+    print(f"🚀 Pacing {len(specs)} requests in {len(pacer.groups)} rate-limit groups for {args.duration:g}s...")
+    report = asyncio.run(pacer.run())
+    print_report(report)
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(report, f, indent=2)
+    save_from_args(args, 'pace', pacer.stats.values(), report)
+    return 0
@@ -0,0 +1,341 @@
+"""
+Seeded, realistic n8n webhook payloads.
+
+PayloadFactory produces payloads shaped like the ones n8n sends (see
+docs/webhooks.md and N8N_INTEGRATION_SPEC.md), deterministic for a given
+seed. It only needs the standard library and none of the HTTP client, so
+`update` and `envs` can build the synthetic payload folder without paying
+for asyncio at startup; the benchmark lives in webhooks.py.
+"""
+
+import json
+import random
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+
+# Webhook name -> document type whose row it updates (None: any type)
+WEBHOOKS = {
+    'document-uploaded': None,
+    'invoice-processed': 'invoice',
+    'resume-processed': 'resume',
+    'contract-analyzed': 'contract',
+    'receipt-processed': 'receipt',
+}
+
+DOCUMENT_TYPES = ['invoice', 'resume', 'contract', 'receipt']
+
+VALIDATION_STATUSES = [('valid', 0.8), ('needs_review', 0.15), ('invalid', 0.05)]
+CONFIDENCE_RANGES = {'valid': (90, 100), 'needs_review': (60, 89), 'invalid': (20, 59)}
+VALIDATION_ERRORS = [
+    'Total amount does not match line items',
+    'Due date is before issue date',
+    'Vendor name could not be read',
+    'Missing tax amount',
+    'Low OCR confidence on page 1',
+]
+CURRENCIES = [('USD', 0.7), ('EUR', 0.15), ('GBP', 0.1), ('INR', 0.05)]
+
+VENDORS = [
+    'Acme Corp', 'Globex Inc', 'Initech', 'Umbrella Supplies', 'Stark Industries',
+    'Wayne Enterprises', 'Hooli', 'Vandelay Industries', 'Soylent Ltd', 'Cyberdyne Systems',
+]
+INVOICE_LINES = [
+    ('Consulting Services', 80, 250), ('Software License', 99, 1200), ('Cloud Hosting', 20, 800),
+    ('Support Plan', 50, 500), ('Hardware', 150, 2500), ('Training Session', 300, 1500),
+    ('Office Supplies', 5, 60), ('Maintenance', 75, 400),
+]
+TAX_RATES = [0, 0.05, 0.08, 0.1, 0.2]
+
+FIRST_NAMES = ['Jane', 'John', 'Priya', 'Wei', 'Carlos', 'Aisha', 'Liam', 'Sofia', 'Kenji', 'Olivia']
+LAST_NAMES = ['Smith', 'Patel', 'Chen', 'Garcia', 'Okafor', 'Muller', 'Tanaka', 'Johnson', 'Rossi', 'Kim']
+LOCATIONS = [
+    'San Francisco, CA', 'New York, NY', 'Austin, TX', 'Seattle, WA', 'Remote',
+    'London, UK', 'Bangalore, India', 'Berlin, Germany', 'Toronto, Canada',
+]
+POSITIONS = [
+    'Software Engineer', 'Senior Developer', 'Data Analyst', 'Product Manager',
+    'DevOps Engineer', 'QA Engineer', 'Engineering Manager', 'Frontend Developer',
+]
+TECHNICAL_SKILLS = [
+    'JavaScript', 'Python', 'React', 'Node.js', 'SQL', 'PostgreSQL', 'TypeScript',
+    'Java', 'Go', 'AWS', 'Machine Learning', 'GraphQL',
+]
+SOFT_SKILLS = ['Leadership', 'Communication', 'Teamwork', 'Problem Solving', 'Mentoring']
+TOOLS = ['Git', 'Docker', 'Kubernetes', 'Jira', 'Figma', 'Terraform', 'Jenkins']
+COMPANIES = ['Tech Corp', 'DataWorks', 'CloudNine', 'Bright Labs', 'Nimbus Systems']
+INSTITUTIONS = ['Stanford University', 'MIT', 'IIT Delhi', 'University of Toronto', 'TU Munich']
+DEGREES = ['B.S. Computer Science', 'M.S. Computer Science', 'B.E. Electronics', 'MBA']
+
+CONTRACT_TYPES = ['Service Agreement', 'NDA', 'Employment', 'Lease', 'Vendor Agreement', 'License']
+CONTRACT_RED_FLAGS = [
+    'Unlimited liability clause', 'Automatic renewal without notice',
+    'One-sided termination rights', 'Missing confidentiality clause', 'Unclear payment schedule',
+]
+OBLIGATIONS = [
+    'Deliver software within 6 months', 'Provide 1 year warranty', 'Monthly status reports',
+    'Maintain 99.9% uptime', 'Keep client data confidential',
+]
+GOVERNING_LAWS = ['State of California', 'State of New York', 'England and Wales', 'State of Delaware']
+
+MERCHANTS = [
+    ('Starbucks', 'Food & Beverage', [('Latte', 5), ('Croissant', 4), ('Muffin', 3.5)]),
+    ('Uber', 'Travel', [('Trip', 24)]),
+    ('Staples', 'Office Supplies', [('Printer Paper', 9), ('Pens', 6), ('Stapler', 12)]),
+    ('Delta Air Lines', 'Travel', [('Airfare', 420), ('Checked Bag', 35)]),
+    ('Marriott', 'Lodging', [('Room Night', 189), ('Parking', 25)]),
+    ('Best Buy', 'Equipment', [('USB-C Hub', 49), ('Monitor', 229)]),
+    ('Whole Foods', 'Meals', [('Lunch', 14), ('Coffee', 4)]),
+]
+PAYMENT_METHODS = ['Credit Card', 'Debit Card', 'Cash', 'Corporate Card']
+
+
+def _weighted(rng, choices):
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def _money(value):
+    return round(value, 2)
+
+
+class PayloadFactory:
+    """Seeded generator of realistic webhook payloads"""
+
+    def __init__(self, seed=0, start=date(2025, 1, 1), days=365):
+        self.rng = random.Random(seed)
+        self.start = start
+        self.days = days
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _date(self, offset=0):
+        return self.start + timedelta(days=self.rng.randrange(self.days) + offset)
+
+    def _timestamp(self, day):
+        moment = datetime.combine(day, dt_time(), timezone.utc) + timedelta(seconds=self.rng.randrange(86400))
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    def _validation(self, with_errors=False):
+        rng = self.rng
+        status = _weighted(rng, VALIDATION_STATUSES)
+        low, high = CONFIDENCE_RANGES[status]
+        validation = {'status': status, 'confidence_score': rng.randint(low, high)}
+        if with_errors:
+            validation['errors'] = [] if status == 'valid' else rng.sample(VALIDATION_ERRORS, rng.randint(1, 2))
+        return validation
+
+    def document_uploaded(self, document_id, document_type=None):
+        return {
+            'document_id': document_id,
+            'document_type': document_type or self.rng.choice(DOCUMENT_TYPES),
+            'timestamp': self._timestamp(self._date()),
+        }
+
+    def invoice_processed(self, document_id):
+        rng = self.rng
+        issue = self._date()
+        line_items = []
+        for description, low, high in rng.sample(INVOICE_LINES, rng.randint(1, 5)):
+            quantity = rng.randint(1, 20)
+            unit_price = _money(rng.uniform(low, high))
+            line_items.append({
+                'description': description,
+                'quantity': quantity,
+                'unit_price': unit_price,
+                'amount': _money(quantity * unit_price),
+            })
+        subtotal = sum(item['amount'] for item in line_items)
+        tax = _money(subtotal * rng.choice(TAX_RATES))
+        validation = self._validation(with_errors=True)
+        return {
+            'document_id': document_id,
+            'processed_data': {
+                'invoice_number': f'INV-{issue.year}-{rng.randrange(1, 100000):05d}',
+                'vendor_name': rng.choice(VENDORS),
+                'total_amount': _money(subtotal + tax),
+                'currency': _weighted(rng, CURRENCIES),
+                'issue_date': issue.isoformat(),
+                'due_date': (issue + timedelta(days=rng.choice([15, 30, 45, 60]))).isoformat(),
+                'status': validation['status'],
+                'tax_amount': tax,
+                'line_items': line_items,
+            },
+            'validation': validation,
+            'timestamp': self._timestamp(issue),
+        }
+
+    def resume_processed(self, document_id):
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        years = round(rng.uniform(0, 20), 1)
+        graduation = self.start.year - int(years) - rng.randint(0, 2)
+        experience = []
+        year = self.start.year
+        for i in range(rng.randint(1, 3)):
+            began = year - rng.randint(1, 4)
+            experience.append({
+                'company': rng.choice(COMPANIES),
+                'position': rng.choice(POSITIONS),
+                'start_date': f'{began}-{rng.randint(1, 12):02d}',
+                'end_date': 'present' if i == 0 else f'{year}-{rng.randint(1, 12):02d}',
+                'responsibilities': rng.sample(['Led team', 'Built microservices', 'Owned CI/CD',
+                                                'Mentored juniors', 'Designed APIs'], 2),
+            })
+            year = began
+        return {
+            'document_id': document_id,
+            'processed_data': {
+                'candidate_name': f'{first} {last}',
+                'email': f'{first.lower()}.{last.lower()}{rng.randrange(100)}@example.com',
+                'phone': f'+1-555-{rng.randrange(10000):04d}',
+                'location': rng.choice(LOCATIONS),
+                'years_of_experience': years,
+                'current_position': experience[0]['position'],
+                'summary': f'{experience[0]["position"]} with {years} years of experience.',
+                'skills': {
+                    'technical': rng.sample(TECHNICAL_SKILLS, rng.randint(2, 6)),
+                    'soft_skills': rng.sample(SOFT_SKILLS, rng.randint(1, 3)),
+                    'tools': rng.sample(TOOLS, rng.randint(1, 4)),
+                },
+                'experience': experience,
+                'education': [{
+                    'institution': rng.choice(INSTITUTIONS),
+                    'degree': rng.choice(DEGREES),
+                    'graduation_year': graduation,
+                }],
+            },
+            'validation': self._validation(),
+            'timestamp': self._timestamp(self._date()),
+        }
+
+    def contract_analyzed(self, document_id):
+        rng = self.rng
+        begins = self._date()
+        value = _money(rng.uniform(1000, 250000))
+        installments = rng.choice([1, 4, 12])
+        red_flags = rng.sample(CONTRACT_RED_FLAGS, rng.choice([0, 0, 1, 2, 3]))
+        contract_type = rng.choice(CONTRACT_TYPES)
+        return {
+            'document_id': document_id,
+            'processed_data': {
+                'contract_title': f'{contract_type} - {rng.choice(VENDORS)}',
+                'contract_type': contract_type,
+                'contract_value': value,
+                'currency': _weighted(rng, CURRENCIES),
+                'start_date': begins.isoformat(),
+                'end_date': (begins + timedelta(days=rng.choice([90, 180, 365, 730]))).isoformat(),
+                'risk_score': min(100, rng.randint(5, 40) + len(red_flags) * 10),
+                'auto_renewal': rng.random() < 0.3,
+                'governing_law': rng.choice(GOVERNING_LAWS),
+                'requires_legal_review': len(red_flags) >= 3,
+                'parties': [
+                    {'name': rng.choice(VENDORS), 'role': 'Service Provider'},
+                    {'name': rng.choice(COMPANIES), 'role': 'Client'},
+                ],
+                'payment_terms': {
+                    'amount': value,
+                    'frequency': {1: 'one-time', 4: 'quarterly', 12: 'monthly'}[installments],
+                    'installments': installments,
+                },
+                'obligations': rng.sample(OBLIGATIONS, rng.randint(1, 3)),
+                'red_flags': red_flags,
+            },
+            'validation': self._validation(),
+            'timestamp': self._timestamp(begins),
+        }
+
+    def receipt_processed(self, document_id):
+        rng = self.rng
+        merchant, category, catalogue = rng.choice(MERCHANTS)
+        items = []
+        for name, price in rng.sample(catalogue, rng.randint(1, len(catalogue))):
+            quantity = rng.randint(1, 3)
+            unit_price = _money(price * rng.uniform(0.9, 1.1))
+            items.append({'name': name, 'quantity': quantity, 'unit_price': unit_price,
+                          'amount': _money(quantity * unit_price)})
+        subtotal = sum(item['amount'] for item in items)
+        tax = _money(subtotal * rng.choice(TAX_RATES))
+        purchased = self._date()
+        return {
+            'document_id': document_id,
+            'processed_data': {
+                'merchant_name': merchant,
+                'total_amount': _money(subtotal + tax),
+                'currency': _weighted(rng, CURRENCIES),
+                'purchase_date': purchased.isoformat(),
+                'category': category,
+                'tax_amount': tax,
+                'payment_method': rng.choice(PAYMENT_METHODS),
+                'is_business_expense': rng.random() < 0.7,
+                'items': items,
+            },
+            'validation': self._validation(),
+            'timestamp': self._timestamp(purchased),
+        }
+
+    def payload(self, webhook, document_id=None, document_type=None):
+        """Build one payload for `webhook`, with a random document id if none is given"""
+        document_id = document_id or self._uuid()
+        if webhook == 'document-uploaded':
+            return self.document_uploaded(document_id, document_type)
+        return getattr(self, webhook.replace('-', '_'))(document_id)
+
+    def stream(self, count=None, webhooks=None, documents=None):
+        """
+        Yield (webhook, payload) pairs, forever when `count` is None.
+
+        `documents` is a list of (id, document_type) pairs; each payload then
+        targets a real document of the type its webhook updates, so the API
+        does the full update instead of answering 404.
+        """
+        webhooks = list(webhooks or WEBHOOKS)
+        by_type = {}
+        for document_id, document_type in documents or []:
+            by_type.setdefault(document_type, []).append(document_id)
+        everything = list(documents or [])
+        positions = {}
+
+        produced = 0
+        while count is None or produced < count:
+            webhook = self.rng.choice(webhooks)
+            wanted = WEBHOOKS[webhook]
+            document_id = document_type = None
+            pool = by_type.get(wanted) if wanted else everything
+            if pool:
+                index = positions.get(wanted, 0)
+                positions[wanted] = index + 1
+                picked = pool[index % len(pool)]
+                if wanted:
+                    document_id = picked
+                else:
+                    document_id, document_type = picked
+            yield webhook, self.payload(webhook, document_id, document_type)
+            produced += 1
+
+
+def create_payload_folder(seed=0):
+    """Collection folder with one seeded sample payload per webhook"""
+    factory = PayloadFactory(seed)
+    items = []
+    for webhook in WEBHOOKS:
+        payload = factory.payload(webhook, '{{documentId}}', 'invoice')
+        items.append({
+            "name": f"Synthetic {webhook.replace('-', ' ').title()}",
+            "request": {
+                "method": "POST",
+                "header": [{"key": "Content-Type", "value": "application/json", "type": "text"}],
+                "body": {"mode": "raw", "raw": json.dumps(payload, indent=2)},
+                "url": {
+                    "raw": f"{{{{baseUrl}}}}/api/webhooks/{webhook}",
+                    "host": ["{{baseUrl}}"],
+                    "path": ["api", "webhooks", webhook],
+                },
+                "description": f"Seeded n8n payload (seed {seed}) from update-postman.py webhooks generate",
+            },
+            "response": [],
+        })
+    return {
+        "name": "Webhook Payloads",
+        "description": "Synthetic n8n payloads for every webhook; set documentId to a document of the matching type",
+        "item": items,
+    }
@@ -0,0 +1,207 @@
+"""
+Per-phase request timings, exported for offline analysis.
+
+Every Response from the HTTP client carries Timings for queue (waiting for
+a pooled connection), dns, connect and tls (new connections only), send,
+ttfb (request written to status line) and body (rest of the response).
+PhaseRecorder folds them into one LatencyHistogram per request name, status
+and phase, so memory stays constant however long the run.
+
+The histograms are written as a Prometheus text file (one histogram plus
+p50/p95/p99 gauges, for the node_exporter textfile collector or
+`promtool tsdb create-blocks-from openmetrics`) and as OTLP-JSON metrics
+(an ExportMetricsServiceRequest, for the collector's otlpjsonfile receiver),
+so a slow TTFB on `Export Invoice PDF` can be set next to server-side
+traces without a live telemetry backend.
+"""
+
+import json
+import time
+
+from .client import Timings
+from .merge import write_atomic
+from .results import current_commit
+from .stats import LatencyHistogram, format_table
+
+PHASES = Timings.PHASES
+
+# Histogram bucket bounds in seconds: Prometheus' defaults plus a sub-millisecond
+# range, since most phases against a local API are well below 5ms
+BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+METRIC = 'docuflow_request_phase_seconds'
+OTLP_METRIC = 'docuflow.request.phase.duration'
+SERVICE_NAME = 'docuflow-postman-tools'
+
+PHASE_COLUMNS = [
+    ('Request', 'name', '{}'),
+    ('Status', 'status', '{}'),
+    ('Count', 'requests', '{}'),
+    ('Conns', 'connects', '{}'),
+    ('Connect p95', 'connect_p95_ms', '{:.2f}'),
+    ('TLS p95', 'tls_p95_ms', '{:.2f}'),
+    ('Send p95', 'send_p95_ms', '{:.2f}'),
+    ('TTFB p50', 'ttfb_p50_ms', '{:.2f}'),
+    ('TTFB p95', 'ttfb_p95_ms', '{:.2f}'),
+    ('Body p95', 'body_p95_ms', '{:.2f}'),
+]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PhaseRecorder:
+    """Constant-memory phase histograms keyed by (request name, status)"""
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.series = {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def record(self, name, response):
+        timings = response.timings
+        if timings is None:
+            return
+        key = (name, response.status)
+        histograms = self.series.get(key)
+        if histograms is None:
+            histograms = self.series[key] = {phase: LatencyHistogram() for phase in PHASES}
+        for phase in PHASES:
+            seconds = getattr(timings, phase)
+            if seconds is not None:
+                histograms[phase].record(seconds * 1_000_000)
+
+    def finish(self):
+        self.end_ns = time.time_ns()
+
+    def rows(self):
+        rows = []
+        for (name, status), histograms in self.series.items():
+            ms = lambda phase, pct: histograms[phase].percentile(pct) / 1000
+            rows.append({
+                'name': name,
+                'status': status,
+                'requests': histograms['ttfb'].count,
+                'connects': histograms['connect'].count,
+                'queue_p95_ms': ms('queue', 95),
+                'dns_p95_ms': ms('dns', 95),
+                'connect_p95_ms': ms('connect', 95),
+                'tls_p95_ms': ms('tls', 95),
+                'send_p95_ms': ms('send', 95),
+                'ttfb_p50_ms': ms('ttfb', 50),
+                'ttfb_p95_ms': ms('ttfb', 95),
+                'body_p95_ms': ms('body', 95),
+            })
+        return rows
+
+    def _points(self):
+        for (name, status), histograms in sorted(self.series.items(), key=lambda kv: (kv[0][0], kv[0][1])):
+            for phase in PHASES:
+                histogram = histograms[phase]
+                if histogram.count:
+                    yield name, status, phase, histogram
+
+    def to_prometheus(self):
+        bounds_us = [bound * 1_000_000 for bound in BOUNDS]
+        lines = [
+            f'# HELP {METRIC} Time spent in each phase of a request, by collection request name and status',
+            f'# TYPE {METRIC} histogram',
+        ]
+        quantiles = []
+        for name, status, phase, histogram in self._points():
+            labels = f'request="{_escape(name)}",status="{status}",phase="{phase}"'
+            for bound, count in zip(BOUNDS, histogram.cumulative(bounds_us)):
+                lines.append(f'{METRIC}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{METRIC}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'{METRIC}_sum{{{labels}}} {histogram.total / 1_000_000:.6f}')
+            lines.append(f'{METRIC}_count{{{labels}}} {histogram.count}')
+            for q in QUANTILES:
+                value = histogram.percentile(q * 100) / 1_000_000
+                quantiles.append(f'{METRIC}_quantile{{{labels},quantile="{q:g}"}} {value:.6f}')
+        lines.append(f'# HELP {METRIC}_quantile Phase duration percentiles over the whole run')
+        lines.append(f'# TYPE {METRIC}_quantile gauge')
+        lines.extend(quantiles)
+        return '\n'.join(lines) + '\n'
+
+    def to_otlp(self):
+        bounds_us = [bound * 1_000_000 for bound in BOUNDS]
+        end_ns = self.end_ns or time.time_ns()
+        points = []
+        for name, status, phase, histogram in self._points():
+            cumulative = histogram.cumulative(bounds_us) + [histogram.count]
+            counts = [cumulative[0]] + [b - a for a, b in zip(cumulative, cumulative[1:])]
+            points.append({
+                'attributes': [
+                    {'key': 'request.name', 'value': {'stringValue': name}},
+                    {'key': 'http.response.status_code', 'value': {'intValue': str(status)}},
+                    {'key': 'phase', 'value': {'stringValue': phase}},
+                ],
+                'startTimeUnixNano': str(self.start_ns),
+                'timeUnixNano': str(end_ns),
+                # OTLP-JSON encodes 64-bit integers as strings
+                'count': str(histogram.count),
+                'sum': histogram.total / 1_000_000,
+                'bucketCounts': [str(n) for n in counts],
+                'explicitBounds': list(BOUNDS),
+                'min': (histogram.min or 0) / 1_000_000,
+                'max': histogram.max / 1_000_000,
+            })
+        sha, dirty, _ = current_commit()
+        resource = [
+            {'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}},
+            {'key': 'docuflow.tool', 'value': {'stringValue': self.tool}},
+            {'key': 'vcs.revision', 'value': {'stringValue': sha + ('-dirty' if dirty else '')}},
+        ]
+        return {
+            'resourceMetrics': [{
+                'resource': {'attributes': resource},
+                'scopeMetrics': [{
+                    'scope': {'name': 'postman_tools.phases', 'version': '1.0'},
+                    'metrics': [{
+                        'name': OTLP_METRIC,
+                        'description': 'Time spent in each phase of a request',
+                        'unit': 's',
+                        'histogram': {
+                            # Whole-run totals: AGGREGATION_TEMPORALITY_CUMULATIVE
+                            'aggregationTemporality': 2,
+                            'dataPoints': points,
+                        },
+                    }],
+                }],
+            }],
+        }
+
+
+def add_phase_arguments(parser):
+    """Options shared by the commands that record phase timings"""
+    parser.add_argument('--phases', action='store_true',
+                        help='Print connect/TLS/TTFB/body percentiles per request and status')
+    parser.add_argument('--prometheus', metavar='FILE',
+                        help='Write per-phase histograms in the Prometheus text format')
+    parser.add_argument('--otlp', metavar='FILE', help='Write per-phase histograms as OTLP-JSON metrics')
+
+
+def recorder_from_args(args, tool):
+    """A PhaseRecorder when any phase option was given, else None"""
+    if args.phases or args.prometheus or args.otlp:
+        return PhaseRecorder(tool)
+    return None
+
+
+def finish_from_args(args, recorder):
+    """Print and write the phase timings a run collected"""
+    if recorder is None:
+        return
+    recorder.finish()
+    if args.phases:
+        print()
+        print(format_table(recorder.rows(), PHASE_COLUMNS))
+    if args.prometheus:
+        write_atomic(args.prometheus, recorder.to_prometheus())
+        print(f'📊 Phase histograms written to {args.prometheus} (Prometheus text)')
+    if args.otlp:
+        write_atomic(args.otlp, json.dumps(recorder.to_otlp()))
+        print(f'📊 Phase histograms written to {args.otlp} (OTLP-JSON)')
@@ -0,0 +1,391 @@
+"""
+Persistent benchmark results and regression checks.
+
+Every saved run stores one latency histogram per collection request name in
+SQLite, keyed by git commit and environment, so later runs can be compared
+on full distributions rather than on averages.
+
+`compare` treats each stored run as one sample. Per request and percentile
+it takes that percentile from every run of each side (one run id, or every
+run of a commit in the environment) and applies a one-sided Mann-Whitney
+test to the two lists. Two runs of the same commit differ by more than the
+sampling error of either run (warm caches, noisy neighbours, GC), so a
+test over the requests of a single run flags A/A comparisons as
+regressions. A verdict therefore needs enough runs per side for the test to
+reach --alpha at all: four each at the default 0.05. A percentile is
+flagged as a regression only when the test is significant and the median
+increase is larger than --threshold.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from .stats import LatencyHistogram, format_table
+
+DEFAULT_DB = '.cache/benchmarks.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    commit_sha TEXT NOT NULL,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    branch TEXT,
+    environment TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    label TEXT,
+    created_at TEXT NOT NULL,
+    elapsed_s REAL,
+    report TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs (commit_sha, environment);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    request_name TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    p50_us INTEGER,
+    p95_us INTEGER,
+    p99_us INTEGER,
+    max_us INTEGER,
+    histogram TEXT NOT NULL,
+    PRIMARY KEY (run_id, request_name)
+);
+"""
+
+COMPARE_COLUMNS = [
+    ('Request', 'name', '{}'),
+    ('Pct', 'percentile', 'p{}'),
+    ('Base ms', 'base_ms', '{:.2f}'),
+    ('New ms', 'new_ms', '{:.2f}'),
+    ('Change', 'change', '{:+.1%}'),
+    ('Runs', 'runs', '{}'),
+    ('p-value', 'p_value', '{:.2g}'),
+    ('', 'verdict', '{}'),
+]
+
+RUN_COLUMNS = [
+    ('Run', 'id', '#{}'),
+    ('Commit', 'commit', '{}'),
+    ('Env', 'environment', '{}'),
+    ('Tool', 'tool', '{}'),
+    ('Label', 'label', '{}'),
+    ('Created', 'created_at', '{}'),
+    ('Requests', 'requests', '{}'),
+]
+
+
+def connect(path=DEFAULT_DB):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA foreign_keys = ON')
+    db.executescript(SCHEMA)
+    return db
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ['git', *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def current_commit():
+    """(sha, dirty, branch) of the working tree, or ('unknown', False, None) outside git"""
+    sha = _git('rev-parse', 'HEAD')
+    if not sha:
+        return 'unknown', False, None
+    dirty = bool(_git('status', '--porcelain', '--untracked-files=no'))
+    return sha, dirty, _git('rev-parse', '--abbrev-ref', 'HEAD')
+
+
+def save_run(db, tool, environment, stats, report, label=None):
+    """Store one run and the histogram of every RequestStats in `stats`; returns the run id"""
+    sha, dirty, branch = current_commit()
+    with db:
+        cursor = db.execute(
+            'INSERT INTO runs (commit_sha, dirty, branch, environment, tool, label, created_at, elapsed_s, report) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (sha, int(dirty), branch, environment, tool, label,
+             datetime.now(timezone.utc).isoformat(timespec='seconds'),
+             report.get('elapsed_s'), json.dumps(report)),
+        )
+        run_id = cursor.lastrowid
+        db.executemany(
+            'INSERT INTO results (run_id, request_name, requests, failures, p50_us, p95_us, p99_us, max_us, histogram) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (run_id, s.name, s.latency.count, s.failures,
+                 s.latency.percentile(50), s.latency.percentile(95), s.latency.percentile(99),
+                 s.latency.max, json.dumps(s.latency.to_dict()))
+                for s in stats if s.latency.count
+            ],
+        )
+    return run_id
+
+
+def resolve_runs(db, selector, environment=None, tool=None):
+    """
+    Run ids for a selector: '#12' or '12' for one run, 'latest' / 'previous'
+    for the newest or second-newest commit, or any git revision or sha prefix
+    for every run of that commit.
+    """
+    filters, params = [], []
+    if environment:
+        filters.append('environment = ?')
+        params.append(environment)
+    if tool:
+        filters.append('tool = ?')
+        params.append(tool)
+    where = ' AND '.join(filters) or '1'
+
+    if selector.lstrip('#').isdigit() and (selector.startswith('#') or len(selector) < 7):
+        row = db.execute(f'SELECT id FROM runs WHERE id = ? AND {where}', [int(selector.lstrip('#'))] + params).fetchone()
+        return [row[0]] if row else []
+
+    if selector in ('latest', 'previous'):
+        commits = db.execute(
+            f'SELECT commit_sha FROM runs WHERE {where} GROUP BY commit_sha ORDER BY MAX(id) DESC LIMIT 2', params
+        ).fetchall()
+        index = 0 if selector == 'latest' else 1
+        if len(commits) <= index:
+            return []
+        sha = commits[index][0]
+    else:
+        sha = _git('rev-parse', '--verify', '--quiet', f'{selector}^{{commit}}') or selector
+    rows = db.execute(
+        f"SELECT id FROM runs WHERE commit_sha LIKE ? AND {where} ORDER BY id", [sha + '%'] + params
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def run_groups(db, run_ids):
+    """Sorted (environment, tool) pairs the runs were stored under"""
+    placeholders = ','.join('?' * len(run_ids))
+    return sorted(db.execute(
+        f'SELECT DISTINCT environment, tool FROM runs WHERE id IN ({placeholders})', run_ids
+    ).fetchall())
+
+
+def load_run_histograms(db, run_ids):
+    """One {request name: LatencyHistogram} per run, in run order"""
+    runs = {run_id: {} for run_id in run_ids}
+    placeholders = ','.join('?' * len(run_ids))
+    for run_id, name, data in db.execute(
+        f'SELECT run_id, request_name, histogram FROM results WHERE run_id IN ({placeholders})', run_ids
+    ):
+        runs[run_id][name] = LatencyHistogram.from_dict(json.loads(data))
+    return list(runs.values())
+
+
+@lru_cache(maxsize=None)
+def _u_counts(n, m):
+    """Number of orderings of n + m values giving each Mann-Whitney U from 0 to n * m"""
+    if n == 0 or m == 0:
+        return (1,)
+    # The largest value is either one of the n (it beats all m others) or one of the m
+    counts = [0] * (n * m + 1)
+    for u, ways in enumerate(_u_counts(n - 1, m)):
+        counts[u + m] += ways
+    for u, ways in enumerate(_u_counts(n, m - 1)):
+        counts[u] += ways
+    return tuple(counts)
+
+
+def mann_whitney(base, new):
+    """
+    One-sided p-value that the values in `new` tend to be larger than those in `base`.
+
+    Exact for up to 20 values per side, normal approximation above. Ties
+    count against `new` (percentiles read from histogram buckets tie
+    often), which makes the test conservative.
+    """
+    n, m = len(new), len(base)
+    if not n or not m:
+        return float('nan')
+    u = sum(1 for x in new for b in base if x > b)
+    if n <= 20 and m <= 20:
+        counts = _u_counts(n, m)
+        return sum(counts[u:]) / math.comb(n + m, n)
+    mean = n * m / 2
+    sd = math.sqrt(n * m * (n + m + 1) / 12)
+    z = (u - 0.5 - mean) / sd
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def runs_needed(alpha):
+    """Runs per side below which no Mann-Whitney result can reach `alpha`"""
+    runs = 1
+    while 1 / math.comb(2 * runs, runs) >= alpha:
+        runs += 1
+    return runs
+
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def compare(base_runs, new_runs, percentiles=(95, 99), threshold=0.1, alpha=0.05, min_samples=50):
+    """
+    Compare two lists of {name: LatencyHistogram} runs; returns one row per request and percentile.
+
+    Runs with fewer than `min_samples` requests for a name are left out for
+    that name. Rows need enough runs on both sides for the test to reach
+    `alpha`; the others are marked 'too few runs'.
+    """
+    names = set().union(*base_runs) & set().union(*new_runs) if base_runs and new_runs else set()
+    needed = runs_needed(alpha)
+    rows = []
+    for name in sorted(names):
+        base = [run[name] for run in base_runs if name in run]
+        new = [run[name] for run in new_runs if name in run]
+        for percent in percentiles:
+            base_value = _median([histogram.percentile(percent) for histogram in base])
+            new_value = _median([histogram.percentile(percent) for histogram in new])
+            base_values = [h.percentile(percent) for h in base if h.count >= min_samples]
+            new_values = [h.percentile(percent) for h in new if h.count >= min_samples]
+            change = (new_value - base_value) / base_value if base_value else 0.0
+            if len(base_values) < needed or len(new_values) < needed:
+                p_value, verdict = float('nan'), 'too few runs'
+            else:
+                p_value = mann_whitney(base_values, new_values)
+                if p_value < alpha and change > threshold:
+                    verdict = '❌ regression'
+                elif mann_whitney(new_values, base_values) < alpha and change < -threshold:
+                    verdict = '✅ faster'
+                else:
+                    verdict = ''
+            rows.append({
+                'name': name,
+                'percentile': percent,
+                'base_ms': base_value / 1000,
+                'new_ms': new_value / 1000,
+                'change': change,
+                'runs': f'{len(base_values)}/{len(new_values)}',
+                'p_value': p_value,
+                'base_count': sum(histogram.count for histogram in base),
+                'new_count': sum(histogram.count for histogram in new),
+                'verdict': verdict,
+            })
+    return rows
+
+
+def add_save_arguments(parser):
+    """Options shared by the commands that can store their results"""
+    parser.add_argument('--save', action='store_true', help='Store the latency histograms in the results database')
+    parser.add_argument('--env', default='local', help='Environment name stored with the run (default: local)')
+    parser.add_argument('--label', help='Free-form note stored with the run')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Results database (default: {DEFAULT_DB})')
+
+
+def save_from_args(args, tool, stats, report):
+    """Store a finished run when --save was given"""
+    if not args.save:
+        return None
+    db = connect(args.db)
+    try:
+        run_id = save_run(db, tool, args.env, stats, report, label=args.label)
+    finally:
+        db.close()
+    print(f"💾 Saved as run #{run_id} ({args.env}) in {args.db}")
+    return run_id
+
+
+def add_compare_arguments(parser):
+    parser.add_argument('base', help="Baseline: run id (#12), git revision or 'previous'")
+    parser.add_argument('new', nargs='?', default='latest', help="Candidate: run id, git revision or 'latest' (default)")
+    parser.add_argument('--env', help='Only use runs from this environment')
+    parser.add_argument('--tool', help='Only use runs of this tool (load, webhooks, run:<scenario>)')
+    parser.add_argument('--request', action='append', default=[], dest='names', help='Only compare this request (repeatable)')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Smallest relative increase reported as a regression (default: 0.1 = 10%%)')
+    parser.add_argument('--alpha', type=float, default=0.05,
+                        help='Significance level (default: 0.05, which needs 4 runs per side)')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Results database (default: {DEFAULT_DB})')
+    parser.add_argument('--json', dest='json_output', help='Also write the comparison to this file')
+
+
+def add_runs_arguments(parser):
+    parser.add_argument('--env', help='Only list runs from this environment')
+    parser.add_argument('--limit', type=int, default=20, help='Most recent runs to show (default: 20)')
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Results database (default: {DEFAULT_DB})')
+
+
+def run_compare(args):
+    db = connect(args.db)
+    try:
+        sides = []
+        for selector in (args.base, args.new):
+            run_ids = resolve_runs(db, selector, args.env, args.tool)
+            if not run_ids:
+                print(f"❌ No stored runs match {selector!r}")
+                return 2
+            groups = run_groups(db, run_ids)
+            if len(groups) > 1:
+                # Latencies from different targets or workloads are not replicates
+                listed = ', '.join(f'{environment}/{tool}' for environment, tool in groups)
+                print(f"❌ {selector!r} matches runs of several environments or tools ({listed}); "
+                      f"pick one with --env and --tool")
+                return 2
+            sides.append((selector, run_ids, load_run_histograms(db, run_ids), groups[0]))
+    finally:
+        db.close()
+
+    (base_name, base_ids, base, base_group), (new_name, new_ids, new, new_group) = sides
+    if base_group != new_group:
+        print(f"⚠️  Comparing {'/'.join(base_group)} runs with {'/'.join(new_group)} runs")
+    if args.names:
+        base = [{k: v for k, v in run.items() if k in args.names} for run in base]
+        new = [{k: v for k, v in run.items() if k in args.names} for run in new]
+    rows = compare(base, new, threshold=args.threshold, alpha=args.alpha)
+    print(f"📊 {base_name} (runs {', '.join(f'#{i}' for i in base_ids)}) -> "
+          f"{new_name} (runs {', '.join(f'#{i}' for i in new_ids)})")
+    print(format_table(rows, COMPARE_COLUMNS))
+
+    regressions = [row for row in rows if row['verdict'].endswith('regression')]
+    base_names, new_names = set().union(*base), set().union(*new)
+    for name in sorted(base_names ^ new_names):
+        print(f"⚠️  {name} only appears in {'the baseline' if name in base_names else 'the candidate'}")
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump({'base': base_ids, 'new': new_ids, 'rows': rows}, f, indent=2)
+    if regressions:
+        print(f"❌ {len(regressions)} significant p95/p99 regressions")
+        return 1
+    if rows and all(row['verdict'] == 'too few runs' for row in rows):
+        print(f"⚠️  No verdict: store at least {runs_needed(args.alpha)} runs per side with --save "
+              f"(each with 50+ requests per request name) to reach --alpha {args.alpha:g}")
+        return 2
+    print("✅ No significant p95/p99 regressions")
+    return 0
+
+
+def run_list(args):
+    db = connect(args.db)
+    try:
+        query = ('SELECT r.id, r.commit_sha, r.dirty, r.environment, r.tool, r.label, r.created_at, '
+                 'COALESCE(SUM(s.requests), 0) FROM runs r LEFT JOIN results s ON s.run_id = r.id')
+        params = []
+        if args.env:
+            query += ' WHERE r.environment = ?'
+            params.append(args.env)
+        query += ' GROUP BY r.id ORDER BY r.id DESC LIMIT ?'
+        rows = [
+            {'id': run_id, 'commit': sha[:10] + ('+' if dirty else ''), 'environment': env, 'tool': tool,
+             'label': label or '', 'created_at': created, 'requests': requests}
+            for run_id, sha, dirty, env, tool, label, created, requests in db.execute(query, params + [args.limit])
+        ]
+    finally:
+        db.close()
+    print(format_table(rows, RUN_COLUMNS))
+    return 0
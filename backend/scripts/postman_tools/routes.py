@@ -0,0 +1,380 @@
+"""
+Generate collection folders from the Express route files and swagger.yaml.
+
+server.js is scanned for `app.use(prefix, ..., require('./src/routes/x'))`
+mounts, each src/routes/*.js file for `router.<method>(path, ...)` calls and
+their JSDoc blocks, and docs/swagger.yaml for summaries, parameters and
+request bodies. Parsed tables are cached by file mtime/size and content hash,
+so regenerating over the whole route tree only re-parses files that changed.
+
+PyYAML is optional: without it swagger.yaml is skipped and items are built
+from the route files alone.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from .merge import write_atomic
+
+CACHE_VERSION = 1
+CACHE_PATH = '.cache/route-tables.json'
+
+ROUTES_DIR = 'src/routes'
+SERVER_FILE = 'server.js'
+SWAGGER_FILE = 'docs/swagger.yaml'
+
+# Collection folder name for each route file
+FOLDER_NAMES = {
+    'auth': 'Authentication',
+    'documents': 'Documents',
+    'invoices': 'Invoices',
+    'resumes': 'Resumes',
+    'contracts': 'Contracts',
+    'receipts': 'Receipts',
+    'jobPostings': 'Jobs',
+    'webhooks': 'Webhooks',
+    'dashboard': 'Dashboard',
+    'user': 'Users',
+}
+
+SMALL_WORDS = {'a', 'an', 'and', 'as', 'by', 'for', 'from', 'in', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+ROUTE_PATTERN = re.compile(
+    r"router\.(get|post|put|patch|delete)\(\s*'([^']*)'\s*,(.*?)\);", re.S
+)
+JSDOC_PATTERN = re.compile(r'/\*\*(.*?)\*/', re.S)
+TAG_PATTERN = re.compile(r'@(\w+)[ \t]+(.+)')
+MOUNT_PATTERN = re.compile(r"app\.use\(\s*'([^']+)'\s*,(.*?)\);", re.S)
+APP_ROUTE_PATTERN = re.compile(r"app\.(get|post|put|patch|delete)\(\s*'([^']+)'")
+REQUIRE_VAR_PATTERN = re.compile(r"const\s+(\w+)\s*=\s*require\('\./src/routes/([\w-]+)'\)")
+REQUIRE_INLINE_PATTERN = re.compile(r"require\('\./src/routes/([\w-]+)'\)")
+VALIDATION_PATTERN = re.compile(r'const\s+(\w+)\s*=\s*\[(.*?)\];', re.S)
+
+
+def _parser_version():
+    # Editing the parsers below must invalidate every cached table
+    with open(__file__, 'rb') as f:
+        return f'{CACHE_VERSION}:{hashlib.sha256(f.read()).hexdigest()[:16]}'
+
+
+class RouteCache:
+    """Parsed route tables keyed by source file, validated by mtime and hash"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.version = _parser_version()
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.entries = {}
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == self.version:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, source, parse):
+        """Return parse(text) for `source`, reusing the cached table if unchanged"""
+        stat = os.stat(source)
+        entry = self.entries.get(source)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.hits += 1
+            return entry['table']
+
+        with open(source, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry and entry['sha256'] == digest:
+            # Touched but not modified: refresh the stat key only
+            self.hits += 1
+            table = entry['table']
+        else:
+            self.misses += 1
+            table = parse(raw.decode('utf-8'))
+        self.entries[source] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+            'table': table,
+        }
+        self.dirty = True
+        return table
+
+    def save(self):
+        if not self.dirty:
+            return
+        write_atomic(self.path, json.dumps({'version': self.version, 'entries': self.entries}))
+        self.dirty = False
+
+
+def _jsdoc_tags(block):
+    tags = {}
+    for line in block.splitlines():
+        match = TAG_PATTERN.search(line)
+        if match:
+            tags[match.group(1)] = match.group(2).strip()
+    return tags
+
+
+TYPE_PLACEHOLDERS = {'string': '', 'number': 0, 'integer': 0, 'boolean': False, 'array': [], 'object': {}}
+
+
+def _validator_placeholder(chain):
+    """Pick an example value that passes an express-validator chain"""
+    choice = re.search(r"\.isIn\(\[\s*'([^']*)'", chain)
+    if choice:
+        return choice.group(1)
+    if '.isArray(' in chain:
+        return []
+    if '.isInt(' in chain or '.isNumeric(' in chain or '.isFloat(' in chain:
+        return 0
+    if '.isBoolean(' in chain:
+        return False
+    return ''
+
+
+def parse_route_file(text):
+    """Extract routes, their JSDoc tags and auth requirement from a router file"""
+    protected = bool(re.search(r'router\.use\(\s*authenticate\s*\)', text))
+    docs = [(m.end(), _jsdoc_tags(m.group(1))) for m in JSDOC_PATTERN.finditer(text)]
+    # express-validator chains declared in the file, e.g. body('title').notEmpty()
+    validations = {
+        name: [
+            (m.group(1), _validator_placeholder(m.group(2)))
+            for m in re.finditer(r"body\('(\w+)'\)(.*?)(?=body\('|$)", chain, re.S)
+        ]
+        for name, chain in VALIDATION_PATTERN.findall(text)
+    }
+
+    routes = []
+    for match in ROUTE_PATTERN.finditer(text):
+        tags = {}
+        for end, block_tags in docs:
+            # Only a JSDoc block directly above the route describes it
+            if end <= match.start() and not text[end:match.start()].strip():
+                tags = block_tags
+        args = match.group(3)
+        handlers = re.findall(r'(\w+)\s*$', args.strip())
+        body = [
+            (field, TYPE_PLACEHOLDERS.get(kind.lower(), ''))
+            for field, kind in re.findall(r'(\w+)\s*:\s*(\w+)', tags.get('body', ''))
+        ]
+        for name in re.findall(r'\b(\w+)\b', args):
+            known = {field for field, _ in body}
+            body.extend(pair for pair in validations.get(name, []) if pair[0] not in known)
+        routes.append({
+            'method': match.group(1).upper(),
+            'path': match.group(2),
+            'auth': protected or re.search(r'\bauthenticate\b', args) is not None,
+            'handler': handlers[0] if handlers else None,
+            'desc': tags.get('desc'),
+            'query': re.findall(r'(\w+)(?:\s*\([^)]*\))?\s*(?:,|$)', tags.get('query', '')),
+            'body': body,
+        })
+    return routes
+
+
+def parse_server(text):
+    """Find route module mount prefixes and app-level routes in server.js"""
+    variables = {name: module for name, module in REQUIRE_VAR_PATTERN.findall(text)}
+    mounts = {}
+    for prefix, args in MOUNT_PATTERN.findall(text):
+        inline = REQUIRE_INLINE_PATTERN.findall(args)
+        modules = inline or [variables[name] for name in re.findall(r'\b(\w+)\b', args) if name in variables]
+        for module in modules:
+            mounts.setdefault(module, prefix)
+    routes = [f'{method.upper()} {path}' for method, path in APP_ROUTE_PATTERN.findall(text)]
+    return {'mounts': mounts, 'routes': routes}
+
+
+def parse_swagger(text):
+    """Reduce swagger.yaml to the per-operation fields used for collection items"""
+    try:
+        import yaml
+    except ImportError:
+        return {}
+    spec = yaml.safe_load(text) or {}
+    operations = {}
+    for path, methods in (spec.get('paths') or {}).items():
+        for method, operation in methods.items():
+            if not isinstance(operation, dict):
+                continue
+            content = ((operation.get('requestBody') or {}).get('content') or {})
+            body = None
+            for media_type, media in content.items():
+                body = {'type': media_type, 'schema': media.get('schema') or {}}
+                break
+            operations[f'{method.upper()} {path}'] = {
+                'summary': operation.get('summary'),
+                'tags': operation.get('tags', []),
+                'public': operation.get('security') == [],
+                'query': [
+                    {'name': p['name'], 'default': (p.get('schema') or {}).get('default')}
+                    for p in operation.get('parameters', []) if p.get('in') == 'query'
+                ],
+                'body': body,
+            }
+    return operations
+
+
+def _title(text):
+    words = text.rstrip('.').split()
+    return ' '.join(
+        w if (i and w.lower() in SMALL_WORDS) or w.isupper() or any(c.isdigit() for c in w)
+        else w[:1].upper() + w[1:]
+        for i, w in enumerate(words)
+    )
+
+
+def _humanize(handler):
+    return _title(re.sub(r'(?<!^)(?=[A-Z])', ' ', handler).replace('P D F', 'PDF').replace('C S V', 'CSV'))
+
+
+def _placeholder(schema):
+    if 'example' in schema:
+        return schema['example']
+    if schema.get('enum'):
+        return schema['enum'][0]
+    kind = schema.get('type')
+    if kind in ('integer', 'number'):
+        return 0
+    if kind == 'boolean':
+        return False
+    if kind == 'array':
+        return []
+    if kind == 'object':
+        return {k: _placeholder(v) for k, v in (schema.get('properties') or {}).items()}
+    return ''
+
+
+def build_item(prefix, route, operation):
+    """Build a collection item for one route, enriched by its swagger operation"""
+    full_path = (prefix.rstrip('/') + ('' if route['path'] == '/' else route['path'])) or '/'
+    segments = []
+    for seg in full_path.strip('/').split('/'):
+        if seg == ':id' and segments:
+            # /invoices/:id -> {{invoiceId}}, matching the collection variables
+            seg = '{{' + segments[-1].rstrip('s') + 'Id}}'
+        elif seg.startswith(':'):
+            seg = '{{' + seg[1:] + '}}'
+        segments.append(seg)
+
+    operation = operation or {}
+    name = operation.get('summary') or route['desc'] or (
+        _humanize(route['handler']) if route['handler'] else f"{route['method']} {full_path}"
+    )
+
+    query_names = list(route['query'])
+    for param in operation.get('query', []):
+        if param['name'] not in query_names:
+            query_names.append(param['name'])
+    defaults = {p['name']: p['default'] for p in operation.get('query', [])}
+    query = [
+        {'key': key, 'value': '' if defaults.get(key) is None else str(defaults[key]), 'disabled': True}
+        for key in query_names
+    ]
+
+    url = {
+        'raw': '{{baseUrl}}/' + '/'.join(segments),
+        'host': ['{{baseUrl}}'],
+        'path': segments,
+    }
+    if query:
+        url['query'] = query
+
+    request = {'method': route['method'], 'header': []}
+    if not route['auth'] or operation.get('public'):
+        request['auth'] = {'type': 'noauth'}
+
+    body = operation.get('body')
+    if body and body['type'] == 'multipart/form-data':
+        request['body'] = {
+            'mode': 'formdata',
+            'formdata': [
+                {'key': key, 'type': 'file', 'src': []} if schema.get('format') == 'binary'
+                else {'key': key, 'value': str(_placeholder(schema)), 'type': 'text'}
+                for key, schema in (body['schema'].get('properties') or {}).items()
+            ],
+        }
+    elif body or route['body']:
+        fields = _placeholder(body['schema']) if body else {}
+        if not fields:
+            fields = {key: value for key, value in route['body']}
+        request['header'].append({'key': 'Content-Type', 'value': 'application/json'})
+        request['body'] = {'mode': 'raw', 'raw': json.dumps(fields, indent=2)}
+
+    request['url'] = url
+    request['description'] = route['desc'] or operation.get('summary') or ''
+    return {'name': _title(name), 'request': request, 'response': []}
+
+
+def _swagger_path(full_path):
+    return re.sub(r':(\w+)', r'{\1}', full_path)
+
+
+def generate_folders(root='.', cache=None):
+    """
+    Build one folder per mounted route file.
+
+    Returns (folders, undocumented) where `undocumented` lists swagger
+    operations that no route file serves.
+    """
+    cache = cache or RouteCache(os.path.join(root, CACHE_PATH))
+    server = cache.get(os.path.join(root, SERVER_FILE), parse_server)
+    mounts = server['mounts']
+    swagger_file = os.path.join(root, SWAGGER_FILE)
+    operations = cache.get(swagger_file, parse_swagger) if os.path.exists(swagger_file) else {}
+
+    routes_dir = os.path.join(root, ROUTES_DIR)
+    folders = []
+    served = set(server['routes'])
+    for filename in sorted(os.listdir(routes_dir)):
+        module, ext = os.path.splitext(filename)
+        if ext != '.js' or module not in mounts:
+            continue
+        prefix = mounts[module]
+        items = []
+        for route in cache.get(os.path.join(routes_dir, filename), parse_route_file):
+            full_path = prefix.rstrip('/') + ('' if route['path'] == '/' else route['path'])
+            key = f"{route['method']} {_swagger_path(full_path)}"
+            served.add(key)
+            items.append(build_item(prefix, route, operations.get(key)))
+        if items:
+            folders.append({'name': FOLDER_NAMES.get(module, _title(module)), 'item': items})
+
+    cache.save()
+    undocumented = sorted(key for key in operations if key not in served and key.split(' ', 1)[1].startswith('/api/'))
+    return folders, undocumented
+
+
+def overlay(generated, curated):
+    """
+    Replace generated items with hand-curated ones that share their key.
+
+    Returns the curated items that match no route, which means the curated
+    definition has drifted from src/routes.
+    """
+    from .merge import request_key
+
+    drifted = []
+    by_name = {folder['name']: folder for folder in generated}
+    for folder in curated:
+        target = by_name.get(folder['name'])
+        if target is None:
+            drifted.extend(request_key(folder['name'], item) for item in folder['item'])
+            continue
+        positions = {request_key(folder['name'], item): i for i, item in enumerate(target['item'])}
+        for item in folder['item']:
+            key = request_key(folder['name'], item)
+            if key in positions:
+                target['item'][positions[key]] = item
+            else:
+                drifted.append(key)
+        for field, value in folder.items():
+            if field != 'item':
+                target[field] = value
+    return drifted
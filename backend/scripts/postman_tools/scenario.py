@@ -0,0 +1,513 @@
+"""
+Scenario runner: chained collection requests per virtual user.
+
+A scenario is an ordered list of steps, each naming a collection request.
+Response fields are captured into per-user variables (documentId,
+invoiceId, ...) that later steps resolve through the usual {{name}}
+placeholders. Captures default to whatever the request's Postman test
+script stores with pm.collectionVariables.set().
+
+Logins go through a TokenCache shared by all virtual users: each account
+logs in once, concurrent users wait on the same in-flight login, and tokens
+are refreshed shortly before they expire, so thousands of users do not trip
+the authLimiter (50 requests / 15 min per IP) just to authenticate.
+
+Each step's request is compiled into a RequestTemplate when the runner is
+built, and rendered requests are kept in a RequestCache keyed by the
+variable values they use, so polling steps and repeated iterations by the
+same user send a ready-made request instead of rebuilding it.
+
+With a ResponseValidator, each step's swagger operation is looked up once and
+the body the step already decoded is checked against it. A PhaseRecorder
+collects the client's per-phase timings under the same step labels.
+"""
+
+import asyncio
+import base64
+import json
+import random
+import re
+import time
+
+from .client import HTTPClient
+from .collection import RequestCache, RequestSpec, RequestTemplate, collection_variables, find_item, load_collection
+from .loadgen import parse_variables
+from .merge import request_path
+from .phases import add_phase_arguments, finish_from_args, recorder_from_args
+from .results import add_save_arguments, save_from_args
+from .stats import CpuMeter, LatencyHistogram, RequestStats, describe_cpu, format_table
+from .validation import add_validate_argument, print_validation, validator_from_args
+
+CAPTURE_PATTERN = re.compile(
+    r"pm\.collectionVariables\.set\(\s*'(\w+)'\s*,\s*response\.([\w.\[\]]+)\s*\)"
+)
+
+SAMPLE_PDF = (
+    b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+    b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+    b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n'
+    b'trailer<</Root 1 0 R>>\n%%EOF\n'
+)
+
+# Built-in scenarios. n8n is simulated by posting its webhooks directly, so the
+# chain runs end to end without a workflow engine attached to the backend.
+SCENARIOS = {
+    'invoice-pipeline': {
+        'description': 'Upload an invoice, run it through the n8n webhooks and read it back',
+        'steps': [
+            {'request': 'Upload Document', 'vars': {'document_type': 'invoice'},
+             'upload': {'file': 'invoice.pdf'}, 'expect': [201]},
+            {'request': 'Document Uploaded Webhook', 'expect': [200]},
+            {'request': 'Invoice Processed Webhook', 'expect': [200],
+             'capture': {'invoiceId': 'data.invoice_id'}},
+            {'request': 'Get Document Details', 'expect': [200],
+             'until': {'path': 'data.processing_status', 'in': ['completed', 'failed']},
+             'interval': 0.5, 'timeout': 30},
+            {'request': 'Get Invoice', 'expect': [200]},
+        ],
+    },
+    'receipt-pipeline': {
+        'description': 'Upload a receipt, run it through the n8n webhooks and read it back',
+        'steps': [
+            {'request': 'Upload Document', 'vars': {'document_type': 'receipt'},
+             'upload': {'file': 'receipt.pdf'}, 'expect': [201]},
+            {'request': 'Document Uploaded Webhook', 'expect': [200]},
+            {'request': 'Receipt Processed Webhook', 'expect': [200],
+             'capture': {'receiptId': 'data.receipt_id'}},
+            {'request': 'Get Document Details', 'expect': [200],
+             'until': {'path': 'data.processing_status', 'in': ['completed', 'failed']},
+             'interval': 0.5, 'timeout': 30},
+            {'request': 'Get Receipt', 'expect': [200]},
+        ],
+    },
+    'dashboard': {
+        'description': 'Log in and load the dashboard and statistics pages',
+        'steps': [
+            {'request': 'Get Dashboard Overview', 'expect': [200]},
+            {'request': 'Get Invoice Statistics', 'expect': [200]},
+            {'request': 'List Invoices', 'expect': [200]},
+        ],
+    },
+}
+
+
+class StepFailed(Exception):
+    """A scenario step did not produce the expected response"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def extract(data, path):
+    """Follow a dotted path (`data.items.0.id` or `data.items[0].id`) into JSON"""
+    for part in path.replace('[', '.').replace(']', '').split('.'):
+        if not part:
+            continue
+        if isinstance(data, list):
+            data = data[int(part)]
+        elif isinstance(data, dict):
+            data = data[part]
+        else:
+            raise KeyError(path)
+    return data
+
+
+def script_captures(item):
+    """Read the variables a request's Postman test script stores"""
+    captures = {}
+    for event in item.get('event', []):
+        if event.get('listen') != 'test':
+            continue
+        for line in event.get('script', {}).get('exec', []):
+            for name, path in CAPTURE_PATTERN.findall(line):
+                captures[name] = path
+    return captures
+
+
+def token_expiry(token):
+    """Return the `exp` claim of a JWT without verifying it, or None"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+class TokenCache:
+    """Shared, single-flight JWT cache keyed by account email"""
+
+    def __init__(self, client, collection, variables, refresh_margin=60.0):
+        self.client = client
+        self.collection = collection
+        self.variables = variables
+        self.refresh_margin = refresh_margin
+        self.logins = 0
+        self.refreshes = 0
+        self.hits = 0
+        self._tokens = {}
+        self._pending = {}
+
+    def _spec(self, name, body):
+        folder, item = find_item(self.collection, name)
+        spec = RequestSpec.from_item(item, folder, self.variables)
+        spec.body = json.dumps(body).encode('utf-8')
+        return spec
+
+    async def _post(self, spec):
+        response = await self.client.request(spec.method, spec.url, spec.headers, spec.body)
+        if response.status != 200:
+            raise StepFailed(f'{spec.name} returned {response.status}', response.status)
+        data = response.json()['data']
+        return data['accessToken'], data.get('refreshToken')
+
+    async def _fetch(self, account, cached):
+        if cached and cached[1]:
+            try:
+                tokens = await self._post(self._spec('Refresh Token', {'refreshToken': cached[1]}))
+                self.refreshes += 1
+                return tokens
+            except (StepFailed, KeyError, ValueError):
+                pass
+        email, password = account
+        tokens = await self._post(self._spec('Login', {'email': email, 'password': password}))
+        self.logins += 1
+        return tokens
+
+    def _fresh(self, tokens):
+        expiry = token_expiry(tokens[0])
+        return expiry is None or expiry - time.time() > self.refresh_margin
+
+    async def token(self, account):
+        """Return a valid access token for `account`, logging in at most once"""
+        email = account[0]
+        cached = self._tokens.get(email)
+        if cached and cached[0] and self._fresh(cached):
+            self.hits += 1
+            return cached[0]
+
+        pending = self._pending.get(email)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(account, cached))
+            self._pending[email] = pending
+            try:
+                self._tokens[email] = await pending
+            finally:
+                del self._pending[email]
+            return self._tokens[email][0]
+
+        token = (await asyncio.shield(pending))[0]
+        self.hits += 1
+        return token
+
+    def invalidate(self, account, token):
+        """Drop a token the API rejected, unless it was already replaced"""
+        cached = self._tokens.get(account[0])
+        if cached and cached[0] == token:
+            self._tokens[account[0]] = (None, cached[1])
+
+
+class ScenarioRunner:
+    """Run a scenario for `users` virtual users and time each step"""
+
+    def __init__(self, collection, scenario, accounts, users=10, duration=None,
+                 iterations=1, variables=None, think_time=0.0, timeout=30.0, seed=None,
+                 cache_size=4096, validator=None, phases=None):
+        self.collection = collection
+        self.scenario = scenario
+        self.accounts = accounts
+        self.users = users
+        self.duration = duration
+        self.iterations = iterations
+        self.think_time = think_time
+        self.timeout = timeout
+        self.seed = seed
+        self.variables = collection_variables(collection)
+        self.variables.update(variables or {})
+        self.auth = collection.get('auth')
+        self.validator = validator
+        self.phases = phases
+        self.operations = {}
+
+        self.steps = []
+        for index, step in enumerate(scenario['steps']):
+            folder, item = find_item(collection, step['request'])
+            captures = script_captures(item)
+            captures.update(step.get('capture', {}))
+            label = f"{index + 1}. {item['name']}"
+            self.steps.append((label, self._compile(folder, item, step), captures, step))
+            if validator is not None:
+                self.operations[label] = validator.operation(item['request'].get('method', 'GET'), request_path(item))
+
+        self.requests = RequestCache(cache_size)
+        self.step_stats = {label: RequestStats(label) for label, *_ in self.steps}
+        self.end_to_end = LatencyHistogram()
+        self.completed = 0
+        self.failed = {}
+        self.elapsed = 0.0
+        self.token_cache = None
+        self.cpu = None
+
+    def _compile(self, folder, item, step):
+        files = None
+        if 'upload' in step:
+            files = {field: (filename, SAMPLE_PDF) for field, filename in step['upload'].items()}
+        # Form fields in the collection are literals; let steps override them
+        return RequestTemplate(item, folder, self.auth, files, form_values=step.get('vars'))
+
+    async def _run_step(self, client, variables, label, template, captures, step):
+        stats = self.step_stats[label]
+        until = step.get('until')
+        deadline = time.perf_counter() + step.get('timeout', self.timeout)
+        start = time.perf_counter()
+        while True:
+            _, prepared = self.requests.get(template, variables)
+            sent = time.perf_counter()
+            try:
+                response = await client.send(prepared)
+            except Exception as error:
+                stats.record_error(error)
+                raise StepFailed(f'{label}: {type(error).__name__}')
+            if self.phases is not None:
+                self.phases.record(label, response)
+            if until is None:
+                stats.record(time.perf_counter() - sent, response.status)
+            expected = step.get('expect')
+            if expected and response.status not in expected:
+                if until is not None:
+                    # Polls are only recorded once they finish; a failed poll ends the wait
+                    stats.record(time.perf_counter() - start, response.status)
+                raise StepFailed(f'{label}: HTTP {response.status}', response.status)
+
+            try:
+                body = response.json() if response.body else None
+            except ValueError:
+                body = None
+            if self.validator is not None:
+                self.validator.validate(label, self.operations[label], response, body)
+            if until is None:
+                break
+            try:
+                value = extract(body, until['path'])
+            except (KeyError, IndexError, TypeError, ValueError):
+                value = None
+            if value in until['in']:
+                # For polling steps the latency is the whole wait, not one poll
+                stats.record(time.perf_counter() - start, response.status)
+                break
+            if time.perf_counter() >= deadline:
+                stats.record_error(asyncio.TimeoutError())
+                raise StepFailed(f'{label}: timed out waiting for {until["path"]}')
+            await asyncio.sleep(step.get('interval', 0.5))
+
+        for name, path in captures.items():
+            try:
+                variables[name] = extract(body, path)
+            except (KeyError, IndexError, TypeError, ValueError):
+                raise StepFailed(f'{label}: response has no {path}')
+        return response
+
+    async def _iteration(self, client, variables, account):
+        token = await self.token_cache.token(account)
+        variables['accessToken'] = token
+        start = time.perf_counter()
+        try:
+            for label, template, captures, step in self.steps:
+                await self._run_step(client, variables, label, template, captures, step)
+        except StepFailed as failure:
+            if failure.status == 401:
+                self.token_cache.invalidate(account, token)
+            reason = str(failure)
+            self.failed[reason] = self.failed.get(reason, 0) + 1
+            return
+        self.end_to_end.record_seconds(time.perf_counter() - start)
+        self.completed += 1
+
+    async def _user(self, client, user_id, deadline):
+        rng = random.Random(None if self.seed is None else self.seed + user_id)
+        account = self.accounts[user_id % len(self.accounts)]
+        iteration = 0
+        while self.iterations is None or iteration < self.iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            try:
+                await self._iteration(client, dict(self.variables), account)
+            except (StepFailed, KeyError, ValueError, OSError, asyncio.TimeoutError) as error:
+                # Login itself failed; count it and let the user retry
+                reason = f'login: {error}'
+                self.failed[reason] = self.failed.get(reason, 0) + 1
+            iteration += 1
+            if self.think_time:
+                await asyncio.sleep(rng.expovariate(1 / self.think_time))
+
+    async def run(self):
+        client = HTTPClient(limit_per_host=self.users, timeout=self.timeout)
+        self.token_cache = TokenCache(client, self.collection, self.variables)
+        meter = CpuMeter()
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        try:
+            await asyncio.gather(*(
+                self._user(client, user_id, deadline) for user_id in range(self.users)
+            ))
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.cpu = meter.summary(self.requests.hits + self.requests.misses + self.token_cache.logins
+                                     + self.token_cache.refreshes)
+            await client.close()
+        return self.report()
+
+    def end_to_end_stats(self):
+        stats = RequestStats('End-to-end')
+        stats.latency = self.end_to_end
+        return stats
+
+    def report(self):
+        rows = [stats.summary(self.elapsed) for stats in self.step_stats.values()]
+        e2e_row = self.end_to_end_stats().summary(self.elapsed)
+        e2e_row['failures'] = sum(self.failed.values())
+        return {
+            'scenario': self.scenario.get('name'),
+            'users': self.users,
+            'elapsed_s': self.elapsed,
+            'completed': self.completed,
+            'failed': dict(self.failed),
+            'steps': rows,
+            'end_to_end': e2e_row,
+            'tokens': {
+                'logins': self.token_cache.logins,
+                'refreshes': self.token_cache.refreshes,
+                'cache_hits': self.token_cache.hits,
+            },
+            'request_cache': self.requests.summary(),
+            'client_cpu': self.cpu,
+            'validation': self.validator.summary() if self.validator is not None else None,
+        }
+
+
+def load_scenario(name_or_path):
+    """Return a built-in scenario by name, or load one from a JSON file"""
+    if name_or_path in SCENARIOS:
+        return dict(SCENARIOS[name_or_path], name=name_or_path)
+    with open(name_or_path, 'r') as f:
+        scenario = json.load(f)
+    scenario.setdefault('name', name_or_path)
+    return scenario
+
+
+def load_accounts(args, collection):
+    """Accounts from --account/--accounts, defaulting to the Login request body"""
+    accounts = []
+    for value in args.account:
+        email, sep, password = value.partition(':')
+        if not sep:
+            raise ValueError(f'Expected email:password, got {value!r}')
+        accounts.append((email, password))
+    if args.accounts_file:
+        with open(args.accounts_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    email, _, password = line.partition(',')
+                    accounts.append((email.strip(), password.strip()))
+    if not accounts:
+        _, item = find_item(collection, 'Login')
+        body = json.loads(item['request']['body']['raw'])
+        accounts.append((body['email'], body['password']))
+    return accounts
+
+
+def add_arguments(parser):
+    parser.add_argument('scenario', help=f"Built-in scenario ({', '.join(SCENARIOS)}) or a JSON file")
+    parser.add_argument('--base-url', help='Override the {{baseUrl}} collection variable')
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE',
+                        help='Set a collection variable (repeatable)')
+    parser.add_argument('--account', action='append', default=[], metavar='EMAIL:PASSWORD',
+                        help='Account to log in with (repeatable; users are spread across accounts)')
+    parser.add_argument('--accounts-file', help='CSV file of email,password lines')
+    parser.add_argument('-u', '--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('-d', '--duration', type=float, help='Run for this many seconds')
+    parser.add_argument('-n', '--iterations', type=int,
+                        help='Scenario runs per user (default when no duration: 1)')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='Mean pause between scenario runs per user, in seconds')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, help='Seed for think-time jitter')
+    parser.add_argument('--request-cache', type=int, default=4096, metavar='N',
+                        help='Rendered requests kept for reuse (default: 4096, 0 disables)')
+    add_validate_argument(parser)
+    add_phase_arguments(parser)
+    parser.add_argument('--json', dest='json_output', help='Also write the report to this file')
+    add_save_arguments(parser)
+
+
+STEP_COLUMNS = [
+    ('Step', 'name', '{}'),
+    ('Count', 'requests', '{}'),
+    ('Fail', 'failures', '{}'),
+    ('p50 ms', 'p50_ms', '{:.2f}'),
+    ('p95 ms', 'p95_ms', '{:.2f}'),
+    ('p99 ms', 'p99_ms', '{:.2f}'),
+    ('Max ms', 'max_ms', '{:.2f}'),
+]
+
+
+def print_report(report):
+    print(format_table(report['steps'] + [report['end_to_end']], STEP_COLUMNS))
+    print()
+    for reason, n in sorted(report['failed'].items(), key=lambda kv: -kv[1]):
+        print(f'⚠️  {reason} x{n}')
+    tokens = report['tokens']
+    print(f"🔑 {tokens['logins']} logins, {tokens['refreshes']} refreshes, "
+          f"{tokens['cache_hits']} cached token uses")
+    cache = report['request_cache']
+    print(f"💾 Request cache: {cache['hit_rate']:.1%} hits ({cache['size']}/{cache['maxsize']} entries, "
+          f"{cache['evictions']} evicted), {cache['build_us_per_request']:.1f}µs per request to look up or build")
+    print(f"📊 {report['completed']} scenarios completed in {report['elapsed_s']:.2f}s "
+          f"by {report['users']} users")
+    for line in describe_cpu(report['client_cpu']):
+        print(line)
+    if report['validation']:
+        print_validation(report['validation'])
+
+
+def run(args):
+    collection = load_collection(args.collection)
+    scenario = load_scenario(args.scenario)
+    variables = parse_variables(args.var)
+    if args.base_url:
+        variables['baseUrl'] = args.base_url.rstrip('/')
+    iterations = args.iterations
+    if args.duration is None and iterations is None:
+        iterations = 1
+    try:
+        validator = validator_from_args(args)
+    except ValueError as error:
+        print(f'❌ {error}')
+        return 1
+    runner = ScenarioRunner(
+        collection,
+        scenario,
+        load_accounts(args, collection),
+        users=args.users,
+        duration=args.duration,
+        iterations=iterations,
+        variables=variables,
+        think_time=args.think_time,
+        timeout=args.timeout,
+        seed=args.seed,
+        cache_size=args.request_cache,
+        validator=validator,
+        phases=recorder_from_args(args, f"run:{scenario['name']}"),
+    )
+    print(f"🚀 Running scenario '{scenario['name']}' ({len(runner.steps)} steps) with {args.users} virtual users...")
+    report = asyncio.run(runner.run())
+    print_report(report)
+    finish_from_args(args, runner.phases)
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(report, f, indent=2)
+    save_from_args(args, f"run:{scenario['name']}", [*runner.step_stats.values(), runner.end_to_end_stats()], report)
+    invalid = validator is not None and validator.invalid
+    return 0 if not report['failed'] and not invalid else 1
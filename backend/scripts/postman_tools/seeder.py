@@ -0,0 +1,757 @@
+"""
+Bulk seeding of users, job postings, documents and their typed rows.
+
+The dataset is generated from one seed, so every run with the same options
+produces the same rows, and it is shaped like production data rather than
+like a uniform sample:
+
+* business dates grow over the range (the last day sees about three times
+  the volume of the first) and weekends are thinner than weekdays;
+* document ownership is Zipf-like, so a few heavy tenants hold most
+  documents and pagination/aggregation is tested at their scale;
+* the type mix is 40% invoices, 35% receipts, 15% resumes, 10% contracts,
+  a few percent of documents are still pending, and invoice payment status
+  follows from the due date (mostly paid or overdue once it has passed).
+
+Typed rows are derived from the same payloads `webhooks generate` produces,
+mapped the way src/controllers/webhookController.js maps them, so seeded
+rows are indistinguishable from ones that went through n8n.
+
+`seed sql` streams the rows to one COPY (or batched INSERT) file per table
+plus a load.sql that loads them in one transaction; rows are never held in
+memory, so millions of documents cost disk, not RAM. `seed api` creates the
+same data through the API (register, upload, the typed webhook and an
+invoice status update per document) over pooled keep-alive connections with
+a bounded number of documents in flight. The API has no bulk endpoints, so
+that path is limited by per-request cost and the rate limiters (start the
+server with NODE_ENV=test); use it for thousands of documents and the SQL
+files for millions.
+
+Both modes write documents.txt (`type,id` lines for `webhooks bench
+--documents`) and set the userId/documentId/invoiceId/... collection
+variables to the heaviest tenant's rows. The first user's tokens are never
+written to the tracked collection; `seed api` puts them in environment.json
+in the output directory instead.
+"""
+
+import asyncio
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from .api import failure_reason
+from .client import HTTPClient
+from .collection import _encode_multipart, check_resolved, load_collection, resolve_variables
+from .loadgen import SUMMARY_COLUMNS
+from .merge import serialize, write_atomic
+from .payloads import (
+    FIRST_NAMES, LAST_NAMES, LOCATIONS, POSITIONS, SOFT_SKILLS, TECHNICAL_SKILLS, TOOLS, PayloadFactory,
+)
+from .scenario import SAMPLE_PDF
+from .stats import RequestStats, format_table
+from .webhooks import signature_headers
+
+# Tables in foreign-key order, with the columns the seeder writes
+TABLES = {
+    'users': ('id', 'email', 'password_hash', 'full_name', 'role', 'created_at', 'updated_at'),
+    'job_postings': ('id', 'title', 'description', 'required_skills', 'preferred_skills',
+                     'experience_required', 'location', 'status', 'created_at', 'updated_at'),
+    'documents': ('id', 'user_id', 'document_type', 'original_filename', 'file_path', 'file_size',
+                  'mime_type', 'upload_date', 'processing_status', 'processed_at', 'created_at', 'updated_at'),
+    'invoices': ('id', 'document_id', 'user_id', 'invoice_number', 'invoice_date', 'due_date', 'vendor_name',
+                 'line_items', 'tax', 'total_amount', 'currency', 'validation_status', 'validation_errors',
+                 'confidence_score', 'status', 'created_at', 'updated_at'),
+    'receipts': ('id', 'document_id', 'user_id', 'merchant_name', 'purchase_date', 'items', 'tax',
+                 'total_amount', 'currency', 'payment_method', 'expense_category', 'is_business_expense',
+                 'created_at', 'updated_at'),
+    'contracts': ('id', 'document_id', 'user_id', 'contract_title', 'contract_type', 'contract_value', 'currency',
+                  'parties', 'effective_date', 'expiration_date', 'auto_renewal', 'payment_terms',
+                  'key_obligations', 'governing_law', 'risk_score', 'red_flags', 'requires_legal_review',
+                  'created_at', 'updated_at'),
+    'resumes': ('id', 'document_id', 'user_id', 'candidate_name', 'email', 'phone', 'location',
+                'professional_summary', 'experience', 'education', 'skills', 'total_years_experience',
+                'current_position', 'confidence_score', 'created_at', 'updated_at'),
+}
+
+# Document type -> (share of documents, typed table, webhook, collection variable, webhook response id)
+DOCUMENT_MIX = {
+    'invoice': (0.40, 'invoices', 'invoice-processed', 'invoiceId', 'invoice_id'),
+    'receipt': (0.35, 'receipts', 'receipt-processed', 'receiptId', 'receipt_id'),
+    'resume': (0.15, 'resumes', 'resume-processed', 'resumeId', 'resume_id'),
+    'contract': (0.10, 'contracts', 'contract-analyzed', 'contractId', 'contract_id'),
+}
+
+# Model defaults for the columns of an upload stub that no webhook has filled in
+STUB_DEFAULTS = {
+    'invoices': {'line_items': [], 'currency': 'USD', 'validation_errors': [], 'status': 'pending'},
+    'receipts': {'items': [], 'currency': 'USD', 'is_business_expense': False},
+    'contracts': {'parties': [], 'auto_renewal': False, 'payment_terms': {}, 'key_obligations': [],
+                  'red_flags': [], 'requires_legal_review': False},
+    'resumes': {'experience': [], 'education': [], 'skills': {'technical': [], 'soft_skills': [], 'tools': []}},
+}
+
+# Invoice status once the due date has passed, and while it is still open
+PAST_DUE_STATUSES = [('paid', 0.8), ('overdue', 0.15), ('cancelled', 0.05)]
+OPEN_STATUSES = [('pending', 0.85), ('paid', 0.15)]
+
+PENDING_PASSWORD = '!seed'  # not a bcrypt hash: replaced by load.sql, never matches a login
+DEFAULT_PASSWORD = 'Seed-Passw0rd!'
+ENVIRONMENT_FILE = 'environment.json'  # untracked home of the seeded user's tokens
+
+TABLE_COLUMNS = [
+    ('Table', 'table', '{}'),
+    ('Rows', 'rows', '{}'),
+    ('Rows/s', 'rows_per_s', '{:.0f}'),
+    ('MB', 'mb', '{:.1f}'),
+    ('File', 'file', '{}'),
+]
+
+
+def _weighted(rng, choices):
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def _parse_timestamp(text):
+    return datetime.strptime(text, '%Y-%m-%dT%H:%M:%S.000Z').replace(tzinfo=timezone.utc)
+
+
+def processed_columns(document_type, payload):
+    """Typed-row columns a processed webhook sets, as webhookController.js maps them"""
+    data = payload['processed_data']
+    validation = payload['validation']
+    if document_type == 'invoice':
+        return {
+            'invoice_number': data['invoice_number'],
+            'invoice_date': data['issue_date'],
+            'due_date': data['due_date'],
+            'vendor_name': data['vendor_name'],
+            'line_items': data['line_items'],
+            'tax': data['tax_amount'],
+            'total_amount': data['total_amount'],
+            'currency': data['currency'],
+            'validation_status': data['status'],
+            'validation_errors': validation.get('errors', []),
+            'confidence_score': validation['confidence_score'],
+        }
+    if document_type == 'receipt':
+        return {
+            'merchant_name': data['merchant_name'],
+            'purchase_date': data['purchase_date'],
+            'items': data['items'],
+            'tax': data['tax_amount'],
+            'total_amount': data['total_amount'],
+            'currency': data['currency'],
+            'payment_method': data['payment_method'],
+            'expense_category': data['category'],
+            'is_business_expense': data['is_business_expense'],
+        }
+    if document_type == 'contract':
+        return {
+            'contract_title': data['contract_title'],
+            'contract_type': data['contract_type'],
+            'contract_value': data['contract_value'],
+            'currency': data['currency'],
+            'parties': data['parties'],
+            'effective_date': data['start_date'],
+            'expiration_date': data['end_date'],
+            'auto_renewal': data['auto_renewal'],
+            'payment_terms': data['payment_terms'],
+            'key_obligations': data['obligations'],
+            'governing_law': data['governing_law'],
+            'risk_score': data['risk_score'],
+            'red_flags': data['red_flags'],
+            'requires_legal_review': data['requires_legal_review'],
+        }
+    return {
+        'candidate_name': data['candidate_name'],
+        'email': data['email'],
+        'phone': data['phone'],
+        'location': data['location'],
+        'professional_summary': data['summary'],
+        'experience': data['experience'],
+        'education': data['education'],
+        'skills': data['skills'],
+        'total_years_experience': data['years_of_experience'],
+        'current_position': data['current_position'],
+        'confidence_score': validation['confidence_score'],
+    }
+
+
+class SeedFactory(PayloadFactory):
+    """PayloadFactory whose business dates grow over the range and thin out at weekends"""
+
+    GROWTH = 2.0  # density rises linearly to 1 + GROWTH times the first day's
+    WEEKEND_SHARE = 0.3  # a weekend day keeps this share of a weekday's volume
+
+    def _date(self, offset=0):
+        rng = self.rng
+        g = self.GROWTH
+        while True:
+            # Inverse CDF of a density proportional to 1 + g*x on [0, 1)
+            x = (math.sqrt(1 + g * (2 + g) * rng.random()) - 1) / g
+            day = self.start + timedelta(days=min(int(x * self.days), self.days - 1) + offset)
+            if day.weekday() < 5 or rng.random() < self.WEEKEND_SHARE:
+                return day
+
+
+class SeedDocument:
+    """One generated document: its upload, processing outcome and payload"""
+
+    __slots__ = ('n', 'id', 'typed_id', 'owner', 'document_type', 'filename', 'file_size',
+                 'uploaded_at', 'processed_at', 'payload', 'invoice_status')
+
+    def __init__(self, n, document_id, typed_id, owner, document_type, filename, file_size,
+                 uploaded_at, processed_at, payload, invoice_status):
+        self.n = n
+        self.id = document_id
+        self.typed_id = typed_id
+        self.owner = owner
+        self.document_type = document_type
+        self.filename = filename
+        self.file_size = file_size
+        self.uploaded_at = uploaded_at
+        self.processed_at = processed_at
+        self.payload = payload
+        self.invoice_status = invoice_status
+
+    @property
+    def processing_status(self):
+        if self.payload is None:
+            return 'pending'
+        valid = self.payload['validation']['status'] in ('valid', 'needs_review')
+        return 'completed' if valid else 'failed'
+
+
+class Dataset:
+    """Seeded users, job postings and documents, generated lazily"""
+
+    def __init__(self, seed=0, users=100, documents=10000, jobs=50, start=date(2025, 1, 1), days=365,
+                 pending=0.03, skew=1.1):
+        self.seed = seed
+        self.users = users
+        self.documents = documents
+        self.jobs = jobs
+        self.start = start
+        self.days = days
+        self.pending = pending
+        self.factory = SeedFactory(seed, start, days)
+        self.rng = self.factory.rng
+        # Ids come from their own stream so SQL and API runs draw identical payloads
+        self.ids = random.Random(f'{seed}:ids')
+        self.end = start + timedelta(days=days)
+        self.owner_weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(users)))
+        self.types = list(DOCUMENT_MIX)
+        self.type_weights = list(itertools.accumulate(DOCUMENT_MIX[t][0] for t in self.types))
+
+    def _id(self):
+        return str(uuid.UUID(int=self.ids.getrandbits(128), version=4))
+
+    def _moment(self, day):
+        return datetime.combine(day, datetime.min.time(), timezone.utc) + timedelta(
+            seconds=self.rng.randrange(8 * 3600, 19 * 3600))
+
+    def user_rows(self):
+        """Users ordered heaviest tenant first (user 0 owns the most documents)"""
+        rng = self.rng
+        for n in range(self.users):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            joined = self._moment(self.start - timedelta(days=rng.randrange(1, 90)))
+            yield {
+                'id': self._id(),
+                'email': f'{first.lower()}.{last.lower()}.s{self.seed}u{n}@example.com',
+                'password_hash': PENDING_PASSWORD,
+                'full_name': f'{first} {last}',
+                'role': 'admin' if n == 0 else 'user',
+                'created_at': joined,
+                'updated_at': joined,
+            }
+
+    def job_rows(self):
+        rng = self.rng
+        for _ in range(self.jobs):
+            position = rng.choice(POSITIONS)
+            required = rng.sample(TECHNICAL_SKILLS, rng.randint(2, 5))
+            posted = self._moment(self.factory._date())
+            yield {
+                'id': self._id(),
+                'title': position,
+                'description': (f'We are hiring a {position} to work with {", ".join(required)}. '
+                                f'{rng.choice(SOFT_SKILLS)} and {rng.choice(SOFT_SKILLS).lower()} matter here.'),
+                'required_skills': required,
+                'preferred_skills': rng.sample(TOOLS, rng.randint(1, 3)),
+                'experience_required': f'{rng.choice([0, 1, 2, 3, 5, 8])}+ years',
+                'location': rng.choice(LOCATIONS),
+                'status': 'open' if rng.random() < 0.8 else 'closed',
+                'created_at': posted,
+                'updated_at': posted,
+            }
+
+    def _invoice_status(self, payload):
+        due = date.fromisoformat(payload['processed_data']['due_date'])
+        return _weighted(self.rng, PAST_DUE_STATUSES if due < self.end else OPEN_STATUSES)
+
+    def document_stream(self):
+        """Yield SeedDocuments one at a time"""
+        rng = self.rng
+        total_owner = self.owner_weights[-1]
+        for n in range(self.documents):
+            owner = min(bisect.bisect(self.owner_weights, rng.random() * total_owner), self.users - 1)
+            document_type = self.types[bisect.bisect(self.type_weights, rng.random() * self.type_weights[-1])]
+            document_id, typed_id = self._id(), self._id()
+            webhook = DOCUMENT_MIX[document_type][2]
+            payload = self.factory.payload(webhook, document_id)
+            # Uploaded within a day or so of the business date, processed seconds to minutes later
+            uploaded = _parse_timestamp(payload['timestamp']) + timedelta(
+                seconds=int(rng.expovariate(1 / 43200)))
+            processed = uploaded + timedelta(seconds=rng.randint(5, 300))
+            if rng.random() < self.pending:
+                payload = processed = None
+            invoice_status = 'pending'
+            if document_type == 'invoice' and payload is not None:
+                invoice_status = self._invoice_status(payload)
+            file_size = int(min(max(rng.lognormvariate(math.log(180_000), 0.8), 8_000), 10_000_000))
+            yield SeedDocument(n, document_id, typed_id, owner, document_type,
+                               f'{document_type}-{n:07d}.pdf', file_size, uploaded, processed,
+                               payload, invoice_status)
+
+    def document_rows(self, document, user_id):
+        """(documents row, typed table, typed row) for a SeedDocument"""
+        uploaded = document.uploaded_at
+        updated = document.processed_at or uploaded
+        row = {
+            'id': document.id,
+            'user_id': user_id,
+            'document_type': document.document_type,
+            'original_filename': document.filename,
+            'file_path': f'uploads/seed/{document.id}.pdf',
+            'file_size': document.file_size,
+            'mime_type': 'application/pdf',
+            'upload_date': uploaded,
+            'processing_status': document.processing_status,
+            'processed_at': document.processed_at,
+            'created_at': uploaded,
+            'updated_at': updated,
+        }
+        table = DOCUMENT_MIX[document.document_type][1]
+        typed = dict(STUB_DEFAULTS[table])
+        if document.payload is not None:
+            typed.update(processed_columns(document.document_type, document.payload))
+        if table == 'invoices':
+            typed['status'] = document.invoice_status
+        typed.update({'id': document.typed_id, 'document_id': document.id, 'user_id': user_id,
+                      'created_at': uploaded, 'updated_at': updated})
+        return row, table, typed
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S+00')
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, separators=(',', ':'))
+    elif not isinstance(value, str):
+        return str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _sql_value(value):
+    if value is None:
+        return 'NULL'
+    if value is True or value is False:
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime):
+        value = value.strftime('%Y-%m-%d %H:%M:%S+00')
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, separators=(',', ':'))
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class TableWriter:
+    """Stream one table's rows to a COPY block or batched multi-row INSERTs"""
+
+    def __init__(self, directory, position, table, fmt='copy', batch=1000):
+        self.table = table
+        self.columns = TABLES[table]
+        self.fmt = fmt
+        self.batch = batch
+        self.filename = f'{position:02d}_{table}.sql'
+        self.path = os.path.join(directory, self.filename)
+        self.file = open(self.path + '.tmp', 'w', encoding='utf-8', buffering=1 << 20)
+        self.rows = 0
+        self.pending = []
+        self.head = f'INSERT INTO {table} ({", ".join(self.columns)}) VALUES\n'
+        if fmt == 'copy':
+            self.file.write(f'COPY {table} ({", ".join(self.columns)}) FROM stdin;\n')
+
+    def write(self, row):
+        self.rows += 1
+        values = [row.get(column) for column in self.columns]
+        if self.fmt == 'copy':
+            self.file.write('\t'.join([_copy_value(v) for v in values]) + '\n')
+            return
+        self.pending.append('(' + ', '.join([_sql_value(v) for v in values]) + ')')
+        if len(self.pending) >= self.batch:
+            self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.file.write(self.head + ',\n'.join(self.pending) + ';\n')
+            self.pending = []
+
+    def close(self):
+        if self.fmt == 'copy':
+            self.file.write('\\.\n')
+        else:
+            self._flush()
+        self.file.close()
+        os.replace(self.path + '.tmp', self.path)
+        return os.path.getsize(self.path)
+
+
+def write_load_script(directory, writers, password_from, seed):
+    """load.sql: every table file in one transaction, then the seeded users' password"""
+    lines = [
+        f'-- Generated by update-postman.py seed sql (seed {seed})',
+        f'-- Run from anywhere: psql "$DATABASE_URL" -f {os.path.join(directory, "load.sql")}',
+        '\\set ON_ERROR_STOP on',
+        'BEGIN;',
+    ]
+    lines.extend(f'\\ir {writer.filename}' for writer in writers)
+    lines.append(
+        'UPDATE users AS u SET password_hash = t.password_hash FROM users AS t '
+        f"WHERE t.email = {_sql_value(password_from)} AND u.password_hash = '{PENDING_PASSWORD}';"
+    )
+    lines.extend(['COMMIT;', 'ANALYZE;', ''])
+    with open(os.path.join(directory, 'load.sql'), 'w') as f:
+        f.write('\n'.join(lines))
+
+
+class SeedIds:
+    """documents.txt plus the heaviest tenant's ids for the collection variables"""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'documents.txt')
+        self.file = open(self.path + '.tmp', 'w')
+        self.variables = {}
+
+    def add(self, document, document_id, typed_id, heaviest):
+        self.file.write(f'{document.document_type},{document_id}\n')
+        if heaviest and typed_id:
+            self.variables.setdefault('documentId', document_id)
+            self.variables.setdefault(DOCUMENT_MIX[document.document_type][3], typed_id)
+
+    def close(self):
+        self.file.close()
+        os.replace(self.path + '.tmp', self.path)
+
+
+def seed_sql(dataset, directory, fmt='copy', batch=1000, password_from='john.doe@example.com'):
+    """Write the dataset as SQL files; returns the report"""
+    os.makedirs(directory, exist_ok=True)
+    writers = {table: TableWriter(directory, i + 1, table, fmt, batch) for i, table in enumerate(TABLES)}
+    ids = SeedIds(directory)
+    start = time.perf_counter()
+    try:
+        user_ids = []
+        for row in dataset.user_rows():
+            user_ids.append(row['id'])
+            writers['users'].write(row)
+        for row in dataset.job_rows():
+            ids.variables.setdefault('jobId', row['id'])
+            writers['job_postings'].write(row)
+        ids.variables['userId'] = user_ids[0]
+        documents = writers['documents']
+        for document in dataset.document_stream():
+            row, table, typed = dataset.document_rows(document, user_ids[document.owner])
+            documents.write(row)
+            writers[table].write(typed)
+            ids.add(document, document.id, document.typed_id, document.owner == 0)
+    finally:
+        sizes = {table: writer.close() for table, writer in writers.items()}
+        ids.close()
+    elapsed = time.perf_counter() - start
+    write_load_script(directory, writers.values(), password_from, dataset.seed)
+    tables = [{
+        'table': table,
+        'rows': writer.rows,
+        'rows_per_s': writer.rows / elapsed if elapsed else 0.0,
+        'mb': sizes[table] / 1e6,
+        'file': writer.filename,
+    } for table, writer in writers.items()]
+    rows = sum(t['rows'] for t in tables)
+    return {
+        'mode': 'sql',
+        'elapsed_s': elapsed,
+        'rows': rows,
+        'rows_per_s': rows / elapsed if elapsed else 0.0,
+        'documents_per_s': dataset.documents / elapsed if elapsed else 0.0,
+        'mb_written': sum(sizes.values()) / 1e6,
+        'tables': tables,
+        'variables': ids.variables,
+    }
+
+
+class SeedFailed(Exception):
+    """A request in a document's chain did not succeed"""
+
+
+class ApiSeeder:
+    """Create the dataset through the API with a bounded number of documents in flight"""
+
+    def __init__(self, dataset, base_url, directory, password=DEFAULT_PASSWORD, connections=20,
+                 max_in_flight=None, timeout=30.0, secret=None):
+        self.dataset = dataset
+        self.base_url = base_url.rstrip('/')
+        self.directory = directory
+        self.password = password
+        self.connections = connections
+        self.max_in_flight = max_in_flight or connections * 2
+        self.timeout = timeout
+        self.secret = secret
+        self.stats = {}
+        self.tokens = []
+        self.boundary = uuid.uuid4().hex
+        self.completed = 0
+        self.failed = {}
+        self.elapsed = 0.0
+        self.connects = 0
+
+    async def _call(self, client, name, method, path, body=None, token=None, content_type='application/json',
+                    expect=(200, 201)):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = RequestStats(name)
+        headers = [('Content-Type', content_type)]
+        if token:
+            headers.append(('Authorization', f'Bearer {token}'))
+        if body is not None and content_type == 'application/json':
+            body = json.dumps(body).encode('utf-8')
+            if self.secret and path.startswith('/api/webhooks/'):
+                headers.extend(signature_headers(body, self.secret))
+        began = time.perf_counter()
+        try:
+            response = await client.request(method, self.base_url + path, headers, body or b'')
+        except Exception as error:
+            stats.record_error(error)
+            raise SeedFailed(f'{name}: {type(error).__name__}')
+        stats.record(time.perf_counter() - began, response.status)
+        if response.status not in expect:
+            raise SeedFailed(f'{name}: {failure_reason(response)}')
+        return response
+
+    async def _account(self, client, user, slots):
+        async with slots:
+            body = {'email': user['email'], 'password': self.password, 'full_name': user['full_name']}
+            response = await self._call(client, 'register', 'POST', '/api/auth/register', body,
+                                        expect=(201, 409))
+            if response.status == 409:
+                body = {'email': user['email'], 'password': self.password}
+                response = await self._call(client, 'login', 'POST', '/api/auth/login', body)
+            return response.json()['data']
+
+    async def _document(self, client, document, ids, slots):
+        try:
+            token = self.tokens[document.owner]['accessToken']
+            body, content_type = _encode_multipart([
+                ('document_type', document.document_type.encode('utf-8'), None),
+                ('file', SAMPLE_PDF, document.filename),
+            ], self.boundary)
+            response = await self._call(client, 'upload', 'POST', '/api/upload', body, token, content_type,
+                                        expect=(201,))
+            document_id = response.json()['data']['document']['id']
+            typed_id = None
+            if document.payload is not None:
+                _, _, webhook, _, id_field = DOCUMENT_MIX[document.document_type]
+                payload = dict(document.payload, document_id=document_id)
+                response = await self._call(client, webhook, 'POST', f'/api/webhooks/{webhook}', payload)
+                typed_id = response.json()['data'][id_field]
+                if document.invoice_status != 'pending':
+                    await self._call(client, 'update-invoice', 'PUT', f'/api/invoices/{typed_id}',
+                                     {'status': document.invoice_status}, token)
+            ids.add(document, document_id, typed_id, document.owner == 0)
+            self.completed += 1
+        except SeedFailed as error:
+            reason = str(error)
+            self.failed[reason] = self.failed.get(reason, 0) + 1
+        finally:
+            slots.release()
+
+    async def run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        client = HTTPClient(limit_per_host=self.connections, timeout=self.timeout)
+        ids = SeedIds(self.directory)
+        start = time.perf_counter()
+        try:
+            account_slots = asyncio.Semaphore(self.connections)
+            users = list(self.dataset.user_rows())
+            self.tokens = await asyncio.gather(*[self._account(client, user, account_slots) for user in users])
+            ids.variables['userId'] = self.tokens[0]['user']['id']
+            for job in self.dataset.job_rows():
+                body = {key: job[key] for key in TABLES['job_postings'] if key not in ('id', 'created_at', 'updated_at')}
+                response = await self._call(client, 'create-job', 'POST', '/api/jobs', body,
+                                            self.tokens[0]['accessToken'])
+                ids.variables.setdefault('jobId', response.json()['data']['id'])
+
+            slots = asyncio.Semaphore(self.max_in_flight)
+            tasks = set()
+            for document in self.dataset.document_stream():
+                await slots.acquire()
+                task = asyncio.ensure_future(self._document(client, document, ids, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.connects = client.connects
+            await client.close()
+            ids.close()
+        # Live tokens stay out of the tracked collection: they go to an untracked environment file
+        write_environment(os.path.join(self.directory, ENVIRONMENT_FILE), {
+            'baseUrl': self.base_url,
+            'accessToken': self.tokens[0]['accessToken'],
+            'refreshToken': self.tokens[0]['refreshToken'],
+        })
+        return self.report(ids.variables)
+
+    def report(self, variables):
+        rows = [stats.summary(self.elapsed) for stats in self.stats.values()]
+        requests = sum(row['requests'] + sum(row['errors'].values()) for row in rows)
+        return {
+            'mode': 'api',
+            'elapsed_s': self.elapsed,
+            'documents': self.completed,
+            'documents_per_s': self.completed / self.elapsed if self.elapsed else 0.0,
+            'requests': requests,
+            'rps': requests / self.elapsed if self.elapsed else 0.0,
+            'connections_opened': self.connects,
+            'failed': self.failed,
+            'endpoints': rows,
+            'variables': variables,
+        }
+
+
+def write_environment(path, values):
+    """Write a Postman environment file holding `values`; tokens are marked secret"""
+    environment = {
+        'name': 'DocuFlow seed',
+        'values': [
+            {'key': key, 'value': value, 'type': 'secret' if key.endswith('Token') else 'default', 'enabled': True}
+            for key, value in values.items()
+        ],
+    }
+    write_atomic(path, json.dumps(environment, indent=2))
+
+
+def set_collection_variables(path, variables):
+    """Point the collection variables at seeded rows; returns the keys that changed"""
+    collection = load_collection(path)
+    changed = []
+    for variable in collection.get('variable', []):
+        value = variables.get(variable['key'])
+        if value is not None and variable.get('value') != value:
+            variable['value'] = value
+            changed.append(variable['key'])
+    if changed:
+        write_atomic(path, serialize(collection))
+    return changed
+
+
+def add_arguments(parser):
+    subparsers = parser.add_subparsers(dest='seed_command', required=True)
+
+    sql = subparsers.add_parser('sql', help='Write COPY/INSERT files and a load.sql for psql')
+    api = subparsers.add_parser('api', help='Create the data through register, upload and the webhooks')
+    for sub in (sql, api):
+        sub.add_argument('--users', type=int, default=100, help='Users to create (default: 100)')
+        sub.add_argument('-n', '--documents', type=int, default=10000,
+                         help='Documents to create, each with its typed row (default: 10000)')
+        sub.add_argument('--jobs', type=int, default=50, help='Job postings to create (default: 50)')
+        sub.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        sub.add_argument('--start-date', type=date.fromisoformat, default=date(2025, 1, 1),
+                         help='First business date (default: 2025-01-01)')
+        sub.add_argument('--days', type=int, default=365, help='Days of business dates (default: 365)')
+        sub.add_argument('--pending', type=float, default=0.03,
+                         help='Share of documents left unprocessed (default: 0.03)')
+        sub.add_argument('--skew', type=float, default=1.1,
+                         help='Zipf exponent of documents per user; 0 spreads them evenly (default: 1.1)')
+        sub.add_argument('-o', '--out', default='seed', help='Output directory (default: seed)')
+        sub.add_argument('--no-variables', dest='set_variables', action='store_false',
+                         help='Leave the collection variables alone')
+
+    sql.add_argument('--format', choices=['copy', 'insert'], default='copy',
+                     help='COPY ... FROM stdin blocks (default) or multi-row INSERTs')
+    sql.add_argument('--batch', type=int, default=1000, help='Rows per INSERT with --format insert')
+    sql.add_argument('--password-from', default='john.doe@example.com', metavar='EMAIL',
+                     help="load.sql gives seeded users this existing account's password")
+
+    api.add_argument('--base-url', help="API base URL (default: the collection's baseUrl)")
+    api.add_argument('--password', default=DEFAULT_PASSWORD, help='Password for the registered users')
+    api.add_argument('-c', '--connections', type=int, default=20, help='Pooled connections')
+    api.add_argument('--max-in-flight', type=int, help='Documents in flight (default: 2 per connection)')
+    api.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    api.add_argument('--secret', help='Sign webhook requests with this N8N_WEBHOOK_SECRET')
+
+
+def print_report(report):
+    if report['mode'] == 'sql':
+        print(format_table(report['tables'], TABLE_COLUMNS))
+        print()
+        print(f"📊 {report['rows']} rows in {report['elapsed_s']:.2f}s ({report['rows_per_s']:.0f} rows/s, "
+              f"{report['documents_per_s']:.0f} documents/s), {report['mb_written']:.1f} MB written")
+        return
+    print(format_table(report['endpoints'], SUMMARY_COLUMNS))
+    print()
+    print(f"📊 {report['documents']} documents in {report['elapsed_s']:.2f}s ({report['documents_per_s']:.1f} docs/s, "
+          f"{report['rps']:.1f} req/s) over {report['connections_opened']} connections")
+    for reason, n in report['failed'].items():
+        print(f'❌ {reason} x{n}')
+
+
+def run(args):
+    if args.seed_command == 'api':
+        try:
+            variables = resolve_variables(load_collection(args.collection), base_url=args.base_url)
+            args.base_url = check_resolved(variables.get('baseUrl', '{{baseUrl}}'), 'baseUrl')
+        except (OSError, ValueError) as error:
+            print(f'❌ {error}')
+            return 1
+    dataset = Dataset(args.seed, args.users, args.documents, args.jobs, args.start_date, args.days,
+                      args.pending, args.skew)
+    print(f'🚀 Seeding {args.users} users, {args.documents} documents and {args.jobs} job postings '
+          f'(seed {args.seed}) {"to " + args.out if args.seed_command == "sql" else "via " + args.base_url}')
+    if args.seed_command == 'sql':
+        report = seed_sql(dataset, args.out, args.format, args.batch, args.password_from)
+    else:
+        seeder = ApiSeeder(dataset, args.base_url, args.out, args.password, args.connections,
+                           args.max_in_flight, args.timeout, args.secret)
+        try:
+            report = asyncio.run(seeder.run())
+        except Exception as error:
+            print(f'❌ Seeding failed: {error}')
+            return 1
+    print_report(report)
+    print(f"💾 Document ids written to {os.path.join(args.out, 'documents.txt')}")
+    if args.seed_command == 'sql':
+        print(f"   Load with: psql \"$DATABASE_URL\" -f {os.path.join(args.out, 'load.sql')}")
+    else:
+        print(f"🔑 Tokens of the first seeded user written to {os.path.join(args.out, ENVIRONMENT_FILE)} "
+              f"(a Postman environment; keep it out of git)")
+    if args.set_variables:
+        changed = set_collection_variables(args.collection, report['variables'])
+        if changed:
+            print(f"🔑 Set {', '.join(changed)} in {args.collection}")
+    return 1 if report.get('failed') else 0
@@ -0,0 +1,498 @@
+"""
+Soak testing: a fixed request mix for hours, watched for slow drift.
+
+Slow failures (a Sequelize pool that leaks a connection now and then, an
+uploads directory that keeps growing, a cache that never evicts) look fine in
+a one-minute burst. `soak` runs the same workload as `load` until --duration
+or Ctrl-C and cuts the run into tumbling windows (--window seconds). Memory
+stays bounded however long it runs: every window keeps one histogram per
+request, only the last --rolling windows are kept for the rolling
+percentiles, and the trend tests keep one number per series per window.
+
+After --warmup windows, the next --baseline windows form the baseline. Each
+later window is checked for two kinds of drift:
+
+* step: the p99 of a request in each of the last --rolling windows against
+  its p99 in each baseline window, with the per-run test `compare` uses
+  (every window is one run), and the rolling error rate against the
+  baseline's with a two-proportion z-test;
+* trend: a one-sided Mann-Kendall test over every window's p99, error rate
+  and, when watched, client RSS, API process RSS and the uploads directory
+  size, with the least-squares slope per hour as the size of the trend.
+
+A step is only counted for a window when the newest window on its own is
+also past --threshold, and it has to hold for --confirm consecutive windows
+before it is reported. One noisy window stays in the rolling set for
+--rolling windows, so without the first condition it alone could look like
+a step that held, and one noisy window out of hundreds would fail an
+eight-hour run.
+
+Every closed window is appended to windows.jsonl and fsynced, and
+summary.json is replaced atomically, so a run that dies at hour six keeps
+its first six hours.
+"""
+
+import asyncio
+import json
+import math
+import os
+import signal
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from .loadgen import LoadRunner, add_workload_arguments, print_report, select_specs
+from .merge import write_atomic
+from .results import add_save_arguments, compare, runs_needed, save_from_args
+from .stats import LatencyHistogram, RequestStats, format_table
+from .validation import add_validate_argument, print_validation, validator_from_args
+
+OVERALL = 'all requests'
+MIN_WINDOW_SAMPLES = 20  # fewer requests than this in a window: no p99 point for that request
+MIN_TREND_POINTS = 8
+SAMPLE_SERIES = {'client_rss_mb': 'client RSS', 'server_rss_mb': 'API RSS', 'watch_dir_mb': 'watched dir'}
+
+TREND_COLUMNS = [
+    ('Series', 'series', '{}'),
+    ('Windows', 'points', '{}'),
+    ('First', 'first', '{}'),
+    ('Last', 'last', '{}'),
+    ('Slope/h', 'slope_per_hour', '{}'),
+    ('Trend p', 'trend_p', '{:.2g}'),
+    ('Verdict', 'verdict', '{}'),
+]
+
+
+def _rss_mb(pid='self'):
+    """Resident set size of a process in MB from /proc, or None where unavailable"""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _directory_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total / 1e6
+
+
+def proportion_test(base_failures, base_total, new_failures, new_total):
+    """One-sided p-value that the new failure rate is higher than the base rate"""
+    if not base_total or not new_total:
+        return 1.0
+    share = (base_failures + new_failures) / (base_total + new_total)
+    if share in (0, 1):
+        return 1.0
+    error = math.sqrt(share * (1 - share) * (1 / base_total + 1 / new_total))
+    z = (new_failures / new_total - base_failures / base_total) / error
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+class Trend:
+    """Mann-Kendall statistic and least-squares slope over one value per window"""
+
+    __slots__ = ('unit', 'times', 'values', 's')
+
+    def __init__(self, unit):
+        self.unit = unit
+        self.times = []
+        self.values = []
+        self.s = 0
+
+    def add(self, hours, value):
+        # S only needs the new point's sign against every earlier one: O(windows) per window
+        self.s += sum((value > v) - (value < v) for v in self.values)
+        self.times.append(hours)
+        self.values.append(value)
+
+    def p_value(self):
+        """One-sided p-value for an increasing trend (ties are ignored, which is conservative)"""
+        n = len(self.values)
+        if n < MIN_TREND_POINTS or self.s <= 0:
+            return 1.0
+        variance = n * (n - 1) * (2 * n + 5) / 18
+        z = (self.s - 1) / math.sqrt(variance)
+        return 0.5 * math.erfc(z / math.sqrt(2))
+
+    def slope(self):
+        """Least-squares change per hour"""
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        mean_t = sum(self.times) / n
+        mean_v = sum(self.values) / n
+        spread = sum((t - mean_t) ** 2 for t in self.times)
+        if not spread:
+            return 0.0
+        return sum((t - mean_t) * (v - mean_v) for t, v in zip(self.times, self.values)) / spread
+
+    def row(self, series, alpha, threshold):
+        first, last = (self.values[0], self.values[-1]) if self.values else (0.0, 0.0)
+        p_value = self.p_value()
+        slope = self.slope()
+        span = self.times[-1] - self.times[0] if len(self.times) > 1 else 0.0
+        # Significant and large: the fitted change over the run exceeds `threshold` of the start,
+        # and at least one unit (1ms, one percentage point, 1MB) so a rise from ~0 is not drift
+        grew = slope * span > max(threshold * abs(first), 1.0)
+        return {
+            'series': series,
+            'points': len(self.values),
+            'first': f'{first:.2f}{self.unit}',
+            'last': f'{last:.2f}{self.unit}',
+            'slope_per_hour': f'{slope:+.2f}{self.unit}',
+            'trend_p': p_value,
+            'verdict': '❌ drifting' if p_value < alpha and grew else '',
+        }
+
+
+class WindowedStats(RequestStats):
+    """RequestStats that also records into the current window's RequestStats"""
+
+    __slots__ = ('window',)
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.window = RequestStats(name)
+
+    def record(self, seconds, status):
+        super().record(seconds, status)
+        self.window.record(seconds, status)
+
+    def record_error(self, error):
+        super().record_error(error)
+        self.window.record_error(error)
+
+    def rotate(self):
+        window, self.window = self.window, RequestStats(self.name)
+        return window
+
+
+class SoakRunner(LoadRunner):
+    """LoadRunner cut into windows, with drift checks after every window"""
+
+    def __init__(self, specs, out_dir, window=60.0, rolling=5, warmup=1, baseline=5, alpha=0.01,
+                 threshold=0.2, error_threshold=0.01, confirm=3, server_pid=None, watch_dir=None, **kwargs):
+        needed = runs_needed(alpha)
+        if min(rolling, baseline) < needed:
+            raise ValueError(f'--alpha {alpha:g} needs --rolling and --baseline of at least {needed} windows')
+        kwargs.setdefault('duration', None)
+        duration = kwargs.pop('duration') or math.inf
+        super().__init__(specs, duration=duration, **kwargs)
+        self.stats = {name: WindowedStats(name) for name in self.stats}
+        self.out_dir = out_dir
+        self.window = window
+        self.recent = deque(maxlen=rolling)
+        self.warmup = warmup
+        self.baseline_windows = baseline
+        self.alpha = alpha
+        self.threshold = threshold
+        self.error_threshold = error_threshold
+        self.confirm = confirm
+        self.server_pid = server_pid
+        self.watch_dir = watch_dir
+        self.baseline = []
+        self.baseline_failures = [0, 0]
+        self.windows = 0
+        self.trends = {}
+        self.streaks = {}
+        self.drift = {}
+        self.start_wall = None
+        self.config = {}
+        self.windows_file = None
+
+    def _trend(self, series, unit):
+        trend = self.trends.get(series)
+        if trend is None:
+            trend = self.trends[series] = Trend(unit)
+        return trend
+
+    def stop(self):
+        """Let every user finish its request in flight and end the run"""
+        self.deadline = 0.0
+
+    async def _sample(self):
+        samples = {'client_rss_mb': _rss_mb()}
+        if self.server_pid:
+            samples['server_rss_mb'] = _rss_mb(self.server_pid)
+        if self.watch_dir:
+            # A large uploads directory takes a while to walk: keep it off the event loop
+            loop = asyncio.get_running_loop()
+            samples['watch_dir_mb'] = await loop.run_in_executor(None, _directory_mb, self.watch_dir)
+        return samples
+
+    def _flag(self, key, event, confirmed):
+        streak = self.streaks.get(key, 0) + 1 if confirmed else 0
+        self.streaks[key] = streak
+        if streak >= self.confirm and key not in self.drift:
+            self.drift[key] = event
+            return event
+        return None
+
+    def _check(self, index):
+        """Step tests of the rolling windows against the baseline; returns new drift events"""
+        events = []
+        latest, (latest_failures, latest_total) = self.recent[-1]
+        rolling = []
+        rolling_failures = [0, 0]
+        for stats_by_name, (n_failures, n_total) in self.recent:
+            rolling_failures[0] += n_failures
+            rolling_failures[1] += n_total
+            rolling.append({name: stats.latency for name, stats in stats_by_name.items()})
+        for row in compare(self.baseline, rolling, percentiles=(99,), threshold=self.threshold,
+                           alpha=self.alpha, min_samples=MIN_WINDOW_SAMPLES):
+            event = {
+                'window': index,
+                'series': f"{row['name']} p99",
+                'baseline': row['base_ms'],
+                'current': row['new_ms'],
+                'change': row['change'],
+                'p_value': row['p_value'],
+            }
+            # A window stays in the rolling set for --rolling windows, so one slow window
+            # would keep the test failing that long: the newest window has to be slow too
+            stats = latest.get(row['name'])
+            slow = (stats is not None and stats.latency.count >= MIN_WINDOW_SAMPLES
+                    and stats.latency.percentile(99) / 1000 > row['base_ms'] * (1 + self.threshold))
+            event = self._flag(('p99', row['name']), event, row['verdict'] == '❌ regression' and slow)
+            if event:
+                events.append(event)
+        base_failures, base_total = self.baseline_failures
+        p_value = proportion_test(base_failures, base_total, *rolling_failures)
+        base_rate = base_failures / base_total if base_total else 0.0
+        rate = rolling_failures[0] / rolling_failures[1] if rolling_failures[1] else 0.0
+        event = {'window': index, 'series': 'error rate', 'baseline': base_rate, 'current': rate,
+                 'change': rate - base_rate, 'p_value': p_value}
+        latest_rate = latest_failures / latest_total if latest_total else 0.0
+        event = self._flag(('errors',), event, p_value < self.alpha and rate - base_rate > self.error_threshold
+                           and latest_rate - base_rate > self.error_threshold)
+        if event:
+            events.append(event)
+        return events
+
+    async def _close_window(self, index, started, ended, partial):
+        window_stats = {name: stats.rotate() for name, stats in self.stats.items()}
+        overall = LatencyHistogram()
+        for stats in window_stats.values():
+            overall.merge(stats.latency)
+        total = overall.count + sum(sum(s.errors.values()) for s in window_stats.values())
+        failures = sum(s.failures for s in window_stats.values())
+        samples = await self._sample()
+        hours = (ended - self.start) / 3600
+
+        events = []
+        if not partial:
+            self.windows += 1
+            if self.windows > self.warmup + self.baseline_windows:
+                self.recent.append((window_stats, (failures, total)))
+                events = self._check(index)
+            elif self.windows > self.warmup:
+                self.baseline.append({name: stats.latency for name, stats in window_stats.items()})
+                self.baseline_failures[0] += failures
+                self.baseline_failures[1] += total
+            if self.windows > self.warmup:
+                if overall.count >= MIN_WINDOW_SAMPLES:
+                    self._trend(f'{OVERALL} p99', 'ms').add(hours, overall.percentile(99) / 1000)
+                self._trend('error rate', '%').add(hours, 100 * failures / total if total else 0.0)
+                for name, stats in window_stats.items():
+                    if stats.latency.count >= MIN_WINDOW_SAMPLES:
+                        self._trend(f'{name} p99', 'ms').add(hours, stats.latency.percentile(99) / 1000)
+                for key, value in samples.items():
+                    if value is not None:
+                        self._trend(SAMPLE_SERIES[key], 'MB').add(hours, value)
+
+        rolling = LatencyHistogram()
+        for stats_by_name, _ in self.recent:
+            for stats in stats_by_name.values():
+                rolling.merge(stats.latency)
+        record = {
+            'window': index,
+            'partial': partial,
+            'start_s': started - self.start,
+            'end_s': ended - self.start,
+            'requests': total,
+            'failures': failures,
+            'error_rate': failures / total if total else 0.0,
+            'rps': total / (ended - started) if ended > started else 0.0,
+            'p50_ms': overall.percentile(50) / 1000,
+            'p95_ms': overall.percentile(95) / 1000,
+            'p99_ms': overall.percentile(99) / 1000,
+            'rolling_p99_ms': rolling.percentile(99) / 1000 if rolling.count else None,
+            **samples,
+            'histogram': overall.to_dict(),
+            'endpoints': [
+                {'name': name, 'requests': s.latency.count, 'failures': s.failures,
+                 'p95_ms': s.latency.percentile(95) / 1000, 'p99_ms': s.latency.percentile(99) / 1000}
+                for name, s in window_stats.items() if s.latency.count or s.errors
+            ],
+            'drift': events,
+        }
+        self.windows_file.write(json.dumps(record) + '\n')
+        self.windows_file.flush()
+        os.fsync(self.windows_file.fileno())
+        self._print_window(record, events)
+        write_atomic(os.path.join(self.out_dir, 'summary.json'), json.dumps(self.summary(ended), indent=2))
+
+    def _print_window(self, record, events):
+        clock = time.strftime('%H:%M:%S', time.gmtime(record['end_s']))
+        phase = 'warm-up' if self.windows <= self.warmup else 'baseline' if self.windows <= self.warmup + self.baseline_windows else ''
+        if record['partial']:
+            phase = 'partial'
+        parts = [f"[{clock}] {record['rps']:.1f} req/s", f"p99 {record['p99_ms']:.1f}ms"]
+        if record['rolling_p99_ms'] is not None:
+            parts.append(f"rolling {record['rolling_p99_ms']:.1f}ms")
+        parts.append(f"errors {record['error_rate']:.2%}")
+        for key, label in (('client_rss_mb', 'client'), ('server_rss_mb', 'API'), ('watch_dir_mb', 'dir')):
+            if record.get(key) is not None:
+                parts.append(f'{label} {record[key]:.0f}MB')
+        print('   ' + ', '.join(parts) + (f' ({phase})' if phase else ''), flush=True)
+        for event in events:
+            if event['series'] == 'error rate':
+                change = f"{event['baseline']:.2%} -> {event['current']:.2%}"
+            else:
+                change = f"{event['baseline']:.1f}ms -> {event['current']:.1f}ms ({event['change']:+.0%})"
+            print(f"⚠️  Drift in {event['series']}: {change}, p={event['p_value']:.1e}, "
+                  f"held for {self.confirm} windows", flush=True)
+
+    async def _windows(self, users):
+        index = 0
+        started = self.start
+        while True:
+            boundary = self.start + (index + 1) * self.window
+            done, _ = await asyncio.wait({users}, timeout=max(boundary - time.perf_counter(), 0))
+            ended = time.perf_counter()
+            final = users in done
+            await self._close_window(index, started, ended, partial=final and ended - started < self.window * 0.999)
+            if final:
+                return
+            started = ended
+            index += 1
+
+    async def run(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.start_wall = datetime.now(timezone.utc).isoformat()
+        self.windows_file = open(os.path.join(self.out_dir, 'windows.jsonl'), 'a')
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGINT, self.stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+        try:
+            self.start = time.perf_counter()
+            users = asyncio.ensure_future(super().run())
+            await self._windows(users)
+            return users.result()
+        finally:
+            try:
+                loop.remove_signal_handler(signal.SIGINT)
+            except (NotImplementedError, RuntimeError):
+                pass
+            self.windows_file.close()
+
+    def trend_rows(self):
+        return [trend.row(series, self.alpha, self.threshold) for series, trend in self.trends.items()]
+
+    def summary(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        self.elapsed = elapsed
+        report = LoadRunner.report(self)
+        report['soak'] = {
+            'started_at': self.start_wall,
+            'window_s': self.window,
+            'windows': self.windows,
+            'warmup_windows': self.warmup,
+            'baseline_windows': self.baseline_windows,
+            'alpha': self.alpha,
+            'threshold': self.threshold,
+            'config': self.config,
+            'drift': list(self.drift.values()),
+            'trends': self.trend_rows(),
+        }
+        return report
+
+    def report(self):
+        return self.summary(self.start + self.elapsed)
+
+
+def add_arguments(parser):
+    add_workload_arguments(parser)
+    parser.add_argument('-d', '--duration', type=float, help='Run for this many seconds (default: until Ctrl-C)')
+    parser.add_argument('--window', type=float, default=60.0, help='Window length in seconds (default: 60)')
+    parser.add_argument('--rolling', type=int, default=5,
+                        help='Windows merged for the rolling p99 and the step tests (default: 5)')
+    parser.add_argument('--warmup', type=int, default=1, help='Windows ignored at the start (default: 1)')
+    parser.add_argument('--baseline', type=int, default=5,
+                        help='Windows after the warm-up that form the baseline (default: 5)')
+    parser.add_argument('--alpha', type=float, default=0.01,
+                        help='Significance level of the drift tests (default: 0.01, which needs 5 windows '
+                             'in --rolling and --baseline)')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Smallest relative p99 increase reported as drift (default: 0.2)')
+    parser.add_argument('--error-threshold', type=float, default=0.01,
+                        help='Smallest error-rate increase reported as drift (default: 0.01)')
+    parser.add_argument('--confirm', type=int, default=3,
+                        help='Consecutive windows a step must hold before it is reported (default: 3)')
+    parser.add_argument('--server-pid', type=int, help='Also track the resident memory of this local API process')
+    parser.add_argument('--watch-dir', help='Also track the size of this directory, e.g. uploads')
+    parser.add_argument('-o', '--out', help='Output directory (default: .cache/soak/<start time>)')
+    add_validate_argument(parser)
+    add_save_arguments(parser)
+
+
+def run(args):
+    specs = select_specs(args)
+    out_dir = args.out or os.path.join('.cache', 'soak', datetime.now().strftime('%Y%m%d-%H%M%S'))
+    try:
+        runner = SoakRunner(
+            specs, out_dir,
+            window=args.window, rolling=args.rolling, warmup=args.warmup, baseline=args.baseline,
+            alpha=args.alpha, threshold=args.threshold, error_threshold=args.error_threshold,
+            confirm=args.confirm, server_pid=args.server_pid, watch_dir=args.watch_dir,
+            users=args.users, duration=args.duration, think_time=args.think_time, timeout=args.timeout,
+            seed=args.seed, validator=validator_from_args(args),
+        )
+    except ValueError as error:
+        print(f'❌ {error}')
+        return 1
+    runner.config = {
+        'requests': [spec.name for spec in specs],
+        'users': args.users,
+        'duration_s': args.duration,
+        'think_time_s': args.think_time,
+        'seed': args.seed,
+    }
+    until = f'for {args.duration:.0f}s' if args.duration else 'until Ctrl-C'
+    print(f'🚀 Soaking {len(specs)} requests with {args.users} virtual users {until}, '
+          f'{args.window:.0f}s windows, writing to {out_dir}')
+    report = asyncio.run(runner.run())
+    print()
+    print_report(report)
+    print()
+    print(format_table(report['soak']['trends'], TREND_COLUMNS))
+    drift = report['soak']['drift']
+    drifting = [row['series'] for row in report['soak']['trends'] if row['verdict']]
+    print()
+    if drift or drifting:
+        for event in drift:
+            print(f"❌ Step drift in {event['series']} from window {event['window']}")
+        for series in drifting:
+            print(f'❌ Upward trend in {series}')
+    elif runner.windows <= args.warmup + args.baseline:
+        print(f'⚠️  Only {runner.windows} full windows: too short for drift checks '
+              f'(warm-up {args.warmup} + baseline {args.baseline})')
+    else:
+        print(f'✅ No drift over {runner.windows} windows')
+    print(f"💾 Windows in {os.path.join(out_dir, 'windows.jsonl')}, summary in {os.path.join(out_dir, 'summary.json')}")
+    if report['validation']:
+        print_validation(report['validation'])
+    save_from_args(args, 'soak', runner.stats.values(), report)
+    return 1 if drift or drifting else 0
@@ -0,0 +1,196 @@
+"""
+Constant-memory latency statistics.
+
+Latencies are recorded in microseconds into a log-linear histogram in the
+style of HdrHistogram: values below 256us are exact and every power-of-two
+range above that is split into 128 sub-buckets, so any recorded value is
+reproduced within ~0.8% no matter how many samples a run collects.
+"""
+
+import time
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+
+def bucket_index(value):
+    """Map a non-negative integer value to its histogram bucket"""
+    shift = max(value.bit_length() - SUB_BUCKET_BITS - 1, 0)
+    return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+
+def bucket_value(index):
+    """Return the midpoint of the value range covered by a bucket"""
+    shift = max((index >> SUB_BUCKET_BITS) - 1, 0)
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return (mantissa << shift) + ((1 << shift) >> 1)
+
+
+class LatencyHistogram:
+    """Sparse log-linear histogram of latencies in microseconds"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, micros):
+        value = int(micros) if micros > 0 else 0
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_seconds(self, seconds):
+        self.record(seconds * 1_000_000)
+
+    def merge(self, other):
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """Value at the given percentile (0-100), clamped to the observed range"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(bucket_value(index), self.min), self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """Number of values at or below each of the ascending `bounds` (microseconds)"""
+        totals = [0] * len(bounds)
+        for index, n in self.counts.items():
+            value = bucket_value(index)
+            for i in range(len(bounds) - 1, -1, -1):
+                if value > bounds[i]:
+                    break
+                totals[i] += n
+        return totals
+
+    def to_dict(self):
+        return {
+            'counts': {str(k): v for k, v in sorted(self.counts.items())},
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = {int(k): v for k, v in data['counts'].items()}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+
+class RequestStats:
+    """Latency, status and error counters for one collection request name"""
+
+    __slots__ = ('name', 'latency', 'statuses', 'errors')
+
+    def __init__(self, name):
+        self.name = name
+        self.latency = LatencyHistogram()
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, seconds, status):
+        self.latency.record_seconds(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def record_error(self, error):
+        key = type(error).__name__
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    @property
+    def failures(self):
+        failed = sum(n for status, n in self.statuses.items() if status >= 400)
+        return failed + sum(self.errors.values())
+
+    def summary(self, elapsed):
+        latency = self.latency
+        return {
+            'name': self.name,
+            'requests': latency.count,
+            'failures': self.failures,
+            'rps': latency.count / elapsed if elapsed else 0.0,
+            'p50_ms': latency.percentile(50) / 1000,
+            'p95_ms': latency.percentile(95) / 1000,
+            'p99_ms': latency.percentile(99) / 1000,
+            'max_ms': latency.max / 1000,
+            'statuses': {str(k): v for k, v in sorted(self.statuses.items())},
+            'errors': dict(self.errors),
+        }
+
+
+class CpuMeter:
+    """Process CPU time spent by the load generator since construction"""
+
+    # Above this share of one core the client, not the API, may set the pace
+    CLIENT_BOUND = 0.8
+
+    def __init__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def summary(self, requests):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        return {
+            'cpu_s': cpu,
+            'cpu_us_per_request': cpu / requests * 1e6 if requests else 0.0,
+            'cpu_utilization': cpu / wall if wall else 0.0,
+            'max_rps': requests / cpu if cpu else 0.0,
+        }
+
+
+def describe_cpu(cpu):
+    """Report lines for a CpuMeter summary"""
+    lines = [
+        f"📊 Client CPU: {cpu['cpu_us_per_request']:.0f}µs per request, {cpu['cpu_utilization']:.0%} of one core "
+        f"(enough for ~{cpu['max_rps']:.0f} req/s)"
+    ]
+    if cpu['cpu_utilization'] >= CpuMeter.CLIENT_BOUND:
+        lines.append('⚠️  The client was busy most of the run: measured throughput may be limited by the '
+                     'load generator rather than the API (add processes or machines)')
+    return lines
+
+
+def format_table(rows, columns):
+    """Render a list of dicts as a fixed-width text table"""
+    widths = [
+        max(len(title), *(len(fmt.format(row[key])) for row in rows)) if rows else len(title)
+        for title, key, fmt in columns
+    ]
+    lines = ['  '.join(title.ljust(w) for (title, _, _), w in zip(columns, widths)).rstrip()]
+    lines.append('  '.join('-' * w for w in widths))
+    for row in rows:
+        cells = [fmt.format(row[key]) for _, key, fmt in columns]
+        lines.append('  '.join(cell.ljust(w) for cell, w in zip(cells, widths)).rstrip())
+    return '\n'.join(lines)
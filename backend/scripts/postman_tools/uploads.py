@@ -0,0 +1,530 @@
+"""
+Streaming multipart upload benchmark for POST /api/upload.
+
+Files are never read into memory whole: every upload is a MultipartBody
+whose file part is streamed from disk in fixed-size chunks, either as
+slices of a read-only mmap or with plain read() calls, and the client waits
+for the socket to drain between chunks. Client memory therefore stays flat
+whatever the corpus size, which the report shows as peak RSS.
+
+Synthetic PDFs of any size are written the same way, block by block, so the
+benchmark runs without external data. Results are grouped by file size
+bucket because the failure modes differ by size: multer rejects files above
+MAX_FILE_SIZE (10 MB by default) with FILE_TOO_LARGE, the upload rate limiter
+answers 429, and large files on a slow disk or link run into timeouts.
+"""
+
+import asyncio
+import itertools
+import json
+import mmap
+import os
+import random
+import re
+import sys
+import time
+import uuid
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .api import add_api_arguments, failure_reason
+from .client import HTTPClient
+from .collection import check_resolved, find_item, load_collection, resolve_variables, substitute
+from .loadgen import parse_variables
+from .results import add_save_arguments, save_from_args
+from .scenario import TokenCache, load_accounts
+from .stats import RequestStats, format_table
+
+DEFAULT_CORPUS_DIR = os.path.join('.cache', 'upload-corpus')
+DEFAULT_SIZES = '128K,512K,2M,8M'
+DEFAULT_BUCKETS = '256K,1M,4M,10M'
+CHUNK_SIZE = 256 * 1024
+DOCUMENT_TYPES = ['invoice', 'receipt', 'resume', 'contract']
+
+# Extensions accepted by the fileFilter in src/config/upload.js
+CONTENT_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+}
+
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?\s*$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def parse_size(text):
+    """'512K', '1.5M', '10MB' or a byte count -> bytes (binary units, like multer)"""
+    match = SIZE_PATTERN.match(str(text))
+    if not match:
+        raise ValueError(f'Invalid size: {text!r}')
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_sizes(text):
+    return [parse_size(part) for part in text.split(',') if part.strip()]
+
+
+def format_size(size):
+    for unit, factor in (('GB', 1 << 30), ('MB', 1 << 20), ('KB', 1 << 10)):
+        if size >= factor:
+            return f'{size / factor:g}{unit}'
+    return f'{size}B'
+
+
+def bucket_labels(edges):
+    """Labels for the half-open ranges [0, e1), [e1, e2), ..., [en, inf)"""
+    bounds = [0] + list(edges)
+    labels = [f'{format_size(lo)}-{format_size(hi)}' for lo, hi in zip(bounds, bounds[1:])]
+    labels[0] = f'<{format_size(edges[0])}' if edges else 'all'
+    if edges:
+        labels.append(f'{format_size(edges[-1])}+')
+    return labels
+
+
+def write_synthetic_pdf(path, size, seed=0, block_size=1 << 20):
+    """
+    Write a valid one-page PDF of exactly `size` bytes (or the smallest valid
+    PDF when `size` is below that), padding the content stream with
+    seeded comment lines written one block at a time.
+    """
+    rng = random.Random(seed)
+    title = f'DocuFlow synthetic document {seed}'
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    objects = [
+        b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n',
+        b'2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n',
+        b'3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>\nendobj\n',
+    ]
+    font = b'5 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>\nendobj\n'
+    text = f'BT /F1 18 Tf 72 720 Td ({title}) Tj ET\n'.encode('latin-1')
+
+    def layout(padding):
+        length = len(text) + padding
+        stream_head = f'4 0 obj\n<< /Length {length} >>\nstream\n'.encode('latin-1')
+        stream_tail = b'\nendstream\nendobj\n'
+        offsets = []
+        position = len(header)
+        for obj in objects:
+            offsets.append(position)
+            position += len(obj)
+        offsets.append(position)
+        position += len(stream_head) + length + len(stream_tail)
+        offsets.append(position)
+        position += len(font)
+        xref = b'xref\n0 6\n0000000000 65535 f \n' + b''.join(b'%010d 00000 n \n' % o for o in offsets)
+        trailer = f'trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n'.encode('latin-1')
+        return stream_head, stream_tail, xref + trailer, position + len(xref) + len(trailer)
+
+    # The padding changes the digits of /Length and startxref, so settle it
+    # iteratively; any byte it cannot absorb goes after %%EOF as newlines
+    padding = 0
+    for _ in range(4):
+        total = layout(padding)[3]
+        if total == size:
+            break
+        padding = max(0, padding + size - total)
+    stream_head, stream_tail, tail, total = layout(padding)
+    if total > size and padding:
+        padding = max(0, padding - (total - size) - 1)
+        stream_head, stream_tail, tail, total = layout(padding)
+    if total < size:
+        tail += b'\n' * (size - total)
+        total = size
+
+    line_count = max(1, block_size // 65)
+    block = b''.join(b'%% %062x\n' % rng.getrandbits(248) for _ in range(line_count))
+    with open(path, 'wb') as f:
+        f.write(header)
+        for obj in objects:
+            f.write(obj)
+        f.write(stream_head)
+        f.write(text)
+        remaining = padding
+        while remaining > 0:
+            piece = block[:remaining]
+            f.write(piece)
+            remaining -= len(piece)
+        f.write(stream_tail)
+        f.write(font)
+        f.write(tail)
+    return total
+
+
+def generate_corpus(directory, sizes, per_size=1, seed=0):
+    """Write `per_size` synthetic PDFs for every size, reusing files already there"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for size in sizes:
+        for i in range(per_size):
+            path = os.path.join(directory, f'synthetic-{format_size(size)}-{seed}-{i}.pdf')
+            if not (os.path.isfile(path) and os.path.getsize(path) == size):
+                write_synthetic_pdf(path, size, seed=seed * 1_000_003 + size + i)
+            paths.append(path)
+    return paths
+
+
+class UploadFile:
+    """A file on disk to upload, with the MIME type multer will check"""
+
+    __slots__ = ('path', 'name', 'size', 'content_type')
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.size = os.path.getsize(path)
+        self.content_type = CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), 'application/octet-stream')
+
+
+def collect_files(paths):
+    """Every file with an accepted extension under the given files or directories"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            found.append(path)
+    return [UploadFile(p) for p in found if os.path.splitext(p)[1].lower() in CONTENT_TYPES]
+
+
+def read_chunks(path, reader='mmap', chunk_size=CHUNK_SIZE):
+    """Yield the file in chunks, as mmap slices or as read() results"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if reader != 'mmap' or not size:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        advise = hasattr(mapped, 'madvise')
+        if advise:
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+            # Page-aligned chunks, so sent pages can be dropped from this
+            # process (they stay in the page cache) and RSS stays flat
+            chunk_size = -(-chunk_size // mmap.PAGESIZE) * mmap.PAGESIZE
+        view = memoryview(mapped)
+        try:
+            for offset in range(0, size, chunk_size):
+                yield view[offset:offset + chunk_size]
+                if advise:
+                    mapped.madvise(mmap.MADV_DONTNEED, offset, min(chunk_size, size - offset))
+        finally:
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # The transport still holds a slice; the mapping goes away
+                # with the last reference instead
+                pass
+
+
+class MultipartBody:
+    """multipart/form-data request body whose file part is streamed from disk"""
+
+    def __init__(self, fields, file_field, upload, reader='mmap', chunk_size=CHUNK_SIZE):
+        boundary = uuid.uuid4().hex
+        parts = [
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in fields
+        ]
+        # multer's fileFilter checks the part's Content-Type, not the extension
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+            f'filename="{upload.name}"\r\nContent-Type: {upload.content_type}\r\n\r\n'
+        )
+        self.head = ''.join(parts).encode('utf-8')
+        self.tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        self.upload = upload
+        self.reader = reader
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.head) + self.upload.size + len(self.tail)
+
+    def chunks(self):
+        yield self.head
+        yield from read_chunks(self.upload.path, self.reader, self.chunk_size)
+        yield self.tail
+
+
+class BucketStats:
+    """Latency, throughput and failure reasons for one file size bucket"""
+
+    def __init__(self, label):
+        self.stats = RequestStats(f'Upload {label}')
+        self.label = label
+        self.uploads = 0
+        self.ok = 0
+        self.bytes_ok = 0
+        self.seconds_ok = 0.0
+        self.reasons = {}
+
+    def fail(self, reason):
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def summary(self):
+        latency = self.stats.latency
+        return {
+            'bucket': self.label,
+            'uploads': self.uploads,
+            'ok': self.ok,
+            'failed': self.uploads - self.ok,
+            'mb_ok': self.bytes_ok / 1e6,
+            'mb_per_s': self.bytes_ok / 1e6 / self.seconds_ok if self.seconds_ok else 0.0,
+            'p50_ms': latency.percentile(50) / 1000,
+            'p95_ms': latency.percentile(95) / 1000,
+            'p99_ms': latency.percentile(99) / 1000,
+            'max_ms': latency.max / 1000,
+            'reasons': dict(sorted(self.reasons.items(), key=lambda kv: -kv[1])),
+        }
+
+
+class UploadBench:
+    """Upload files concurrently from `users` virtual users and bucket the results"""
+
+    def __init__(self, collection, files, variables, accounts, users=4, count=None, duration=None,
+                 edges=(), reader='mmap', chunk_size=CHUNK_SIZE, document_type='invoice', timeout=120.0):
+        self.collection = collection
+        self.files = files
+        self.variables = variables
+        self.accounts = accounts
+        self.users = users
+        self.count = count
+        self.duration = duration
+        self.edges = sorted(edges)
+        self.reader = reader
+        self.chunk_size = chunk_size
+        self.document_type = document_type
+        self.timeout = timeout
+        self.buckets = [BucketStats(label) for label in bucket_labels(self.edges)]
+        self.elapsed = 0.0
+        self.connects = 0
+        self.token_cache = None
+
+        _, item = find_item(collection, 'Upload Document')
+        request = item['request']
+        url = request['url']
+        self.url = substitute(url if isinstance(url, str) else url.get('raw', ''), variables)
+        formdata = [p for p in request.get('body', {}).get('formdata', []) if not p.get('disabled')]
+        self.file_field = next((p['key'] for p in formdata if p.get('type') == 'file'), 'file')
+        self.fields = [(p['key'], substitute(p.get('value', ''), variables))
+                       for p in formdata if p.get('type') != 'file']
+
+    def _bucket(self, size):
+        index = 0
+        while index < len(self.edges) and size >= self.edges[index]:
+            index += 1
+        return self.buckets[index]
+
+    def _fields(self, n):
+        document_type = DOCUMENT_TYPES[n % len(DOCUMENT_TYPES)] if self.document_type == 'mixed' else self.document_type
+        return [(k, document_type if k == 'document_type' else v) for k, v in self.fields]
+
+    async def _token(self, account):
+        if self.variables.get('accessToken'):
+            return self.variables['accessToken']
+        return await self.token_cache.token(account)
+
+    async def _upload(self, client, n, upload, account):
+        bucket = self._bucket(upload.size)
+        bucket.uploads += 1
+        try:
+            token = await self._token(account)
+        except Exception as error:
+            bucket.fail(f'login: {error}')
+            return
+        body = MultipartBody(self._fields(n), self.file_field, upload, self.reader, self.chunk_size)
+        headers = [('Authorization', f'Bearer {token}'), ('Content-Type', body.content_type)]
+        start = time.perf_counter()
+        try:
+            response = await client.request('POST', self.url, headers, body)
+        except Exception as error:
+            bucket.stats.record_error(error)
+            bucket.fail(type(error).__name__)
+            return
+        seconds = time.perf_counter() - start
+        bucket.stats.record(seconds, response.status)
+        if response.status == 201:
+            bucket.ok += 1
+            bucket.bytes_ok += upload.size
+            bucket.seconds_ok += seconds
+            return
+        if response.status == 401 and self.token_cache is not None:
+            self.token_cache.invalidate(account, token)
+        bucket.fail(failure_reason(response))
+
+    async def _user(self, client, user_id, queue, deadline):
+        account = self.accounts[user_id % len(self.accounts)]
+        for n, upload in queue:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            await self._upload(client, n, upload, account)
+
+    async def run(self):
+        client = HTTPClient(limit_per_host=self.users, timeout=self.timeout)
+        self.token_cache = TokenCache(client, self.collection, self.variables)
+        # One shared iterator: users take the next file as soon as they are free
+        queue = enumerate(itertools.cycle(self.files))
+        if self.count is not None:
+            queue = itertools.islice(queue, self.count)
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        try:
+            await asyncio.gather(*(self._user(client, u, queue, deadline) for u in range(self.users)))
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.connects = client.connects
+            await client.close()
+        return self.report()
+
+    def report(self):
+        rows = [bucket.summary() for bucket in self.buckets if bucket.uploads]
+        uploads = sum(row['uploads'] for row in rows)
+        ok = sum(row['ok'] for row in rows)
+        mb_ok = sum(row['mb_ok'] for row in rows)
+        return {
+            'url': self.url,
+            'users': self.users,
+            'reader': self.reader,
+            'chunk_size': self.chunk_size,
+            'elapsed_s': self.elapsed,
+            'uploads': uploads,
+            'ok': ok,
+            'mb_ok': mb_ok,
+            'mb_per_s': mb_ok / self.elapsed if self.elapsed else 0.0,
+            'uploads_per_s': uploads / self.elapsed if self.elapsed else 0.0,
+            'connections_opened': self.connects,
+            'peak_rss_mb': peak_rss_mb(),
+            'buckets': rows,
+        }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+BUCKET_COLUMNS = [
+    ('Size', 'bucket', '{}'),
+    ('Uploads', 'uploads', '{}'),
+    ('Failed', 'failed', '{}'),
+    ('MB ok', 'mb_ok', '{:.1f}'),
+    ('MB/s each', 'mb_per_s', '{:.1f}'),
+    ('p50 ms', 'p50_ms', '{:.1f}'),
+    ('p95 ms', 'p95_ms', '{:.1f}'),
+    ('p99 ms', 'p99_ms', '{:.1f}'),
+    ('Max ms', 'max_ms', '{:.1f}'),
+]
+
+
+def add_arguments(parser):
+    subparsers = parser.add_subparsers(dest='upload_command', required=True)
+
+    generate = subparsers.add_parser('generate', help='Write synthetic PDFs of the given sizes')
+    bench = subparsers.add_parser('bench', help='Stream files to POST /api/upload from concurrent users')
+    for sub in (generate, bench):
+        sub.add_argument('--sizes', default=DEFAULT_SIZES,
+                         help=f'Synthetic PDF sizes, comma-separated (default: {DEFAULT_SIZES})')
+        sub.add_argument('--files', type=int, default=2, help='Synthetic PDFs per size (default: 2)')
+        sub.add_argument('--seed', type=int, default=0, help='Random seed for synthetic PDFs')
+        sub.add_argument('--out-dir', default=DEFAULT_CORPUS_DIR,
+                         help=f'Where synthetic PDFs are written (default: {DEFAULT_CORPUS_DIR})')
+
+    bench.add_argument('--corpus', action='append', default=[], metavar='PATH',
+                       help='Upload these files or directories instead of synthetic PDFs (repeatable)')
+    add_api_arguments(bench, timeout=120.0)
+    bench.add_argument('-u', '--users', type=int, default=4, help='Concurrent uploads')
+    bench.add_argument('-n', '--count', type=int, help='Uploads in total (default: each file once)')
+    bench.add_argument('-d', '--duration', type=float, help='Stop starting uploads after this many seconds')
+    bench.add_argument('--document-type', default='invoice', choices=DOCUMENT_TYPES + ['mixed'],
+                       help="document_type form field; 'mixed' rotates through all four")
+    bench.add_argument('--reader', default='mmap', choices=['mmap', 'read'],
+                       help='Stream files as mmap slices or with read() calls (default: mmap)')
+    bench.add_argument('--chunk-size', type=parse_size, default=CHUNK_SIZE,
+                       help='Bytes per write (default: 256K)')
+    bench.add_argument('--buckets', default=DEFAULT_BUCKETS,
+                       help=f'Size bucket edges for the report (default: {DEFAULT_BUCKETS})')
+    bench.add_argument('--json', dest='json_output', help='Also write the report to this file')
+    add_save_arguments(bench)
+
+
+def print_report(report):
+    print(format_table(report['buckets'], BUCKET_COLUMNS))
+    print()
+    for row in report['buckets']:
+        if row['reasons']:
+            reasons = ', '.join(f'{reason} x{n}' for reason, n in row['reasons'].items())
+            print(f"⚠️  {row['bucket']}: {reasons}")
+    rss = f", peak RSS {report['peak_rss_mb']:.0f} MB" if report['peak_rss_mb'] is not None else ''
+    print(f"📊 {report['uploads']} uploads ({report['ok']} ok) in {report['elapsed_s']:.2f}s: "
+          f"{report['mb_ok']:.1f} MB at {report['mb_per_s']:.1f} MB/s, {report['uploads_per_s']:.1f} files/s "
+          f"over {report['connections_opened']} connections{rss}")
+
+
+def run(args):
+    sizes = parse_sizes(args.sizes)
+    if args.upload_command == 'generate':
+        paths = generate_corpus(args.out_dir, sizes, args.files, args.seed)
+        total = sum(os.path.getsize(p) for p in paths)
+        print(f"✅ {len(paths)} synthetic PDFs ({total / 1e6:.1f} MB) in {args.out_dir}")
+        return 0
+
+    if args.corpus:
+        files = collect_files(args.corpus)
+    else:
+        files = collect_files(generate_corpus(args.out_dir, sizes, args.files, args.seed))
+    if not files:
+        print(f"❌ No {', '.join(CONTENT_TYPES)} files found in {', '.join(args.corpus)}")
+        return 1
+
+    collection = load_collection(args.collection)
+    count = args.count
+    if count is None and args.duration is None:
+        count = len(files)
+    try:
+        variables = resolve_variables(collection, parse_variables(args.var), args.base_url)
+        bench = UploadBench(
+            collection,
+            files,
+            variables,
+            load_accounts(args, collection),
+            users=args.users,
+            count=count,
+            duration=args.duration,
+            edges=parse_sizes(args.buckets),
+            reader=args.reader,
+            chunk_size=args.chunk_size,
+            document_type=args.document_type,
+            timeout=args.timeout,
+        )
+        check_resolved(bench.url, 'Upload URL')
+    except ValueError as error:
+        print(f'❌ {error}')
+        return 1
+    corpus_mb = sum(f.size for f in files) / 1e6
+    print(f"🚀 Uploading from {len(files)} files ({corpus_mb:.1f} MB) to {bench.url} "
+          f"with {args.users} users ({args.reader} reader)...")
+    report = asyncio.run(bench.run())
+    print_report(report)
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(report, f, indent=2)
+    save_from_args(args, 'upload', [bucket.stats for bucket in bench.buckets], report)
+    if report['ok'] < report['uploads']:
+        print(f"❌ {report['uploads'] - report['ok']} of {report['uploads']} uploads failed")
+        return 1
+    return 0
@@ -0,0 +1,529 @@
+"""
+Response validation against the schemas in docs/swagger.yaml.
+
+Every response schema is compiled once, when the validator is built, into a
+tree of small closures: types, required properties, enums and formats are
+resolved up front and each node already knows its JSON path, so checking a
+valid response builds no strings and allocates nothing beyond the decoded
+body. Compiled validators
+are cached per operation and status code; error statuses an operation does
+not document fall back to components.schemas.Error, the shape every
+errorResponse() in src/utils/responses.js produces.
+
+Responses can be sampled (`--validate 0.1` checks every tenth response of
+each request), and the time spent per checked response is measured apart
+from JSON decoding so validation can stay on while benchmarking.
+
+PyYAML is required to read swagger.yaml.
+"""
+
+import json
+import re
+import time
+from urllib.parse import urlsplit
+
+from .routes import SWAGGER_FILE
+from .stats import format_table
+
+# Distinct violation messages kept per request name
+MAX_MESSAGES = 5
+# Stop descending into a response after this many violations
+MAX_ERRORS = 10
+
+JSON_MEDIA_TYPE = re.compile(r'application/(?:[\w.+-]+\+)?json')
+
+FORMATS = {
+    'uuid': re.compile(r'[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\Z').match,
+    'date': re.compile(r'\d{4}-\d\d-\d\d\Z').match,
+    'date-time': re.compile(r'\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:?\d\d)?\Z').match,
+    'email': re.compile(r'[^@\s]+@[^@\s]+\Z').match,
+}
+
+# Exact types json.loads() produces for each schema type (bool is not an integer)
+JSON_TYPES = {
+    'string': (str,),
+    'object': (dict,),
+    'array': (list,),
+    'boolean': (bool,),
+    'integer': (int,),
+    'number': (int, float),
+}
+TYPE_NAMES = {dict: 'object', list: 'array', str: 'string', bool: 'boolean', int: 'integer', float: 'number',
+              type(None): 'null'}
+
+NOT_DECODED = object()
+
+
+def _mismatch(path, kind, value, errors):
+    # JSON has one number type: 3.0 is a valid integer
+    if kind == 'integer' and type(value) is float and value.is_integer():
+        return
+    errors.append(f'{path}: expected {kind}, got {TYPE_NAMES.get(type(value), type(value).__name__)}')
+
+
+def _apply(node, value, errors):
+    types, check, kind, path = node
+    if types is not None and type(value) not in types:
+        _mismatch(path, kind, value, errors)
+    elif check is not None:
+        check(value, errors)
+
+
+class SchemaCompiler:
+    """
+    Compile OpenAPI 3.0 schema objects into check(value, errors) functions.
+
+    Internally every schema becomes a node (types, check, kind, path): the
+    exact Python types the value may have, and a check for its contents or
+    None. Parents test their children's types inline, so scalar properties
+    cost a dict lookup and a set membership test rather than a call.
+    """
+
+    def __init__(self, components=None):
+        self.schemas = (components or {}).get('schemas') or {}
+        self.refs = {}
+        self.compiling = {}
+        self.nodes = 0
+
+    def compile(self, schema, path='body'):
+        node = self._node(schema or {}, path)
+        return lambda value, errors: _apply(node, value, errors)
+
+    def _ref(self, ref, path):
+        key = (ref, path)
+        if key in self.refs:
+            return self.refs[key]
+        name = ref.rsplit('/', 1)[-1]
+        if not ref.startswith('#/components/schemas/') or name not in self.schemas:
+            raise ValueError(f'unresolved $ref {ref}')
+        if ref in self.compiling:
+            # A recursive schema: nested levels share the outer node (and its path)
+            return self.compiling[ref]
+        compiled = []
+        self.compiling[ref] = (None, lambda value, errors: _apply(compiled[0], value, errors), None, path)
+        try:
+            compiled.append(self._node(self.schemas[name], path))
+        finally:
+            del self.compiling[ref]
+        self.refs[key] = compiled[0]
+        return compiled[0]
+
+    def _node(self, schema, path):
+        if '$ref' in schema:
+            return self._ref(schema['$ref'], path)
+        self.nodes += 1
+        kind = schema.get('type')
+        if kind is None and 'properties' in schema:
+            kind = 'object'
+        elif kind is None and 'items' in schema:
+            kind = 'array'
+        types = None
+        if kind in JSON_TYPES:
+            types = frozenset(JSON_TYPES[kind] + ((type(None),) if schema.get('nullable') else ()))
+
+        checks = self._checks(schema, kind, path)
+        if not checks:
+            return types, None, kind, path
+        if len(checks) == 1:
+            check = checks[0]
+        else:
+            def check(value, errors):
+                for sub in checks:
+                    sub(value, errors)
+        if types is not None and type(None) in types:
+            inner = check
+
+            def check(value, errors):
+                if value is not None:
+                    inner(value, errors)
+        return types, check, kind, path
+
+    def _checks(self, schema, kind, path):
+        """Checks that run once the value is known to have the right type"""
+        checks = []
+        if 'enum' in schema:
+            allowed = schema['enum']
+
+            def enum(value, errors):
+                if value not in allowed:
+                    errors.append(f'{path}: {value!r} is not one of {allowed}')
+            checks.append(enum)
+
+        if kind == 'object':
+            check = self._object(schema, path)
+            if check is not None:
+                checks.append(check)
+        elif kind == 'array':
+            checks.append(self._array(schema, path))
+        elif kind == 'string':
+            checks.extend(self._string(schema, path))
+        elif kind in ('integer', 'number'):
+            checks.extend(self._number(schema, path))
+
+        for keyword in ('allOf', 'anyOf', 'oneOf'):
+            if keyword in schema:
+                checks.append(self._combined(keyword, schema[keyword], path))
+        return checks
+
+    def _object(self, schema, path):
+        required = list(schema.get('required') or [])
+        properties = [
+            (key,) + self._node(sub or {}, f'{path}.{key}')
+            for key, sub in (schema.get('properties') or {}).items()
+        ]
+        additional = schema.get('additionalProperties', True)
+        if not required and not properties and additional is True:
+            return None
+        known = {key for key, *_ in properties}
+        extra = None
+        if isinstance(additional, dict):
+            extra = self._node(additional, f'{path}.*')
+
+        def check(value, errors):
+            for key in required:
+                if key not in value:
+                    errors.append(f'{path}: missing required property {key!r}')
+            for key, types, sub, kind, where in properties:
+                if key in value:
+                    item = value[key]
+                    if types is not None and type(item) not in types:
+                        _mismatch(where, kind, item, errors)
+                    elif sub is not None:
+                        sub(item, errors)
+            if additional is False:
+                for key in value.keys() - known:
+                    errors.append(f'{path}: unexpected property {key!r}')
+            elif extra is not None:
+                for key in value.keys() - known:
+                    _apply(extra, value[key], errors)
+        return check
+
+    def _array(self, schema, path):
+        types, sub, kind, where = self._node(schema['items'], f'{path}[]') if schema.get('items') else (None,) * 4
+        low = schema.get('minItems')
+        high = schema.get('maxItems')
+
+        def check(value, errors):
+            if low is not None and len(value) < low:
+                errors.append(f'{path}: fewer than {low} items')
+            if high is not None and len(value) > high:
+                errors.append(f'{path}: more than {high} items')
+            if types is None and sub is None:
+                return
+            for item in value:
+                if types is not None and type(item) not in types:
+                    _mismatch(where, kind, item, errors)
+                elif sub is not None:
+                    sub(item, errors)
+                if len(errors) >= MAX_ERRORS:
+                    return
+        return check
+
+    def _string(self, schema, path):
+        checks = []
+        low = schema.get('minLength')
+        high = schema.get('maxLength')
+        if low is not None or high is not None:
+            low = low or 0
+
+            def length(value, errors):
+                if len(value) < low or (high is not None and len(value) > high):
+                    errors.append(f'{path}: length {len(value)} outside [{low}, {high if high is not None else ""}]')
+            checks.append(length)
+        if 'pattern' in schema:
+            search = re.compile(schema['pattern']).search
+
+            def pattern(value, errors):
+                if not search(value):
+                    errors.append(f'{path}: does not match {schema["pattern"]!r}')
+            checks.append(pattern)
+        matches = FORMATS.get(schema.get('format'))
+        if matches is not None:
+            name = schema['format']
+
+            def fmt(value, errors):
+                if not matches(value):
+                    errors.append(f'{path}: {value[:40]!r} is not a valid {name}')
+            checks.append(fmt)
+        return checks
+
+    def _number(self, schema, path):
+        checks = []
+        low = schema.get('minimum')
+        high = schema.get('maximum')
+        # OpenAPI 3.0: exclusiveMinimum/exclusiveMaximum are booleans
+        low_open = schema.get('exclusiveMinimum') is True
+        high_open = schema.get('exclusiveMaximum') is True
+        if low is not None:
+            def minimum(value, errors):
+                if value < low or (low_open and value == low):
+                    errors.append(f'{path}: {value} is below the minimum {low}')
+            checks.append(minimum)
+        if high is not None:
+            def maximum(value, errors):
+                if value > high or (high_open and value == high):
+                    errors.append(f'{path}: {value} is above the maximum {high}')
+            checks.append(maximum)
+        return checks
+
+    def _combined(self, keyword, schemas, path):
+        nodes = [self._node(sub, path) for sub in schemas]
+        if keyword == 'allOf':
+            def check(value, errors):
+                for node in nodes:
+                    _apply(node, value, errors)
+            return check
+
+        def check(value, errors):
+            matched = 0
+            for node in nodes:
+                found = []
+                _apply(node, value, found)
+                matched += not found
+            if matched == 0 or (keyword == 'oneOf' and matched > 1):
+                errors.append(f'{path}: matches {matched} of the {len(nodes)} {keyword} schemas')
+        return check
+
+
+class Operation:
+    """Compiled response validators of one swagger operation, cached by status"""
+
+    __slots__ = ('key', 'responses', 'fallback', 'by_status')
+
+    def __init__(self, key, responses, fallback):
+        self.key = key
+        self.responses = responses
+        self.fallback = fallback
+        self.by_status = {}
+
+    def validator(self, status):
+        """check(value, errors) for a status, or None when nothing is documented as JSON"""
+        try:
+            return self.by_status[status]
+        except KeyError:
+            pass
+        code = str(status)
+        for key in (code, f'{code[0]}XX', 'default'):
+            if key in self.responses:
+                check = self.responses[key]
+                break
+        else:
+            check = self.fallback if status >= 400 else None
+        self.by_status[status] = check
+        return check
+
+
+class ValidationStats:
+    """Validation counters and cost for one collection request name"""
+
+    __slots__ = ('name', 'responses', 'checked', 'unchecked', 'invalid', 'seconds', 'decode_seconds',
+                 'max_seconds', 'messages', 'credit')
+
+    def __init__(self, name):
+        self.name = name
+        self.responses = 0
+        self.checked = 0
+        self.unchecked = 0
+        self.invalid = 0
+        self.seconds = 0.0
+        self.decode_seconds = 0.0
+        self.max_seconds = 0.0
+        self.messages = {}
+        self.credit = 0.0
+
+    def record(self, seconds, decode_seconds, errors):
+        self.checked += 1
+        self.seconds += seconds
+        self.decode_seconds += decode_seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+        if errors:
+            self.invalid += 1
+            for message in errors:
+                if message in self.messages or len(self.messages) < MAX_MESSAGES:
+                    self.messages[message] = self.messages.get(message, 0) + 1
+
+    def summary(self):
+        checked = self.checked or 1
+        return {
+            'name': self.name,
+            'responses': self.responses,
+            'checked': self.checked,
+            'unchecked': self.unchecked,
+            'invalid': self.invalid,
+            'us_per_response': self.seconds / checked * 1e6,
+            'decode_us_per_response': self.decode_seconds / checked * 1e6,
+            'max_us': self.max_seconds * 1e6,
+            'violations': dict(self.messages),
+        }
+
+
+def load_swagger(path=SWAGGER_FILE):
+    """Read swagger.yaml, raising ValueError when it cannot be used"""
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError('response validation needs PyYAML (pip install pyyaml)')
+    try:
+        with open(path, 'r') as f:
+            return yaml.safe_load(f) or {}
+    except OSError as error:
+        raise ValueError(f'cannot read {path}: {error.strerror}')
+
+
+def _json_schema(response):
+    """The JSON schema of a swagger response object, {} when it has none, None when not JSON"""
+    content = (response or {}).get('content')
+    if not content:
+        return {}
+    for media_type, media in content.items():
+        if JSON_MEDIA_TYPE.match(media_type) or media_type == '*/*':
+            return (media or {}).get('schema') or {}
+    return None
+
+
+class ResponseValidator:
+    """Check sampled responses against the swagger operation each request maps to"""
+
+    def __init__(self, spec, sample=1.0):
+        if not 0 < sample <= 1:
+            raise ValueError('--validate takes a sampling fraction in (0, 1]')
+        self.sample = sample
+        self.stats = {}
+        start = time.perf_counter()
+        self.compiler = SchemaCompiler(spec.get('components'))
+        error_schema = self.compiler.schemas.get('Error')
+        fallback = self.compiler.compile(error_schema) if error_schema else None
+
+        self.operations = []
+        for path, methods in (spec.get('paths') or {}).items():
+            segments = path.strip('/').split('/')
+            for method, operation in (methods or {}).items():
+                if not isinstance(operation, dict) or 'responses' not in operation:
+                    continue
+                key = f'{method.upper()} {path}'
+                responses = {}
+                for status, response in (operation.get('responses') or {}).items():
+                    schema = _json_schema(response)
+                    # Documented without a body: only the status is promised
+                    responses[str(status).upper()] = self.compiler.compile(schema) if schema else None
+                self.operations.append((method.upper(), segments, Operation(key, responses, fallback)))
+        self.compile_seconds = time.perf_counter() - start
+        self._matches = {}
+
+    @classmethod
+    def load(cls, path=SWAGGER_FILE, sample=1.0):
+        return cls(load_swagger(path), sample)
+
+    def operation(self, method, url):
+        """The Operation documenting a request URL or path, or None"""
+        path = urlsplit(url).path if '://' in url else url.split('?', 1)[0]
+        key = (method.upper(), path)
+        if key in self._matches:
+            return self._matches[key]
+        segments = path.strip('/').split('/')
+        best, best_score = None, -1
+        for op_method, op_segments, operation in self.operations:
+            if op_method != key[0] or len(op_segments) != len(segments):
+                continue
+            score = 0
+            for expected, actual in zip(op_segments, segments):
+                if expected == actual:
+                    score += 1
+                elif not expected.startswith('{'):
+                    break
+            else:
+                # Literal segments win: /invoices/stats over /invoices/{id}
+                if score > best_score:
+                    best, best_score = operation, score
+        self._matches[key] = best
+        return best
+
+    def validate(self, name, operation, response, body=NOT_DECODED):
+        """Check one response; `body` skips decoding when the caller already parsed it"""
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ValidationStats(name)
+        stats.responses += 1
+        if self.sample < 1:
+            stats.credit += self.sample
+            if stats.credit < 1:
+                return
+            stats.credit -= 1
+
+        start = time.perf_counter()
+        check = operation.validator(response.status) if operation is not None else None
+        if check is None:
+            stats.unchecked += 1
+            return
+        errors = []
+        decode = 0.0
+        if body is NOT_DECODED:
+            decode_start = time.perf_counter()
+            try:
+                body = json.loads(response.body)
+            except ValueError:
+                errors.append(f'body: HTTP {response.status} response is not JSON')
+            decode = time.perf_counter() - decode_start
+        if not errors:
+            check(body, errors)
+        stats.record(time.perf_counter() - start - decode, decode, errors)
+
+    @property
+    def invalid(self):
+        return sum(stats.invalid for stats in self.stats.values())
+
+    def summary(self):
+        rows = [stats.summary() for stats in self.stats.values()]
+        checked = sum(stats.checked for stats in self.stats.values())
+        seconds = sum(stats.seconds for stats in self.stats.values())
+        decode = sum(stats.decode_seconds for stats in self.stats.values())
+        return {
+            'sample': self.sample,
+            'operations': len(self.operations),
+            'schema_nodes': self.compiler.nodes,
+            'compile_ms': self.compile_seconds * 1000,
+            'checked': checked,
+            'invalid': self.invalid,
+            'us_per_response': seconds / checked * 1e6 if checked else 0.0,
+            'decode_us_per_response': decode / checked * 1e6 if checked else 0.0,
+            'requests': rows,
+        }
+
+
+VALIDATION_COLUMNS = [
+    ('Request', 'name', '{}'),
+    ('Checked', 'checked', '{}'),
+    ('Invalid', 'invalid', '{}'),
+    ('No schema', 'unchecked', '{}'),
+    ('µs/resp', 'us_per_response', '{:.1f}'),
+    ('Decode µs', 'decode_us_per_response', '{:.1f}'),
+    ('Max µs', 'max_us', '{:.1f}'),
+]
+
+
+def add_validate_argument(parser):
+    parser.add_argument('--validate', type=float, nargs='?', const=1.0, metavar='FRACTION',
+                        help='Check responses against the docs/swagger.yaml schemas '
+                             '(optionally only this fraction of them, e.g. 0.1)')
+
+
+def validator_from_args(args):
+    """A ResponseValidator for --validate, or None when it was not given"""
+    if args.validate is None:
+        return None
+    return ResponseValidator.load(sample=args.validate)
+
+
+def print_validation(summary):
+    """Print the per-request validation table and the first violations"""
+    print()
+    print(format_table(summary['requests'], VALIDATION_COLUMNS))
+    for row in summary['requests']:
+        for message, n in row['violations'].items():
+            print(f"⚠️  {row['name']}: {message} x{n}")
+    icon = '❌' if summary['invalid'] else '✅'
+    print(f"{icon} {summary['invalid']} of {summary['checked']} checked responses violate docs/swagger.yaml "
+          f"({summary['us_per_response']:.1f}µs per response to validate, "
+          f"{summary['decode_us_per_response']:.1f}µs to decode; {summary['schema_nodes']} schema nodes "
+          f"compiled in {summary['compile_ms']:.1f}ms)")
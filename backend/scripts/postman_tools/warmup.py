@@ -0,0 +1,515 @@
+"""
+Cache warming and cold-versus-warm probes for the dashboard reports.
+
+/api/dashboard/overview, /trends, /financial, /api/invoices/stats and
+/api/receipts/by-category are what every user loads right after logging in,
+and each request loads all of the account's rows with findAll and aggregates
+them in JavaScript. Nothing is cached on the server today.
+
+`warm probe` measures what a server-side cache keyed by account and query
+would save. It runs every endpoint against a matrix of query parameters
+(periods, date ranges, is_business_expense). For each account it sends one
+cold request per combination, in a shuffled order so one report does not
+warm the rows another reads, and then --repeat warm ones. It also sends
+--repeat conditional requests with the ETag Express puts on every JSON
+response. A 304 saves the transfer but not the findAll.
+
+Each combination ends up with one of these verdicts:
+
+* `✅ cached`: warm requests are at least --speedup times faster than cold
+  ones, and significantly so.
+* `💡 cache candidate`: warm requests still cost --min-ms or more and return
+  identical bodies, so a cache would serve them as they are.
+* `⚠️ varies`: repeated responses differ, so a cache needs invalidation first.
+* `insufficient samples`: fewer than 5 cold requests (accounts x --rounds),
+  too few for any verdict.
+
+Once a cache exists, `--expect-cache` makes the probe exit 1 unless every
+combination is served from it. `--gap` should then exceed the cache TTL so
+that each round starts cold.
+
+`warm replay` warms those reports for a list of accounts ahead of peak
+hours. Each account logs in and loads its dashboard at a point in --over
+seconds. The timing comes either from the login times recorded in the API's
+winston log (logs/combined.log in production), folded onto one day so the
+ramp follows real traffic, or from synthesized arrivals.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+from .api import NETWORK_ERRORS, ApiClient, add_api_arguments
+from .collection import load_collection, resolve_variables
+from .loadgen import parse_variables
+from .results import mann_whitney
+from .scenario import StepFailed, load_accounts
+from .stats import LatencyHistogram, RequestStats, format_table
+
+# Endpoint -> collection request serving it (the reports `analytics` mirrors)
+ENDPOINTS = {
+    'overview': 'Get Dashboard Overview',
+    'trends': 'Get Document Processing Trends',
+    'financial': 'Get Financial Summary Data',
+    'invoice-stats': 'Get Invoice Statistics',
+    'by-category': 'Get Receipts by Category',
+}
+
+LOGIN_MESSAGE = 'POST /api/auth/login'
+MIN_SAMPLES = 5  # fewer cold passes (accounts x rounds) than this: no verdict
+CACHE_HEADERS = ('x-cache', 'x-cache-status', 'cf-cache-status')
+
+PROBE_COLUMNS = [
+    ('Endpoint', 'endpoint', '{}'),
+    ('Params', 'params', '{}'),
+    ('Cold n', 'cold_count', '{}'),
+    ('Cold p50', 'cold_p50_ms', '{:.2f}'),
+    ('Warm p50', 'warm_p50_ms', '{:.2f}'),
+    ('Warm p95', 'warm_p95_ms', '{:.2f}'),
+    ('304 p50', 'revalidate_p50_ms', '{}'),
+    ('Speedup', 'speedup', '{:.2f}x'),
+    ('p', 'p_value', '{:.2g}'),
+    ('KB', 'kb', '{:.1f}'),
+    ('Verdict', 'verdict', '{}'),
+]
+
+REPLAY_COLUMNS = [
+    ('Endpoint', 'name', '{}'),
+    ('Count', 'requests', '{}'),
+    ('Fail', 'failures', '{}'),
+    ('p50 ms', 'p50_ms', '{:.2f}'),
+    ('p95 ms', 'p95_ms', '{:.2f}'),
+    ('Max ms', 'max_ms', '{:.2f}'),
+]
+
+
+def default_combinations(today):
+    """{endpoint: [params, ...]} covering the periods and ranges the frontend offers"""
+    ranges = [
+        (today - timedelta(days=29), today),
+        (today.replace(day=1), today),
+        (today.replace(month=1, day=1), today),
+    ]
+    dated = [{'start_date': start.isoformat(), 'end_date': end.isoformat()} for start, end in ranges]
+    return {
+        'overview': [{}, {'period': 'week'}, {'period': 'month'}, {'period': 'year'}] + dated,
+        'trends': [{}, {'period': '30'}, {'period': '90'}],
+        'financial': [{}] + dated,
+        'invoice-stats': [{}] + dated,
+        # Dated by-category requests fail on the missing receipt_date column (see `analytics`)
+        'by-category': [{}, {'is_business_expense': 'true'}, {'is_business_expense': 'false'}],
+    }
+
+
+def load_combinations(args):
+    """Combinations for the selected endpoints, with --params replacing the built-in ones"""
+    combinations = default_combinations(date.fromisoformat(args.today) if args.today else date.today())
+    if args.params:
+        with open(args.params, 'r') as f:
+            custom = json.load(f)
+        unknown = set(custom) - set(ENDPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown endpoints in {args.params}: {', '.join(sorted(unknown))}")
+        combinations.update({
+            endpoint: [{key: str(value) for key, value in params.items()} for params in entries]
+            for endpoint, entries in custom.items()
+        })
+    endpoints = args.endpoint or list(ENDPOINTS)
+    return [(endpoint, params) for endpoint in endpoints for params in combinations[endpoint]]
+
+
+def params_label(params):
+    return urlencode(params) if params else '-'
+
+
+class Combination:
+    """Cold, warm and revalidation latencies for one endpoint and query"""
+
+    def __init__(self, endpoint, params):
+        self.endpoint = endpoint
+        self.params = params
+        self.cold = LatencyHistogram()
+        self.warm = LatencyHistogram()
+        self.revalidate = LatencyHistogram()
+        self.passes = []  # (cold seconds, median warm seconds) per account and round
+        self.failures = {}
+        self.digests = {}  # account -> digest of the last body, to see whether repeats change
+        self.varies = False
+        self.cache_hits = 0
+        self.size = 0
+
+    def fail(self, reason):
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def observe(self, account, response):
+        self.size = len(response.body)
+        digest = hashlib.blake2b(response.body, digest_size=16).digest()
+        previous = self.digests.get(account)
+        if previous is not None and previous != digest:
+            self.varies = True
+        self.digests[account] = digest
+        if any(response.headers.get(header, '').upper().startswith('HIT') for header in CACHE_HEADERS):
+            self.cache_hits += 1
+
+    def summary(self, min_ms, speedup, alpha):
+        cold_p50 = self.cold.percentile(50) / 1000
+        warm_p50 = self.warm.percentile(50) / 1000
+        ratio = cold_p50 / warm_p50 if warm_p50 else 0.0
+        if len(self.passes) >= MIN_SAMPLES:
+            # One pass per account and round: are cold requests slower than that pass's warm ones?
+            cold, warm = zip(*self.passes)
+            p_value = mann_whitney(warm, cold)
+        else:
+            p_value = float('nan')
+        if self.failures:
+            verdict = '❌ ' + ', '.join(f'{reason} x{n}' for reason, n in self.failures.items())
+        elif not self.warm.count:
+            verdict = 'no samples'
+        elif len(self.passes) < MIN_SAMPLES:
+            verdict = 'insufficient samples'
+        elif ratio >= speedup and p_value < alpha:
+            verdict = '✅ cached'
+        elif self.varies:
+            verdict = '⚠️ varies'
+        elif warm_p50 >= min_ms:
+            verdict = '💡 cache candidate'
+        else:
+            verdict = ''
+        return {
+            'endpoint': self.endpoint,
+            'params': params_label(self.params),
+            'query': self.params,
+            'cold_count': self.cold.count,
+            'cold_p50_ms': cold_p50,
+            'warm_count': self.warm.count,
+            'warm_p50_ms': warm_p50,
+            'warm_p95_ms': self.warm.percentile(95) / 1000,
+            'revalidate_p50_ms': f'{self.revalidate.percentile(50) / 1000:.2f}' if self.revalidate.count else '-',
+            'speedup': ratio,
+            'p_value': p_value,
+            'kb': self.size / 1024,
+            'cache_hits': self.cache_hits,
+            'failures': self.failures,
+            'verdict': verdict,
+        }
+
+
+class DashboardClient(ApiClient):
+    """Authenticated GETs of the dashboard reports, shared by probe and replay"""
+
+    def url(self, endpoint, params=None):
+        return super().url(ENDPOINTS[endpoint], params)
+
+
+class Prober:
+    """Cold, warm and conditional requests for every combination and account"""
+
+    def __init__(self, dashboard, accounts, combinations, repeat=5, rounds=1, gap=0.0, seed=None):
+        self.dashboard = dashboard
+        self.accounts = accounts
+        self.combinations = [Combination(endpoint, params) for endpoint, params in combinations]
+        self.repeat = repeat
+        self.rounds = rounds
+        self.gap = gap
+        self.seed = seed
+        self.elapsed = 0.0
+
+    async def _probe(self, account, combination):
+        url = self.dashboard.url(combination.endpoint, combination.params)
+        seconds, response = await self.dashboard.get(account, url)
+        if seconds is None:
+            combination.fail(response)
+            return
+        cold = seconds
+        combination.cold.record_seconds(seconds)
+        combination.observe(account[0], response)
+        warm = []
+        for _ in range(self.repeat):
+            seconds, response = await self.dashboard.get(account, url)
+            if seconds is None:
+                combination.fail(response)
+                return
+            warm.append(seconds)
+            combination.warm.record_seconds(seconds)
+            combination.observe(account[0], response)
+        if warm:
+            combination.passes.append((cold, sorted(warm)[len(warm) // 2]))
+        etag = response.headers.get('etag')
+        if etag:
+            for _ in range(self.repeat):
+                seconds, response = await self.dashboard.get(account, url, [('If-None-Match', etag)])
+                if seconds is not None and response.status == 304:
+                    combination.revalidate.record_seconds(seconds)
+
+    async def _account(self, account, rng, semaphore):
+        async with semaphore:
+            # Log in before the first cold request so its time is not part of it
+            try:
+                await self.dashboard.token(account)
+            except (StepFailed, *NETWORK_ERRORS):
+                pass  # reported by the first request
+            order = list(self.combinations)
+            rng.shuffle(order)
+            for combination in order:
+                await self._probe(account, combination)
+
+    async def run(self):
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.dashboard.concurrency)
+        async with self.dashboard:
+            for round_number in range(self.rounds):
+                if round_number and self.gap:
+                    await asyncio.sleep(self.gap)
+                await asyncio.gather(*(
+                    self._account(account, random.Random(f'{self.seed}:{round_number}:{index}'), semaphore)
+                    for index, account in enumerate(self.accounts)
+                ))
+        self.elapsed = time.perf_counter() - start
+
+
+def load_login_times(paths):
+    """Login timestamps from winston JSON logs (lines whose message is the login route)"""
+    times = []
+    for path in paths:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict) or not str(entry.get('message', '')).startswith(LOGIN_MESSAGE):
+                    continue
+                try:
+                    times.append(datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S'))
+                except (KeyError, TypeError, ValueError):
+                    continue
+    return sorted(times)
+
+
+def peak_hour(times):
+    """(hour, share of logins) of the busiest hour of the day"""
+    counts = [0] * 24
+    for moment in times:
+        counts[moment.hour] += 1
+    hour = max(range(24), key=counts.__getitem__)
+    return hour, counts[hour] / len(times)
+
+
+def recorded_offsets(times, count, over, from_hour=None):
+    """`count` start offsets in [0, over] following the recorded time-of-day distribution"""
+    seconds = sorted(
+        (moment.hour - (from_hour or 0)) % 24 * 3600 + moment.minute * 60 + moment.second for moment in times
+    )
+    first, last = seconds[0], seconds[-1]
+    span = last - first or 1
+    # Quantiles of the folded day, so the ramp has the recorded shape however many accounts there are
+    picks = [seconds[min(int((i + 0.5) / count * len(seconds)), len(seconds) - 1)] for i in range(count)]
+    return [(pick - first) / span * over for pick in picks]
+
+
+def synthesized_offsets(count, over, seed=None):
+    """Poisson arrivals: `count` uniform start offsets in [0, over]"""
+    rng = random.Random(seed)
+    return sorted(rng.uniform(0, over) for _ in range(count))
+
+
+class Replayer:
+    """Log each account in at its offset and load its dashboard reports"""
+
+    def __init__(self, dashboard, accounts, combinations, offsets):
+        self.dashboard = dashboard
+        self.accounts = accounts
+        self.combinations = combinations
+        self.offsets = offsets
+        self.stats = {endpoint: RequestStats(endpoint) for endpoint, _ in combinations}
+        self.warmed = 0
+        self.elapsed = 0.0
+
+    async def _warm(self, account, semaphore):
+        async with semaphore:
+            failed = False
+            for endpoint, params in self.combinations:
+                seconds, response = await self.dashboard.get(account, self.dashboard.url(endpoint, params))
+                if seconds is None:
+                    errors = self.stats[endpoint].errors
+                    errors[response] = errors.get(response, 0) + 1
+                    failed = True
+                else:
+                    self.stats[endpoint].record(seconds, response.status)
+            if not failed:
+                self.warmed += 1
+
+    async def run(self):
+        semaphore = asyncio.Semaphore(self.dashboard.concurrency)
+        async with self.dashboard:
+            start = time.perf_counter()
+            tasks = []
+            for account, offset in zip(self.accounts, self.offsets):
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(self._warm(account, semaphore)))
+            await asyncio.gather(*tasks)
+            self.elapsed = time.perf_counter() - start
+
+
+def add_common_arguments(parser):
+    add_api_arguments(parser)
+    parser.add_argument('--endpoint', action='append', default=[], choices=list(ENDPOINTS),
+                        help='Only this endpoint (repeatable, default: all)')
+    parser.add_argument('--params', metavar='FILE',
+                        help='JSON {endpoint: [{param: value}, ...]} replacing the built-in combinations')
+    parser.add_argument('--today', metavar='YYYY-MM-DD', help='Reference day for the built-in date ranges')
+    parser.add_argument('-c', '--concurrency', type=int, default=1,
+                        help='Accounts handled at once (default: 1, so requests do not slow each other down)')
+    parser.add_argument('--seed', type=int, help='Seed for the request order and synthesized arrivals')
+    parser.add_argument('--json', dest='json_output', help='Also write the report to this file')
+
+
+def add_arguments(parser):
+    actions = parser.add_subparsers(dest='action', required=True)
+    probe = actions.add_parser('probe', help='Measure cold and warm latency per endpoint and query')
+    add_common_arguments(probe)
+    probe.add_argument('--repeat', type=int, default=5,
+                       help='Warm (and conditional) requests after each cold one (default: 5)')
+    probe.add_argument('--rounds', type=int, default=MIN_SAMPLES,
+                       help='Times to probe every account; each round starts with a cold request. Verdicts need '
+                            f'{MIN_SAMPLES} accounts x rounds (default: {MIN_SAMPLES})')
+    probe.add_argument('--gap', type=float, default=0.0,
+                       help='Seconds between rounds; set above the cache TTL to start each round cold')
+    probe.add_argument('--min-ms', type=float, default=20.0,
+                       help='Warm p50 above which an uncached combination is a cache candidate (default: 20)')
+    probe.add_argument('--speedup', type=float, default=2.0,
+                       help='Cold/warm ratio that counts as served from a cache (default: 2)')
+    probe.add_argument('--alpha', type=float, default=0.01, help='Significance level for the speedup (default: 0.01)')
+    probe.add_argument('--expect-cache', action='store_true',
+                       help='Exit 1 unless every combination is served from a cache')
+
+    replay = actions.add_parser('replay', help='Warm the dashboard for every account ahead of peak hours')
+    add_common_arguments(replay)
+    replay.add_argument('--log', action='append', default=[], metavar='FILE',
+                        help='winston JSON log whose login times shape the replay (repeatable); '
+                             'without it arrivals are synthesized')
+    replay.add_argument('--from-hour', type=int, metavar='H',
+                        help='Hour the recorded day starts at (default: midnight); e.g. 5 so a 06:00-10:00 '
+                             'ramp is not split across midnight')
+    replay.add_argument('--over', type=float, default=60.0,
+                        help='Seconds to spread the logins over (default: 60)')
+    replay.add_argument('--all-params', action='store_true',
+                        help='Warm every combination instead of the parameterless first screen')
+
+
+def _dashboard(args):
+    collection = load_collection(args.collection)
+    variables = resolve_variables(collection, parse_variables(args.var), args.base_url)
+    accounts = load_accounts(args, collection)
+    dashboard = DashboardClient(collection, variables, concurrency=args.concurrency, timeout=args.timeout)
+    for endpoint in args.endpoint or ENDPOINTS:
+        dashboard.url(endpoint)  # ValueError while {{baseUrl}} is unset
+    return dashboard, accounts
+
+
+def _write_json(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'💾 Report written to {path}')
+
+
+def run_probe(args, dashboard, accounts, combinations):
+    prober = Prober(dashboard, accounts, combinations, repeat=args.repeat, rounds=args.rounds,
+                    gap=args.gap, seed=args.seed)
+    print(f'🚀 Probing {len(combinations)} endpoint/query combinations for {len(accounts)} '
+          f'account{"s" if len(accounts) != 1 else ""} ({args.rounds} round{"s" if args.rounds != 1 else ""}, '
+          f'{args.repeat} warm requests each)')
+    asyncio.run(prober.run())
+    rows = [c.summary(args.min_ms, args.speedup, args.alpha) for c in prober.combinations]
+    rows.sort(key=lambda row: -row['warm_p50_ms'])
+    print(format_table(rows, PROBE_COLUMNS))
+    print()
+
+    candidates = [row for row in rows if row['verdict'] == '💡 cache candidate']
+    cached = [row for row in rows if row['verdict'] == '✅ cached']
+    if candidates:
+        saved = sum(row['warm_p50_ms'] for row in candidates)
+        print(f'💡 {len(candidates)} combinations recompute {saved:.0f}ms of identical responses per repeat '
+              f'(warm p50 >= {args.min_ms:.0f}ms); a cache keyed by account and query would serve them')
+    revalidated = [row for row in rows if row['revalidate_p50_ms'] != '-' and row['verdict'] != '✅ cached']
+    if revalidated and sum(float(row['revalidate_p50_ms']) for row in revalidated) > \
+            0.5 * sum(row['warm_p50_ms'] for row in revalidated):
+        print('📊 304s cost about as much as full responses: the ETag is computed from the finished report, '
+              'so If-None-Match saves the transfer but not the query')
+    if any(row['verdict'] == '⚠️ varies' for row in rows):
+        print('⚠️  Some responses changed between repeats: data was written during the probe, or the report is not deterministic')
+    if cached:
+        hits = sum(row['cache_hits'] for row in cached)
+        print(f"✅ {len(cached)}/{len(rows)} combinations served from a cache"
+              f"{f' ({hits} responses marked HIT)' if hits else ''}")
+    print(f'📊 {sum(r["cold_count"] + r["warm_count"] for r in rows)} requests in {prober.elapsed:.2f}s')
+
+    if args.json_output:
+        _write_json(args.json_output, {'elapsed_s': prober.elapsed, 'combinations': rows})
+    if any(row['failures'] for row in rows):
+        return 1
+    insufficient = [row for row in rows if row['verdict'] == 'insufficient samples']
+    if insufficient:
+        print(f'⚠️  {len(insufficient)} combinations have fewer than {MIN_SAMPLES} cold samples: '
+              f'raise --rounds or add --account for a verdict')
+    if args.expect_cache and len(cached) < len(rows):
+        print(f'❌ {len(rows) - len(cached)} combinations are not shown to be served from a cache')
+        return 1
+    return 0
+
+
+def run_replay(args, dashboard, accounts, combinations):
+    if not args.all_params:
+        combinations = [(endpoint, params) for endpoint, params in combinations if not params]
+    if args.log:
+        try:
+            times = load_login_times(args.log)
+        except OSError as error:
+            print(f'❌ {error}')
+            return 1
+        if not times:
+            print(f"❌ No '{LOGIN_MESSAGE}' lines in {', '.join(args.log)}")
+            return 1
+        hour, share = peak_hour(times)
+        print(f'📊 {len(times)} recorded logins; the busiest hour is {hour:02d}:00-{(hour + 1) % 24:02d}:00 '
+              f'({share:.0%} of logins), so warm before {hour:02d}:00')
+        offsets = recorded_offsets(times, len(accounts), args.over, args.from_hour)
+    else:
+        offsets = synthesized_offsets(len(accounts), args.over, args.seed)
+    print(f'🚀 Warming {len(combinations)} reports for {len(accounts)} '
+          f'account{"s" if len(accounts) != 1 else ""} over {args.over:g}s')
+    replayer = Replayer(dashboard, accounts, combinations, offsets)
+    asyncio.run(replayer.run())
+
+    rows = [stats.summary(replayer.elapsed) for stats in replayer.stats.values()]
+    print(format_table(rows, REPLAY_COLUMNS))
+    print()
+    for stats in replayer.stats.values():
+        for reason, n in stats.errors.items():
+            print(f'⚠️  {stats.name}: {reason} x{n}')
+    tokens = dashboard.token_cache
+    print(f'🔑 {tokens.logins} logins, {tokens.refreshes} refreshes')
+    print(f"{'✅' if replayer.warmed == len(accounts) else '⚠️ '} Warmed {replayer.warmed}/{len(accounts)} accounts "
+          f'in {replayer.elapsed:.1f}s')
+    if args.json_output:
+        _write_json(args.json_output, {'elapsed_s': replayer.elapsed, 'warmed': replayer.warmed,
+                                       'accounts': len(accounts), 'endpoints': rows})
+    return 0 if replayer.warmed == len(accounts) else 1
+
+
+def run(args):
+    try:
+        combinations = load_combinations(args)
+        dashboard, accounts = _dashboard(args)
+    except (OSError, ValueError) as error:
+        print(f'❌ {error}')
+        return 1
+    if args.action == 'probe':
+        return run_probe(args, dashboard, accounts, combinations)
+    return run_replay(args, dashboard, accounts, combinations)
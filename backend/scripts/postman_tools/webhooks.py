@@ -0,0 +1,270 @@
+"""
+Synthetic n8n webhook payloads and an ingest benchmark for /api/webhooks/*.
+
+Payloads come from PayloadFactory in payloads.py, deterministic for a given
+seed. They are streamed one at a time, both when writing JSONL and when
+benchmarking, so the number of payloads is not bounded by memory.
+
+The benchmark is open loop: request i is due at start + i / rate whether or
+not earlier requests have finished, and its latency is measured from that
+due time, so queueing in the API shows up in the percentiles instead of
+silently lowering the request rate.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import sys
+import time
+from datetime import date
+
+from .client import HTTPClient
+from .collection import check_resolved, load_collection, resolve_variables
+from .loadgen import SUMMARY_COLUMNS
+from .payloads import WEBHOOKS, PayloadFactory
+from .results import add_save_arguments, save_from_args
+from .stats import RequestStats, format_table
+
+
+def load_documents(path):
+    """
+    Read document ids to target from a JSON/JSONL export of /api/documents
+    (objects with id and document_type) or a text file of `type,id` lines.
+    """
+    documents = []
+    with open(path, 'r') as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith('[') or stripped.startswith('{"success"'):
+        data = json.loads(text)
+        records = data['data'] if isinstance(data, dict) else data
+        if isinstance(records, dict):
+            records = records.get('documents', [])
+        return [(r['id'], r.get('document_type')) for r in records]
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('{'):
+            record = json.loads(line)
+            documents.append((record['id'], record.get('document_type')))
+        else:
+            document_type, _, document_id = line.rpartition(',')
+            documents.append((document_id.strip(), document_type.strip() or None))
+    return documents
+
+
+def read_jsonl(path):
+    """Yield (webhook, payload) pairs from a file written by `generate`"""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record['webhook'], record['payload']
+
+
+def write_jsonl(pairs, out):
+    """Write (webhook, payload) pairs as JSONL, one at a time; returns the count"""
+    written = 0
+    for webhook, payload in pairs:
+        out.write(json.dumps({'webhook': webhook, 'payload': payload}, separators=(',', ':')) + '\n')
+        written += 1
+    return written
+
+
+def signature_headers(body, secret):
+    """X-Webhook-Signature / X-Webhook-Timestamp as described in docs/webhooks.md"""
+    signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return [
+        ('X-Webhook-Signature', signature),
+        ('X-Webhook-Timestamp', str(int(time.time() * 1000))),
+    ]
+
+
+class WebhookBench:
+    """Fire webhook payloads at a fixed rate over a pooled client"""
+
+    def __init__(self, base_url, pairs, rate=None, connections=20, duration=None,
+                 timeout=30.0, secret=None, max_in_flight=None):
+        self.base_url = base_url.rstrip('/')
+        self.pairs = pairs
+        self.rate = rate
+        self.connections = connections
+        self.duration = duration
+        self.timeout = timeout
+        self.secret = secret
+        self.max_in_flight = max_in_flight or connections * 4
+        self.stats = {name: RequestStats(name) for name in WEBHOOKS}
+        self.late = 0
+        self.bytes_sent = 0
+        self.elapsed = 0.0
+        self.connects = 0
+
+    async def _send(self, client, webhook, body, due, slots):
+        stats = self.stats[webhook]
+        headers = [('Content-Type', 'application/json')]
+        if self.secret:
+            headers.extend(signature_headers(body, self.secret))
+        try:
+            response = await client.request('POST', f'{self.base_url}/api/webhooks/{webhook}', headers, body)
+        except Exception as error:
+            stats.record_error(error)
+        else:
+            stats.record(time.perf_counter() - due, response.status)
+        finally:
+            slots.release()
+
+    async def run(self):
+        client = HTTPClient(limit_per_host=self.connections, timeout=self.timeout)
+        slots = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        try:
+            for i, (webhook, payload) in enumerate(self.pairs):
+                due = start + i / self.rate if self.rate else time.perf_counter()
+                if deadline is not None and due >= deadline:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.rate and slots.locked():
+                    # Every slot is busy: this request leaves after its due time
+                    self.late += 1
+                await slots.acquire()
+                if not self.rate:
+                    due = time.perf_counter()
+                body = json.dumps(payload).encode('utf-8')
+                self.bytes_sent += len(body)
+                task = asyncio.ensure_future(self._send(client, webhook, body, due, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self.connects = client.connects
+            await client.close()
+        return self.report()
+
+    def report(self):
+        rows = [stats.summary(self.elapsed) for stats in self.stats.values() if stats.latency.count or stats.errors]
+        total = sum(row['requests'] + sum(row['errors'].values()) for row in rows)
+        failures = sum(row['failures'] for row in rows)
+        accepted = sum(
+            n for row in rows for status, n in row['statuses'].items() if 200 <= int(status) < 300
+        )
+        return {
+            'target_rate': self.rate,
+            'elapsed_s': self.elapsed,
+            'requests': total,
+            'rps': total / self.elapsed if self.elapsed else 0.0,
+            'accepted_per_s': accepted / self.elapsed if self.elapsed else 0.0,
+            'error_rate': failures / total if total else 0.0,
+            'late': self.late,
+            'mb_sent': self.bytes_sent / 1e6,
+            'connections_opened': self.connects,
+            'endpoints': rows,
+        }
+
+
+def add_arguments(parser):
+    subparsers = parser.add_subparsers(dest='webhook_command', required=True)
+
+    generate = subparsers.add_parser('generate', help='Write synthetic payloads as JSONL')
+    bench = subparsers.add_parser('bench', help='Fire payloads at the webhook endpoints at a fixed rate')
+    for sub in (generate, bench):
+        sub.add_argument('--webhook', action='append', default=[], choices=list(WEBHOOKS),
+                         help='Only generate this webhook (repeatable, default: all five)')
+        sub.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+        sub.add_argument('--start-date', type=date.fromisoformat, default=date(2025, 1, 1),
+                         help='First business date used in payloads (default: 2025-01-01)')
+        sub.add_argument('--documents', help='Target these documents (JSON/JSONL export or type,id lines)')
+
+    generate.add_argument('-n', '--count', type=int, default=1000, help='Payloads to write')
+    generate.add_argument('-o', '--out', help='Output file (default: stdout)')
+
+    bench.add_argument('--base-url', help='API base URL (default: the collection\'s baseUrl)')
+    bench.add_argument('--input', help='Replay a JSONL file from `generate` instead of generating on the fly')
+    bench.add_argument('-r', '--rate', type=float, default=100.0,
+                       help='Requests per second; 0 sends as fast as the connections allow')
+    bench.add_argument('-n', '--count', type=int, help='Stop after this many requests')
+    bench.add_argument('-d', '--duration', type=float, help='Stop after this many seconds')
+    bench.add_argument('-c', '--connections', type=int, default=20, help='Pooled connections')
+    bench.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    bench.add_argument('--secret', help='Sign requests with this N8N_WEBHOOK_SECRET')
+    bench.add_argument('--json', dest='json_output', help='Also write the report to this file')
+    add_save_arguments(bench)
+
+
+def _pairs(args):
+    if getattr(args, 'input', None):
+        pairs = read_jsonl(args.input)
+        if args.webhook:
+            pairs = ((w, p) for w, p in pairs if w in args.webhook)
+    else:
+        documents = load_documents(args.documents) if args.documents else None
+        factory = PayloadFactory(args.seed, start=args.start_date)
+        pairs = factory.stream(None, args.webhook or None, documents)
+    if args.count is not None:
+        pairs = (pair for _, pair in zip(range(args.count), pairs))
+    return pairs
+
+
+def print_report(report):
+    print(format_table(report['endpoints'], SUMMARY_COLUMNS))
+    print()
+    for row in report['endpoints']:
+        statuses = ', '.join(f'{status} x{n}' for status, n in row['statuses'].items())
+        errors = ', '.join(f'{name} x{n}' for name, n in row['errors'].items())
+        print(f"   {row['name']}: {', '.join(filter(None, [statuses, errors]))}")
+    target = f"target {report['target_rate']:.0f}/s" if report['target_rate'] else 'unpaced'
+    print(f"📊 {report['requests']} webhooks in {report['elapsed_s']:.2f}s ({report['rps']:.1f} req/s, {target}), "
+          f"{report['accepted_per_s']:.1f} accepted/s, {report['error_rate']:.1%} errors, "
+          f"{report['mb_sent']:.1f} MB sent over {report['connections_opened']} connections")
+    if report['late']:
+        print(f"⚠️  {report['late']} requests left late because every in-flight slot was busy")
+
+
+def run(args):
+    if args.webhook_command == 'generate':
+        pairs = _pairs(args)
+        if args.out:
+            with open(args.out, 'w') as f:
+                written = write_jsonl(pairs, f)
+            print(f"✅ Wrote {written} payloads to {args.out}")
+        else:
+            write_jsonl(pairs, sys.stdout)
+        return 0
+
+    if args.count is None and args.duration is None and not args.input:
+        args.duration = 10.0
+    try:
+        variables = resolve_variables(load_collection(args.collection), base_url=args.base_url)
+        base_url = check_resolved(variables.get('baseUrl', '{{baseUrl}}'), 'baseUrl')
+    except (OSError, ValueError) as error:
+        print(f'❌ {error}')
+        return 1
+    bench = WebhookBench(
+        base_url,
+        _pairs(args),
+        rate=args.rate or None,
+        connections=args.connections,
+        duration=args.duration,
+        timeout=args.timeout,
+        secret=args.secret,
+    )
+    print(f"🚀 Sending webhooks to {base_url} "
+          f"({'%g/s' % args.rate if args.rate else 'unpaced'}, {args.connections} connections)...")
+    report = asyncio.run(bench.run())
+    print_report(report)
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(report, f, indent=2)
+    save_from_args(args, 'webhooks', bench.stats.values(), report)
+    failures = sum(row['failures'] for row in report['endpoints'])
+    if failures:
+        print(f"❌ {failures} of {report['requests']} webhooks failed")
+        return 1
+    return 0
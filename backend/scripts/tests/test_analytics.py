@@ -0,0 +1,166 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from postman_tools.analytics import Dataset, compare, normalize, parse_float, parse_int, parse_time
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+FIXTURE = os.path.join(FIXTURES, 'account.json')
+# Responses of the controllers for the same account, with the clock at "now"
+with open(os.path.join(FIXTURES, 'api_responses.json')) as f:
+    RECORDED = json.load(f)
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    with open(FIXTURE) as f:
+        return Dataset(**json.load(f))
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('100.50', 100.5),
+    ('12abc', 12.0),
+    ('1e2', 100.0),
+    (' 7.5 ', 7.5),
+    ('.5', 0.5),
+    ('-5.5', -5.5),
+    ('abc', 0.0),
+    ('', 0.0),
+    (None, 0.0),
+    (False, 0.0),
+    (float('nan'), 0.0),
+    (3, 3.0),
+])
+def test_parse_float_follows_js_parse_float_or_zero(value, expected):
+    assert parse_float(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('30', 30),
+    ('14days', 14),
+    ('0', 7),
+    ('abc', 7),
+    (None, 7),
+])
+def test_parse_int_follows_js_parse_int_or_default(value, expected):
+    assert parse_int(value, 7) == expected
+
+
+def test_invoice_stats_groups_currencies_in_first_seen_order(dataset):
+    stats = dataset.invoice_stats()
+    assert stats['total_invoices'] == 5
+    assert stats['total_amount'] == pytest.approx(207.0)
+    assert stats['by_status'] == {'pending': 2, 'paid': 2, 'overdue': 1}
+    assert stats['average_amount'] == pytest.approx(207.0 / 5)
+    # currency || 'USD': null and '' both fall back
+    assert list(stats['by_currency']) == ['EUR', 'USD', 'GBP']
+    assert stats['by_currency'] == pytest.approx({'EUR': 200.5, 'USD': 12.0, 'GBP': -5.5})
+
+
+def test_invoice_stats_date_range_is_inclusive_and_skips_undated(dataset):
+    stats = dataset.invoice_stats('2026-02-01', '2026-02-20')
+    assert stats['total_invoices'] == 2
+    assert stats['total_amount'] == pytest.approx(112.0)
+    assert stats['by_currency'] == pytest.approx({'USD': 12.0, 'EUR': 100.0})
+
+
+def test_financial_counts_every_status(dataset):
+    financial = dataset.financial(parse_time('2026-03-10T12:00:00Z'))
+    assert financial['totalInvoiceAmount'] == pytest.approx(207.0)
+    assert financial['totalReceiptAmount'] == pytest.approx(133.75)
+    assert financial['pendingInvoices'] == 2
+    assert financial['byStatus'] == {'paid': 2, 'pending': 2, 'overdue': 1, 'cancelled': 0}
+
+
+def test_by_category_sorts_by_total_and_keeps_receipt_order(dataset):
+    categories = dataset.by_category()
+    assert [(c['category'], c['count']) for c in categories] == [('travel', 2), ('food', 2), ('uncategorized', 1)]
+    assert [c['total_amount'] for c in categories] == pytest.approx([101.0, 27.75, 5.0])
+    # Fields the receipt does not have are left out, like undefined in JSON.stringify
+    assert categories[0]['receipts'] == [
+        {'id': 'r3', 'merchant_name': 'Airline', 'total_amount': '100'},
+        {'id': 'r5', 'merchant_name': 'Taxi', 'total_amount': 1},
+    ]
+
+
+def test_by_category_business_filter(dataset):
+    categories = dataset.by_category(is_business_expense='false', rows=False)
+    assert categories == [
+        {'category': 'food', 'count': 1, 'total_amount': 7.5},
+        {'category': 'uncategorized', 'count': 1, 'total_amount': 5.0},
+    ]
+
+
+def test_monthly_reports_cover_every_dated_month(dataset):
+    reports = dataset.monthly_reports()
+    assert sorted(reports) == [('2026', '01'), ('2026', '02')]
+
+    january = reports[('2026', '01')]
+    summary = january['summary']
+    assert summary['month'] == '2026-01'
+    assert summary['total_receipts'] == 3
+    assert summary['total_amount'] == pytest.approx(125.25)
+    assert (summary['business_expenses'], summary['personal_expenses']) == (2, 1)
+    # Breakdowns are keyed in purchase date order within the month
+    assert list(summary['by_category']) == ['travel', 'food', 'uncategorized']
+    assert summary['by_payment_method'] == pytest.approx({'cash': 100.0, 'card': 20.25, 'unknown': 5.0})
+    assert [r['id'] for r in january['receipts']] == ['r3', 'r1', 'r2']
+
+    assert reports[('2026', '02')]['summary']['total_amount'] == pytest.approx(7.5)
+
+
+def test_monthly_report_pads_the_month_and_handles_empty_months(dataset):
+    assert dataset.monthly_report('2026', '1', rows=False)['summary']['total_receipts'] == 3
+    empty = dataset.monthly_report('2026', '3')
+    assert empty['summary']['month'] == '2026-03'
+    assert empty['summary']['total_receipts'] == 0
+    assert empty['summary']['by_category'] == {}
+    assert empty['receipts'] == []
+
+
+def test_trends_buckets_uploads_by_day(dataset):
+    trends = dataset.trends(parse_time('2026-03-10T12:00:00Z'), '3')['trends']
+    assert trends == [
+        {'date': '2026-03-08', 'uploads': 1, 'processed': 1},
+        {'date': '2026-03-09', 'uploads': 1, 'processed': 0},
+        {'date': '2026-03-10', 'uploads': 1, 'processed': 1},
+    ]
+
+
+def offline(dataset, report, params):
+    now_ms = parse_time(RECORDED['now'])
+    if report == 'overview':
+        return dataset.overview(now_ms, **params)
+    if report == 'trends':
+        return dataset.trends(now_ms, **params)
+    if report == 'financial':
+        return dataset.financial(now_ms, **params)
+    if report == 'invoice-stats':
+        return dataset.invoice_stats(**params)
+    if report == 'by-category':
+        return dataset.by_category(**params)
+    return dataset.monthly_report(params['year'], params['month'])
+
+
+@pytest.mark.parametrize('recorded', RECORDED['responses'],
+                         ids=[f"{r['report']}-{'-'.join(r['params'].values()) or 'all'}" for r in RECORDED['responses']])
+def test_offline_reports_match_the_recorded_api_responses(dataset, recorded):
+    report, expected = recorded['report'], recorded['response']['data']
+    computed = offline(dataset, report, recorded['params'])
+    assert compare(normalize(report, expected), normalize(report, computed), 1e-9) == []
+
+
+def test_compare_reports_differing_fields():
+    expected = RECORDED['responses'][0]['response']['data']
+    changed = json.loads(json.dumps(expected))
+    changed['financial']['invoices']['total_amount'] += 0.01
+    del changed['summary']['documents_by_type']['resume']
+    changed['recent_activity'].pop()
+    assert compare(expected, changed, 1e-9) == [
+        'data.summary.documents_by_type.resume: missing',
+        'data.financial.invoices.total_amount: 207 != 207.01',
+        'data.recent_activity: 4 items != 3',
+    ]
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from postman_tools.client import HTTPClient, HTTPError
+
+
+async def serve(received):
+    """Answer the first request on each connection, then drop the connection on the next one"""
+
+    async def handle(reader, writer):
+        answered = False
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            length = next((int(line.split(':', 1)[1]) for line in lines if line.lower().startswith('content-length')), 0)
+            await reader.readexactly(length)
+            received.append(lines[0].split(' ', 1)[0])
+            if answered:
+                writer.close()
+                return
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+            await writer.drain()
+            answered = True
+
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+async def second_request_on_a_dropped_connection(method):
+    received = []
+    server = await serve(received)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/api/upload"
+    client = HTTPClient(limit_per_host=1, timeout=5)
+    try:
+        first = await client.request('GET', url)
+        assert first.status == 200
+        try:
+            response = await client.request(method, url, body=b'{}')
+        except HTTPError as error:
+            response = error
+        return response, received, client.connects
+    finally:
+        await client.close()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.parametrize('method', ['GET', 'PUT', 'DELETE'])
+def test_idempotent_requests_are_retried_on_a_fresh_connection(method):
+    response, received, connects = asyncio.run(second_request_on_a_dropped_connection(method))
+    assert response.status == 200
+    assert received == ['GET', method, method]
+    assert connects == 2
+
+
+@pytest.mark.parametrize('method', ['POST', 'PATCH'])
+def test_other_requests_are_not_sent_twice(method):
+    response, received, connects = asyncio.run(second_request_on_a_dropped_connection(method))
+    assert isinstance(response, HTTPError)
+    assert received == ['GET', method]
+    assert connects == 1
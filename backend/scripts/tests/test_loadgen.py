@@ -0,0 +1,31 @@
+import argparse
+
+from postman_tools.collection import load_collection, unset_path_variables
+from postman_tools.loadgen import select_specs
+
+
+def args(**overrides):
+    values = dict(collection=None, var=[], base_url=None, methods='GET', folder=[], names=[])
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def item(url):
+    return {'name': 'Get Invoice', 'request': {'method': 'GET', 'url': {'raw': url}}}
+
+
+def test_unset_path_variables_ignores_the_origin_and_the_query():
+    url = '{{baseUrl}}/api/invoices/{{invoiceId}}/export/{{format}}?page={{page}}'
+    assert unset_path_variables(item(url), {'invoiceId': '', 'format': 'pdf'}) == ['invoiceId']
+    assert unset_path_variables(item(url), {'invoiceId': ' 7 ', 'format': 'pdf'}) == []
+    assert unset_path_variables(item(url), {}) == ['invoiceId', 'format']
+
+
+def test_requests_needing_an_empty_id_are_skipped_with_the_var_to_pass(capsys):
+    collection = load_collection()
+    specs = select_specs(args(names=['Get Invoice', 'List Invoices']), collection)
+    assert [spec.name for spec in specs] == ['List Invoices']
+    assert '--var invoiceId=<value>' in capsys.readouterr().out
+
+    specs = select_specs(args(names=['Get Invoice'], var=['invoiceId=abc']), collection)
+    assert [spec.url.rsplit('/', 2)[-2:] for spec in specs] == [['invoices', 'abc']]
@@ -0,0 +1,106 @@
+import copy
+import importlib.util
+import json
+import os
+
+from postman_tools import merge
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLLECTION = os.path.join(os.path.dirname(SCRIPTS), 'postman', 'DocuFlow.postman_collection.json')
+
+
+def load_update_script():
+    spec = importlib.util.spec_from_file_location('update_postman', os.path.join(SCRIPTS, 'update-postman.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def request(name, method, path):
+    return {'name': name, 'request': {'method': method, 'url': {'raw': '{{baseUrl}}' + path,
+                                                                'path': path.strip('/').split('/')}}}
+
+
+def folder(name, *items):
+    return {'name': name, 'item': list(items)}
+
+
+def collection():
+    return {'item': [folder('Auth', request('Login', 'POST', '/api/auth/login')), request('Health Check', 'GET', '/health')]}
+
+
+def test_merge_folders_twice_changes_nothing_the_second_time():
+    target = collection()
+    generated = [folder('Invoices', request('List Invoices', 'GET', '/api/invoices'))]
+    variables = [{'key': 'invoiceId', 'value': '', 'type': 'string'}]
+    first = merge.merge_folders(target, copy.deepcopy(generated), variables)
+    text = merge.serialize(target)
+    second = merge.merge_folders(target, copy.deepcopy(generated), variables)
+
+    assert first.folders_added == ['Invoices'] and first.variables_added == ['invoiceId']
+    assert not second.changed and second.unchanged == 1
+    assert merge.serialize(target) == text
+    # New folders go before Health Check
+    assert [item['name'] for item in target['item']] == ['Auth', 'Invoices', 'Health Check']
+
+
+def test_merge_folders_updates_changed_items_and_collapses_duplicates():
+    target = collection()
+    target['item'].insert(1, folder('Invoices', request('List Invoices', 'GET', '/api/invoices')))
+    target['item'].insert(2, folder('Invoices', request('Get Invoice', 'GET', '/api/invoices/{{invoiceId}}')))
+    renamed = request('All Invoices', 'GET', '/api/invoices')
+    result = merge.merge_folders(target, [folder('Invoices', renamed)])
+
+    invoices = [item for item in target['item'] if item['name'] == 'Invoices']
+    assert len(invoices) == 1
+    assert [item['name'] for item in invoices[0]['item']] == ['All Invoices', 'Get Invoice']
+    assert result.updated == [('Invoices', 'GET', '/api/invoices')]
+
+
+def test_add_missing_keeps_hand_written_items_and_is_idempotent():
+    target = collection()
+    target['item'][0]['item'][0]['event'] = [{'listen': 'test'}]
+    generated = [folder('Auth', request('Login (generated)', 'POST', '/api/auth/login'),
+                        request('Register', 'POST', '/api/auth/register'))]
+    first = merge.add_missing(target, copy.deepcopy(generated))
+    text = merge.serialize(target)
+    second = merge.add_missing(target, copy.deepcopy(generated))
+
+    assert first.added == [('Auth', 'POST', '/api/auth/register')]
+    assert target['item'][0]['item'][0]['name'] == 'Login'
+    assert target['item'][0]['item'][0]['event'] == [{'listen': 'test'}]
+    assert not second.changed
+    assert merge.serialize(target) == text
+
+
+def test_add_missing_reports_and_prunes_stale_items():
+    generated = [folder('Auth', request('Register', 'POST', '/api/auth/register'))]
+    kept = collection()
+    assert merge.add_missing(kept, copy.deepcopy(generated)).stale == [('Auth', 'POST', '/api/auth/login')]
+    pruned = collection()
+    result = merge.add_missing(pruned, copy.deepcopy(generated), prune=True)
+    assert result.removed_stale == [('Auth', 'POST', '/api/auth/login')]
+    assert [item['name'] for item in pruned['item'][0]['item']] == ['Register']
+
+
+def test_update_on_the_checked_in_collection_is_a_no_op(tmp_path, monkeypatch):
+    path = tmp_path / 'collection.json'
+    with open(COLLECTION) as f:
+        original = f.read()
+    path.write_text(original)
+    monkeypatch.chdir(os.path.dirname(SCRIPTS))
+    update = load_update_script()
+
+    assert update.update_collection(str(path), check=True) == 0
+    assert path.read_text() == original
+
+
+def test_write_atomic_skips_identical_content(tmp_path):
+    path = tmp_path / 'nested' / 'file.json'
+    assert merge.write_atomic(str(path), '{}') is True
+    before = os.stat(path).st_mtime_ns
+    assert merge.write_atomic(str(path), '{}') is False
+    assert os.stat(path).st_mtime_ns == before
+    assert merge.write_atomic(str(path), json.dumps({'a': 1})) is True
+    assert json.loads(path.read_text()) == {'a': 1}
+    assert [p.name for p in path.parent.iterdir()] == ['file.json']
@@ -0,0 +1,23 @@
+import json
+import random
+
+from postman_tools.collection import load_collection
+from postman_tools.mock import CannedResponse, MockServer, build_routes
+
+
+def test_path_and_query_values_are_json_escaped_in_json_bodies():
+    server = MockServer(build_routes(load_collection()), seed=1)
+    response, body, _ = server.handle('GET', '/api/invoices/a%22b%5Cc', {})
+    assert response.status == 200
+    assert json.loads(body)['data']['id'] == 'a"b\\c'
+
+
+def test_templated_example_bodies():
+    response = CannedResponse(200, '{"id": "{{id}}", "q": "{{q}}", "n": {{n}}}')
+    body = response.render_body({'id': 'x"}', 'q': 'line\nbreak', 'n': '3'}, random.Random(1))
+    assert json.loads(body) == {'id': 'x"}', 'q': 'line\nbreak', 'n': 3}
+
+
+def test_other_content_types_get_the_raw_value():
+    response = CannedResponse(200, 'id={{id}}', [('Content-Type', 'text/plain')])
+    assert response.render_body({'id': 'a"b'}, random.Random(1)) == b'id=a"b'
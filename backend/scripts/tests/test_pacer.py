@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from postman_tools import pacer
+from postman_tools.client import Response
+from postman_tools.pacer import PacedGroup, TokenBucket, limiter_chain, load_limits
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(pacer, 'time', clock)
+    monkeypatch.setattr(pacer.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def headers(limit=500, remaining=100, reset=50, window=900):
+    return {'ratelimit-limit': str(limit), 'ratelimit-remaining': str(remaining),
+            'ratelimit-reset': str(reset), 'ratelimit-policy': f'{limit};w={window}'}
+
+
+def response(status, code=None, **extra):
+    body = json.dumps({'success': False, 'error': {'code': code}}).encode() if code else b'{}'
+    return Response(status, '', dict(extra), body, True)
+
+
+def test_bucket_spreads_the_remaining_budget_until_the_reset(clock):
+    bucket = TokenBucket('apiLimiter')
+    bucket.update({'ratelimit-remaining': '10'})
+    assert not bucket.seen_headers and bucket.rate is None
+
+    bucket.update(headers())
+    assert (bucket.limit, bucket.window_s, bucket.rate, bucket.capacity, bucket.tokens) == (500, 900, 2.0, 5.0, 1.0)
+    clock.now += 10
+    bucket.update(headers(remaining=3, reset=0))
+    # A reset of 0 counts as one second; the burst is capped by what is left
+    assert (bucket.rate, bucket.capacity, bucket.tokens) == (3.0, 3.0, 3.0)
+
+
+def test_bucket_pauses_until_the_reset_when_exhausted(clock):
+    bucket = TokenBucket('authLimiter')
+    bucket.update(headers(limit=50, remaining=0, reset=30))
+    assert bucket.paused_until == clock.now + 30
+    assert bucket.tokens == 0.0
+    start = clock.now
+    asyncio.run(bucket.take())
+    assert clock.now == start + 30
+
+
+def test_take_waits_for_a_token(clock):
+    bucket = TokenBucket('apiLimiter')
+    bucket.update(headers(remaining=4, reset=2))
+    asyncio.run(bucket.take())
+    assert clock.slept == []
+    asyncio.run(bucket.take())
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_429_pauses_the_limiter_named_by_the_error_code(clock):
+    buckets = {name: TokenBucket(name) for name in ('uploadLimiter', 'apiLimiter')}
+    group = PacedGroup('upload+api', ['uploadLimiter', 'apiLimiter'], [], buckets)
+    codes = {'uploadLimiter': 'UPLOAD_RATE_LIMIT_EXCEEDED', 'apiLimiter': 'API_RATE_LIMIT_EXCEEDED'}
+
+    group.record(0.01, response(429, 'API_RATE_LIMIT_EXCEEDED', **{'ratelimit-reset': '42'}), codes)
+    assert buckets['apiLimiter'].paused_until == clock.now + 42
+    assert buckets['uploadLimiter'].paused_until == 0.0
+    group.record(0.01, response(429, 'UPLOAD_RATE_LIMIT_EXCEEDED', **{'retry-after': '7', 'ratelimit-reset': '42'}), codes)
+    assert buckets['uploadLimiter'].paused_until == clock.now + 7
+    assert (group.requests, group.throttled, group.epoch.count) == (2, 2, 0)
+
+    # Successful responses update the last limiter in the chain
+    group.record(0.01, response(200, **headers()), codes)
+    assert buckets['apiLimiter'].rate == 2.0 and buckets['uploadLimiter'].rate is None
+
+
+def epoch(group, latency=0.01, ok=10, throttled=0):
+    for _ in range(ok):
+        group.epoch.record_seconds(latency)
+    group.epoch_throttled = throttled
+    asyncio.run(group.end_epoch(5.0))
+    return group.limit
+
+
+def test_aimd_slow_start_then_additive_increase_and_halving():
+    group = PacedGroup('api', [], [], {}, max_concurrency=6)
+    # The first epoch sets the latency target to twice its p95, in milliseconds
+    assert epoch(group) == 2
+    assert group.latency_target == pytest.approx(20.0, rel=0.01)
+    assert epoch(group) == 4
+    assert epoch(group, throttled=1) == 2
+    assert not group.slow_start
+    assert epoch(group) == 3
+    assert epoch(group, latency=0.05) == 1
+    # An epoch without responses leaves the limit alone
+    assert epoch(group, ok=0) == 1
+    for _ in range(10):
+        epoch(group)
+    assert group.limit == 6
+    assert group.best['rps'] == 2.0
+    assert [e['healthy'] for e in group.epochs[:6]] == [True, True, False, True, False, False]
+
+
+def test_limiter_chains_from_the_backend_sources():
+    limiters, mounts = load_limits(BACKEND)
+    assert limiters['authLimiter'] == {'max': 50, 'window_s': 900.0, 'code': 'RATE_LIMIT_EXCEEDED', 'skipped': True}
+    assert limiters['webhookLimiter']['max'] == 1000 and limiters['webhookLimiter']['window_s'] == 3600.0
+    assert set(limiters) == {'authLimiter', 'uploadLimiter', 'apiLimiter', 'webhookLimiter'}
+
+    assert limiter_chain('/api/auth/login', mounts) == ['authLimiter']
+    assert limiter_chain('/api/upload', mounts) == ['uploadLimiter', 'apiLimiter']
+    assert limiter_chain('/api/webhooks/n8n/document-processed', mounts) == ['webhookLimiter']
+    assert limiter_chain('/api/invoices/stats', mounts) == ['apiLimiter']
+    # Mounted twice, counted once
+    assert limiter_chain('/api/users/profile', mounts) == ['apiLimiter']
+    assert limiter_chain('/health', mounts) == []
+    assert limiter_chain('/api', mounts) == []
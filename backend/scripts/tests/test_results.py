@@ -0,0 +1,92 @@
+import argparse
+import random
+
+import pytest
+
+from postman_tools.results import compare, connect, mann_whitney, run_compare, runs_needed, save_run
+from postman_tools.stats import LatencyHistogram, RequestStats
+
+
+def runs(count, scale, rng, name='List Invoices', samples=500):
+    """`count` runs whose latencies are scaled by `scale` and by a per-run factor"""
+    result = []
+    for _ in range(count):
+        histogram = LatencyHistogram()
+        factor = scale * rng.uniform(0.8, 1.25)
+        for _ in range(samples):
+            histogram.record_seconds(rng.expovariate(1 / 0.01) * factor)
+        result.append({name: histogram})
+    return result
+
+
+def test_mann_whitney_exact_tail():
+    # All of `new` above all of `base`: one ordering in C(6, 3) = 20
+    assert mann_whitney([1, 2, 3], [4, 5, 6]) == pytest.approx(1 / 20)
+    assert mann_whitney([4, 5, 6], [1, 2, 3]) == pytest.approx(1.0)
+    # Ties count against `new`
+    assert mann_whitney([1, 1, 1], [1, 1, 1]) == pytest.approx(1.0)
+
+
+def test_mann_whitney_normal_approximation_for_large_samples():
+    rng = random.Random(1)
+    base = [rng.random() for _ in range(40)]
+    assert mann_whitney(base, [value + 0.5 for value in base]) < 1e-6
+    assert 0.4 < mann_whitney(base, list(reversed(base))) < 0.6
+
+
+def test_runs_needed():
+    assert [runs_needed(alpha) for alpha in (0.05, 0.01, 0.001)] == [4, 5, 7]
+
+
+def test_single_runs_get_no_verdict():
+    rng = random.Random(2)
+    rows = compare(runs(1, 1, rng), runs(1, 2, rng))
+    assert {row['verdict'] for row in rows} == {'too few runs'}
+
+
+def test_a_a_runs_are_not_regressions():
+    rng = random.Random(3)
+    for _ in range(20):
+        rows = compare(runs(4, 1, rng), runs(4, 1, rng))
+        assert not any(row['verdict'].endswith('regression') for row in rows)
+
+
+def test_a_consistent_slowdown_is_a_regression():
+    rng = random.Random(4)
+    rows = compare(runs(5, 1, rng), runs(5, 2, rng))
+    assert [row['verdict'] for row in rows] == ['❌ regression', '❌ regression']
+    assert all(row['runs'] == '5/5' and row['change'] > 0.5 for row in rows)
+
+
+def test_runs_below_min_samples_are_left_out():
+    rng = random.Random(5)
+    rows = compare(runs(4, 1, rng), runs(4, 2, rng, samples=20))
+    assert {row['verdict'] for row in rows} == {'too few runs'}
+    assert rows[0]['runs'] == '4/0'
+
+
+def test_compare_refuses_to_pool_runs_of_several_environments_or_tools(tmp_path, capsys):
+    path = str(tmp_path / 'results.db')
+    db = connect(path)
+    rng = random.Random(6)
+    for environment, tool in [('local', 'load'), ('staging', 'load'), ('local', 'run:smoke')] * 4:
+        stats = RequestStats('List Invoices')
+        for _ in range(100):
+            stats.record(rng.expovariate(1 / 0.01), 200)
+        save_run(db, tool, environment, [stats], {'elapsed_s': 1.0})
+    db.close()
+
+    def compare_latest(**filters):
+        args = dict(base='latest', new='latest', env=None, tool=None, names=[], threshold=0.1, alpha=0.05,
+                    json_output=None, db=path)
+        args.update(filters)
+        return run_compare(argparse.Namespace(**args)), capsys.readouterr().out
+
+    status, out = compare_latest()
+    assert status == 2
+    assert 'local/load, local/run:smoke, staging/load' in out
+    status, out = compare_latest(env='local')
+    assert status == 2 and 'several environments or tools' in out
+    status, out = compare_latest(env='local', tool='load')
+    assert status == 0
+    assert '(runs #1, #4, #7, #10)' in out
@@ -0,0 +1,97 @@
+import json
+import os
+
+from postman_tools.routes import ROUTES_DIR, RouteCache, parse_route_file
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROUTER = """
+const { body } = require('express-validator');
+
+const noteValidation = [
+  body('kind').isIn([ 'memo', 'todo' ]),
+  body('tags').optional().isArray(),
+  body('priority').isInt({ min: 1 }),
+  body('pinned').isBoolean(),
+  body('text').notEmpty()
+];
+
+/**
+ * @route   GET /api/notes
+ * @desc    List notes
+ * @query   page (number), status
+ */
+router.get('/', authenticate, noteController.listNotes);
+
+/**
+ * @desc    Create a note
+ * @body    text: string, pinned: boolean
+ */
+router.post(
+  '/',
+  authenticate,
+  noteValidation,
+  validate,
+  noteController.createNote
+);
+
+// A comment between the JSDoc and the route detaches it
+/** @desc Not this one */
+const unrelated = 1;
+router.delete('/:id', noteController.deleteNote);
+"""
+
+
+def test_routes_take_the_jsdoc_block_directly_above():
+    routes = parse_route_file(ROUTER)
+    assert [(r['method'], r['path'], r['handler']) for r in routes] == [
+        ('GET', '/', 'listNotes'),
+        ('POST', '/', 'createNote'),
+        ('DELETE', '/:id', 'deleteNote'),
+    ]
+    listing, create, delete = routes
+    assert (listing['desc'], listing['query'], listing['auth']) == ('List notes', ['page', 'status'], True)
+    assert delete['desc'] is None and delete['auth'] is False
+
+
+def test_body_placeholders_from_jsdoc_types_and_validator_chains():
+    create = parse_route_file(ROUTER)[1]
+    # @body fields come first and win over the validator chain's placeholder
+    assert create['body'] == [
+        ('text', ''), ('pinned', False), ('kind', 'memo'), ('tags', []), ('priority', 0),
+    ]
+
+
+def test_router_use_authenticate_protects_every_route():
+    routes = parse_route_file("router.use(authenticate);\nrouter.get('/me', userController.me);")
+    assert routes[0]['auth'] is True
+
+
+def test_job_posting_routes():
+    with open(os.path.join(BACKEND, ROUTES_DIR, 'jobPostings.js')) as f:
+        routes = parse_route_file(f.read())
+    create = next(r for r in routes if r['method'] == 'POST')
+    assert create['body'] == [
+        ('title', ''), ('description', ''), ('required_skills', []), ('preferred_skills', []), ('status', 'open'),
+    ]
+    assert all(r['auth'] for r in routes)
+
+
+def test_route_cache_reparses_only_changed_files(tmp_path):
+    source = tmp_path / 'notes.js'
+    source.write_text(ROUTER)
+    path = str(tmp_path / 'cache' / 'route-tables.json')
+
+    cache = RouteCache(path)
+    table = cache.get(str(source), parse_route_file)
+    cache.save()
+    assert os.listdir(tmp_path / 'cache') == ['route-tables.json']
+    with open(path) as f:
+        assert json.load(f)['version'] == cache.version
+
+    cache = RouteCache(path)
+    # Served from the file: tuples come back as lists
+    assert cache.get(str(source), parse_route_file) == json.loads(json.dumps(table))
+    source.write_text(ROUTER.replace('List notes', 'List all notes'))
+    assert cache.get(str(source), parse_route_file)[0]['desc'] == 'List all notes'
+    assert (cache.hits, cache.misses) == (1, 1)
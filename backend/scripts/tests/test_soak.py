@@ -0,0 +1,57 @@
+import random
+
+from postman_tools.collection import RequestSpec
+from postman_tools.soak import SoakRunner
+from postman_tools.stats import RequestStats
+
+NAME = 'List Invoices'
+
+
+def window(rng, scale=1.0, failures=0, samples=200):
+    stats = RequestStats(NAME)
+    for _ in range(samples):
+        stats.record(rng.expovariate(1 / 0.01) * scale * rng.uniform(0.9, 1.1), 200)
+    for _ in range(failures):
+        stats.record(0.01, 500)
+    return {NAME: stats}, (failures, samples + failures)
+
+
+def runner(rng, tmp_path):
+    soak = SoakRunner([RequestSpec(NAME, None, 'GET', 'http://localhost:1/api/invoices')], str(tmp_path))
+    for _ in range(5):
+        stats, (failures, total) = window(rng)
+        soak.baseline.append({NAME: stats[NAME].latency})
+        soak.baseline_failures[0] += failures
+        soak.baseline_failures[1] += total
+    return soak
+
+
+def feed(soak, windows):
+    events = []
+    for index, item in enumerate(windows):
+        soak.recent.append(item)
+        events += soak._check(index)
+    return events
+
+
+def test_one_slow_window_is_not_confirmed(tmp_path):
+    rng = random.Random(1)
+    soak = runner(rng, tmp_path)
+    windows = [window(rng) for _ in range(4)] + [window(rng, scale=10)] + [window(rng) for _ in range(8)]
+    assert feed(soak, windows) == []
+
+
+def test_one_window_of_errors_is_not_confirmed(tmp_path):
+    rng = random.Random(2)
+    soak = runner(rng, tmp_path)
+    windows = [window(rng) for _ in range(4)] + [window(rng, failures=100)] + [window(rng) for _ in range(8)]
+    assert feed(soak, windows) == []
+
+
+def test_a_sustained_slowdown_is_reported_once(tmp_path):
+    rng = random.Random(3)
+    soak = runner(rng, tmp_path)
+    events = feed(soak, [window(rng, scale=2) for _ in range(12)])
+    assert [event['series'] for event in events] == [f'{NAME} p99']
+    # Five slow windows before the test can reach alpha, then --confirm 3 of them
+    assert events[0]['window'] == 6
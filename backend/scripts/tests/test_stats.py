@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from postman_tools.stats import LatencyHistogram, bucket_index, bucket_value
+
+
+def test_small_values_are_exact():
+    for value in range(256):
+        assert bucket_value(bucket_index(value)) == value
+
+
+def test_bucket_error_is_below_one_sub_bucket():
+    for value in [256, 1000, 12_345, 999_999, 30_000_000]:
+        assert abs(bucket_value(bucket_index(value)) - value) / value <= 1 / 128
+
+
+def test_percentiles_of_a_uniform_range():
+    histogram = LatencyHistogram()
+    for micros in range(1, 10_001):
+        histogram.record(micros)
+    assert histogram.count == 10_000
+    assert (histogram.min, histogram.max) == (1, 10_000)
+    assert histogram.mean == pytest.approx(5000.5)
+    for percent in (50, 95, 99):
+        assert histogram.percentile(percent) == pytest.approx(percent * 100, rel=1 / 128)
+    assert histogram.percentile(100) == 10_000
+
+
+def test_percentile_is_clamped_to_the_observed_range():
+    histogram = LatencyHistogram()
+    histogram.record(1001)
+    assert histogram.percentile(50) == 1001
+    assert LatencyHistogram().percentile(99) == 0
+
+
+def test_negative_and_fractional_values():
+    histogram = LatencyHistogram()
+    histogram.record(-5)
+    histogram.record_seconds(0.0015)
+    assert histogram.min == 0
+    assert histogram.max == 1500
+
+
+def test_merge_matches_recording_everything_in_one():
+    rng = random.Random(7)
+    values = [int(rng.expovariate(1 / 5000)) for _ in range(5000)]
+    whole, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        whole.record(value)
+        (first if i % 2 else second).record(value)
+    merged = first.merge(second)
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.percentile(99) == whole.percentile(99)
+
+
+def test_dict_round_trip():
+    histogram = LatencyHistogram()
+    for micros in (10, 300, 300, 70_000):
+        histogram.record(micros)
+    restored = LatencyHistogram.from_dict(histogram.to_dict())
+    assert restored.to_dict() == histogram.to_dict()
+    assert restored.cumulative([100, 1000, 100_000]) == [1, 3, 4]
@@ -0,0 +1,113 @@
+import pytest
+
+from postman_tools.validation import MAX_ERRORS, Operation, SchemaCompiler
+
+COMPONENTS = {'schemas': {
+    'Error': {
+        'type': 'object',
+        'required': ['success', 'error'],
+        'properties': {
+            'success': {'type': 'boolean', 'enum': [False]},
+            'error': {'type': 'object', 'required': ['code', 'message'],
+                      'properties': {'code': {'type': 'string'}, 'message': {'type': 'string'}}},
+        },
+    },
+    'Folder': {
+        'type': 'object',
+        'required': ['name'],
+        'properties': {
+            'name': {'type': 'string', 'minLength': 1},
+            'children': {'type': 'array', 'items': {'$ref': '#/components/schemas/Folder'}},
+        },
+    },
+}}
+
+
+def errors(schema, value):
+    found = []
+    SchemaCompiler(COMPONENTS).compile(schema)(value, found)
+    return found
+
+
+def test_types_required_and_additional_properties():
+    schema = {
+        'type': 'object',
+        'required': ['id', 'count'],
+        'additionalProperties': False,
+        'properties': {'id': {'type': 'string', 'format': 'uuid'}, 'count': {'type': 'integer'}},
+    }
+    assert errors(schema, {'id': '123e4567-e89b-12d3-a456-426614174000', 'count': 2}) == []
+    assert errors(schema, {'id': 'abc', 'count': True, 'extra': 1}) == [
+        "body.id: 'abc' is not a valid uuid",
+        'body.count: expected integer, got boolean',
+        "body: unexpected property 'extra'",
+    ]
+    assert errors(schema, {'id': '123e4567-e89b-12d3-a456-426614174000'}) == ["body: missing required property 'count'"]
+    assert errors(schema, []) == ['body: expected object, got array']
+
+
+def test_integer_valued_floats_are_integers():
+    assert errors({'type': 'integer'}, 3.0) == []
+    assert errors({'type': 'integer'}, 3.5) == ['body: expected integer, got number']
+
+
+def test_nullable():
+    schema = {'type': 'string', 'nullable': True, 'enum': ['a']}
+    assert errors(schema, None) == []
+    assert errors(schema, 'a') == []
+    assert errors(schema, 'b') == ["body: 'b' is not one of ['a']"]
+    assert errors({'type': 'string'}, None) == ['body: expected string, got null']
+
+
+def test_boolean_exclusive_bounds():
+    schema = {'type': 'number', 'minimum': 0, 'exclusiveMinimum': True, 'maximum': 10}
+    assert errors(schema, 0.5) == []
+    assert errors(schema, 10) == []
+    assert errors(schema, 0) == ['body: 0 is below the minimum 0']
+    assert errors(schema, 11) == ['body: 11 is above the maximum 10']
+    assert errors({'type': 'number', 'minimum': 0}, 0) == []
+
+
+def test_recursive_refs():
+    schema = {'$ref': '#/components/schemas/Folder'}
+    tree = {'name': 'a', 'children': [{'name': 'b', 'children': [{'name': 'c'}]}]}
+    assert errors(schema, tree) == []
+    tree['children'][0]['children'][0]['name'] = ''
+    # Nested levels of a recursive schema report the outer level's path
+    assert errors(schema, tree) == ['body.name: length 0 outside [1, ]']
+    tree['children'][0]['children'] = [{'children': []}]
+    assert errors(schema, tree) == ["body: missing required property 'name'"]
+    with pytest.raises(ValueError, match='unresolved'):
+        errors({'$ref': '#/components/schemas/Missing'}, {})
+
+
+def test_combined_schemas():
+    small = {'type': 'integer', 'maximum': 10}
+    even = {'type': 'integer', 'enum': [2, 4, 12]}
+    assert errors({'allOf': [small, even]}, 4) == []
+    assert errors({'allOf': [small, even]}, 12) == ['body: 12 is above the maximum 10']
+    assert errors({'anyOf': [small, even]}, 12) == []
+    assert errors({'anyOf': [small, even]}, 13) == ['body: matches 0 of the 2 anyOf schemas']
+    assert errors({'oneOf': [small, even]}, 3) == []
+    assert errors({'oneOf': [small, even]}, 4) == ['body: matches 2 of the 2 oneOf schemas']
+
+
+def test_arrays_stop_after_max_errors():
+    schema = {'type': 'array', 'items': {'type': 'string'}, 'maxItems': 100}
+    assert len(errors(schema, list(range(50)))) == MAX_ERRORS
+    assert errors(schema, ['a'] * 101) == ['body: more than 100 items']
+
+
+def test_undocumented_error_statuses_fall_back_to_the_error_schema():
+    compiler = SchemaCompiler(COMPONENTS)
+    ok = compiler.compile({'type': 'object', 'required': ['success']})
+    fallback = compiler.compile({'$ref': '#/components/schemas/Error'})
+    operation = Operation('GET /api/invoices/{id}', {'200': ok, '4XX': ok}, fallback)
+    assert operation.validator(200) is ok
+    assert operation.validator(404) is ok
+    assert operation.validator(500) is fallback
+    assert operation.validator(204) is None
+
+    found = []
+    operation.validator(500)({'success': False, 'error': {'code': 'INTERNAL_ERROR'}}, found)
+    assert found == ["body.error: missing required property 'message'"]
@@ -0,0 +1,28 @@
+from postman_tools.warmup import MIN_SAMPLES, Combination
+
+
+def probed(passes, cold=0.05, warm=0.005):
+    combination = Combination('overview', {})
+    for i in range(passes):
+        combination.cold.record_seconds(cold + i * 0.001)
+        for j in range(3):
+            combination.warm.record_seconds(warm + j * 0.0001)
+        combination.passes.append((cold + i * 0.001, warm + 0.0001))
+    return combination
+
+
+def test_too_few_cold_samples_get_no_verdict():
+    row = probed(1).summary(min_ms=20, speedup=2, alpha=0.01)
+    assert row['speedup'] > 5
+    assert row['verdict'] == 'insufficient samples'
+
+
+def test_enough_fast_warm_passes_are_cached():
+    row = probed(MIN_SAMPLES).summary(min_ms=20, speedup=2, alpha=0.01)
+    assert row['p_value'] < 0.01
+    assert row['verdict'] == '✅ cached'
+
+
+def test_slow_identical_responses_are_cache_candidates():
+    row = probed(MIN_SAMPLES, cold=0.05, warm=0.05).summary(min_ms=20, speedup=2, alpha=0.01)
+    assert row['verdict'] == '💡 cache candidate'
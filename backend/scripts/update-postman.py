@@ -1,12 +1,54 @@
 #!/usr/bin/env python3
 """
 Script to update Postman collection with Day 5 endpoints
-Adds Invoices, Resumes, Contracts, and Receipts sections
+Adds Invoices, Resumes, Contracts, and Receipts sections, plus any endpoint
+found in src/routes/*.js or docs/swagger.yaml that the collection is missing
+
+Subcommands:
+    update  Merge the Day 5 and route-generated folders into the collection (default)
+    load    Replay the collection against baseUrl with concurrent virtual users
+    run     Run a chained scenario (login, upload, webhooks, read back) per virtual user
+    webhooks  Generate synthetic n8n webhook payloads or benchmark webhook ingest
+    mock    Serve the collection as a local mock API with injectable latency and errors
+    compare Flag significant p95/p99 regressions between two stored benchmark runs
+    runs    List the benchmark runs stored with --save
+    pace    Ramp concurrency per rate-limit group to find the sustainable request rate
+    upload  Generate synthetic PDFs or benchmark streaming uploads to /api/upload
+    export  Export invoices, receipts, contracts and documents to JSONL/Parquet with parallel paging
+    analytics  Compute dashboard and report aggregates offline from an export, or check them against the API
+    seed    Generate a large seeded dataset as COPY files for psql or through the API
+    envs    Build one collection per environment in a matrix (baseUrl, account, folders) in parallel
+    soak    Run a fixed mixed workload for hours, snapshotting rolling p99/error rates and flagging drift
+    warm    Warm the dashboard reports ahead of peak hours, or probe where a server-side cache would pay off
 """
 
+import argparse
+import importlib
 import json
 import sys
 
+from postman_tools import COLLECTION_PATH, merge, payloads, routes
+
+# Subcommand -> (postman_tools module, its argument function, its run function, help).
+# A module is imported only when its command runs, so `--help` and `update` start
+# without asyncio or NumPy.
+COMMANDS = {
+    'load': ('loadgen', 'add_arguments', 'run', 'Load test the API by replaying the collection'),
+    'run': ('scenario', 'add_arguments', 'run', 'Run a chained request scenario per virtual user'),
+    'webhooks': ('webhooks', 'add_arguments', 'run', 'Generate or benchmark synthetic n8n webhook payloads'),
+    'mock': ('mock', 'add_arguments', 'run', 'Serve the collection as a local mock API'),
+    'compare': ('results', 'add_compare_arguments', 'run_compare', 'Compare two stored benchmark runs'),
+    'runs': ('results', 'add_runs_arguments', 'run_list', 'List stored benchmark runs'),
+    'pace': ('pacer', 'add_arguments', 'run', 'Find the sustainable request rate per rate-limit group'),
+    'upload': ('uploads', 'add_arguments', 'run', 'Generate synthetic PDFs or benchmark streaming uploads'),
+    'export': ('exporter', 'add_arguments', 'run', 'Export resources to JSONL/Parquet with parallel paging'),
+    'analytics': ('analytics', 'add_arguments', 'run', 'Compute dashboard and report aggregates offline'),
+    'seed': ('seeder', 'add_arguments', 'run', 'Generate a large seeded dataset as SQL files or through the API'),
+    'envs': ('environments', 'add_arguments', 'run', 'Build one collection per environment in a matrix file'),
+    'soak': ('soak', 'add_arguments', 'run', 'Run the load mix for hours and flag latency, error and memory drift'),
+    'warm': ('warmup', 'add_arguments', 'run', 'Warm the dashboard reports or probe cold versus warm latency'),
+}
+
 def create_invoice_endpoints():
     """Create Invoice folder with 5 endpoints"""
     return {
@@ -198,11 +240,11 @@ def create_resume_endpoints():
                         }, indent=2)
                     },
                     "url": {
-                        "raw": "{{baseUrl}}/api/resumes/{{resumeId}}/match-job",
+                        "raw": "{{baseUrl}}/api/resumes/{{resumeId}}/match",
                         "host": ["{{baseUrl}}"],
-                        "path": ["api", "resumes", "{{resumeId}}", "match-job"]
+                        "path": ["api", "resumes", "{{resumeId}}", "match"]
                     },
-                    "description": "Match resume with job posting using weighted scoring algorithm (60% skills, 20% preferred, 20% experience)"
+                    "description": "Match resume with job posting using weighted scoring algorithm (60% skills, 30% experience, 10% location)"
                 },
                 "response": []
             }
@@ -442,12 +484,13 @@ def create_receipt_endpoints():
         ]
     }
 
-def main():
+def update_collection(path=COLLECTION_PATH, check=False, prune=False, use_routes=True):
     # Read existing collection
-    with open('postman/DocuFlow.postman_collection.json', 'r') as f:
-        collection = json.load(f)
+    with open(path, 'r') as f:
+        original = f.read()
+    collection = json.loads(original)
     
-    # Add new collection variables
+    # Collection variables used by the new folders
     new_vars = [
         {"key": "invoiceId", "value": "", "type": "string"},
         {"key": "resumeId", "value": "", "type": "string"},
@@ -455,29 +498,93 @@ def main():
         {"key": "receiptId", "value": "", "type": "string"}
     ]
     
-    for var in new_vars:
-        if not any(v['key'] == var['key'] for v in collection['variable']):
-            collection['variable'].append(var)
+    folders = [
+        create_invoice_endpoints(),
+        create_resume_endpoints(),
+        create_contract_endpoints(),
+        create_receipt_endpoints()
+    ]
     
-    # Find insertion point (before Health Check)
-    health_check_index = next(i for i, item in enumerate(collection['item']) if item['name'] == 'Health Check')
+    # Build folders from the Express routes; curated items above take precedence
+    generated = []
+    if use_routes:
+        generated, undocumented = routes.generate_folders()
+        for key in routes.overlay(generated, folders):
+            print(f"⚠️  {key[0]}: {key[1]} {key[2]} is not served by src/routes")
+        for key in undocumented:
+            print(f"⚠️  swagger.yaml documents {key} but no route serves it")
     
-    # Insert new folders
-    collection['item'].insert(health_check_index, create_invoice_endpoints())
-    collection['item'].insert(health_check_index + 1, create_resume_endpoints())
-    collection['item'].insert(health_check_index + 2, create_contract_endpoints())
-    collection['item'].insert(health_check_index + 3, create_receipt_endpoints())
+    # Merge folders in place (new folders go before Health Check); the synthetic
+    # payload folder has no route file of its own, so it skips the overlay above
+    result = merge.merge_folders(collection, folders + [payloads.create_payload_folder()], new_vars)
+    merge.add_missing(collection, generated, prune=prune, result=result)
+    updated = merge.serialize(collection)
     
-    # Write updated collection
-    with open('postman/DocuFlow.postman_collection.json', 'w') as f:
-        json.dump(collection, f, indent='\t')
+    if updated == original and not result.stale:
+        print(f"✅ Postman collection is up to date ({result.unchanged} endpoints unchanged)")
+        return 0
     
-    print("✅ Postman collection updated successfully!")
-    print("📝 Added 4 new folders with 22 endpoints:")
-    print("   - Invoices (5 endpoints)")
-    print("   - Resumes (5 endpoints)")
-    print("   - Contracts (6 endpoints)")
-    print("   - Receipts (6 endpoints)")
+    if check:
+        print("❌ Postman collection is out of date:")
+    elif updated != original:
+        # Write updated collection
+        merge.write_atomic(path, updated)
+        print("✅ Postman collection updated successfully!")
+    else:
+        print("⚠️  Postman collection has stale endpoints:")
+    
+    for line in result.lines():
+        print(line)
+    if updated != original and not result.changed:
+        print("   ~ formatting only")
+    return 1 if check else 0
+
+def _selected_command(argv):
+    """The subcommand named in argv, found without importing any subcommand module"""
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument('--collection')
+    pre.add_argument('command', nargs='?')
+    known, _ = pre.parse_known_args(argv)
+    return known.command
+
+def _command_module(command):
+    return importlib.import_module(f'postman_tools.{COMMANDS[command][0]}')
+
+def build_parser(argv=None):
+    parser = argparse.ArgumentParser(description='DocuFlow Postman collection tools')
+    parser.add_argument('--collection', default=COLLECTION_PATH,
+                        help=f'Path to the collection file (default: {COLLECTION_PATH})')
+    subparsers = parser.add_subparsers(dest='command')
+
+    update_parser = subparsers.add_parser('update', help='Merge the Day 5 and route-generated folders into the collection')
+    update_parser.add_argument('--check', action='store_true',
+                               help='Exit non-zero if the collection is out of date, without writing')
+    update_parser.add_argument('--prune', action='store_true',
+                               help='Remove requests whose method and path no route serves')
+    update_parser.add_argument('--no-routes', dest='use_routes', action='store_false',
+                               help='Only merge the hand-maintained Day 5 folders')
+
+    # Every command is listed, but only the selected one gets its options
+    selected = _selected_command(sys.argv[1:] if argv is None else argv)
+    for command, (_, add_arguments, _, help_text) in COMMANDS.items():
+        command_parser = subparsers.add_parser(command, help=help_text)
+        if command == selected:
+            getattr(_command_module(command), add_arguments)(command_parser)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser(argv).parse_args(argv)
+
+    if args.command in COMMANDS:
+        return getattr(_command_module(args.command), COMMANDS[args.command][2])(args)
+
+    return update_collection(
+        args.collection,
+        check=getattr(args, 'check', False),
+        prune=getattr(args, 'prune', False),
+        use_routes=getattr(args, 'use_routes', True),
+    )
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())